@@ -0,0 +1,211 @@
+"""
+Stockage découpé et adressé par contenu (sauvegardes incrémentales).
+
+Disposition sur disque pour un projet 'dessin.illus' :
+    dessin.illus            manifeste JSON (titre, page, liste ordonnée des blocs)
+    dessin.illus.d/<h>.json un bloc = une tranche de formes consécutives (ordre z),
+                            nommé par le SHA-256 de son contenu
+
+- Les formes sont découpées en tranches d'ordre z d'au plus CHUNK_SIZE formes.
+  Les frontières sont stables : une tranche commence là où commençait une
+  tranche de la sauvegarde précédente, donc insérer / supprimer une forme ne
+  décale pas tout le découpage.
+- Une tranche n'est ré-encodée que si sa composition a changé ou si l'une de
+  ses formes porte une révision ('_rev', cf. core.shapes) postérieure à la
+  dernière sauvegarde. Les autres réutilisent leur empreinte connue.
+- Le manifeste est écrit dans un fichier temporaire puis substitué avec
+  os.replace (atomique) ; les blocs qui ne sont plus référencés sont ensuite
+  supprimés.
+- Le chargement lit et décode les blocs en parallèle (pool de threads).
+
+Le même ChunkStore doit être réutilisé d'une sauvegarde à l'autre pour que
+seules les tranches modifiées soient réécrites.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.document import Document
+from core.shapes import SymbolDef, shape_from_dict, uid
+
+FORMAT = "mini-illustrator/chunks"
+VERSION = 1
+CHUNK_SIZE = 2000
+EXTENSION = ".illus"
+
+
+def _rev(obj) -> int:
+    return obj.__dict__.get("_rev", 0)
+
+
+def _encode(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_atomic(path: str, data: bytes):
+    """Écrit dans un fichier temporaire voisin puis le substitue (os.replace)."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ChunkStore:
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.dir = path + ".d"
+        self.chunk_size = chunk_size
+        # état de la dernière sauvegarde / du dernier chargement :
+        # clé = tuple des uid() des formes de la tranche → (révision max, empreinte)
+        self._chunks: dict[tuple, tuple[int, str]] = {}
+        self._anchors: set[int] = set()   # uid() de la 1re forme de chaque tranche
+        self._symbols: Optional[tuple] = None  # (uid des symboles, révision max, empreinte)
+
+    # ------------------- DÉCOUPAGE -------------------
+    def _partition(self, shapes) -> list[list]:
+        """Tranches d'ordre z, en conservant les frontières précédentes."""
+        anchors, size = self._anchors, self.chunk_size
+        chunks, cur = [], []
+        for s in shapes:
+            if cur and (len(cur) >= size or uid(s) in anchors):
+                chunks.append(cur)
+                cur = []
+            cur.append(s)
+        if cur:
+            chunks.append(cur)
+        return chunks
+
+    def _put(self, data) -> tuple[str, bool]:
+        """Écrit un bloc sous son empreinte (s'il n'existe pas déjà)."""
+        raw = _encode(data)
+        h = hashlib.sha256(raw).hexdigest()
+        path = os.path.join(self.dir, h + ".json")
+        if os.path.exists(path):
+            return h, False
+        _write_atomic(path, raw)
+        return h, True
+
+    # ------------------- SAUVEGARDE -------------------
+    def save(self, doc: Document) -> dict:
+        """Sauvegarde incrémentale ; renvoie {"chunks", "encoded", "written", "removed"}."""
+        os.makedirs(self.dir, exist_ok=True)
+        encoded = written = 0
+
+        old, new = self._chunks, {}
+        hashes = []
+        for chunk in self._partition(doc.shapes):
+            key = tuple(map(uid, chunk))
+            rev = max(map(_rev, chunk))
+            known = old.get(key)
+            if known is not None and known[0] >= rev:
+                h = known[1]
+            else:
+                h, wrote = self._put([s.to_dict() for s in chunk])
+                encoded += 1
+                written += wrote
+            new[key] = (rev, h)
+            hashes.append(h)
+
+        manifest = {
+            "format": FORMAT,
+            "version": VERSION,
+            "title": doc.title,
+            "width": doc.width,
+            "height": doc.height,
+            "chunks": hashes,
+        }
+        if doc.symbols:
+            key = tuple(map(uid, doc.symbols.values()))
+            rev = max(map(_rev, doc.symbols.values()))
+            if self._symbols is not None and self._symbols[0] == key and self._symbols[1] >= rev:
+                h = self._symbols[2]
+            else:
+                h, wrote = self._put({sid: sym.to_dict() for sid, sym in doc.symbols.items()})
+                encoded += 1
+                written += wrote
+            self._symbols = (key, rev, h)
+            manifest["symbols"] = h
+        else:
+            self._symbols = None
+
+        _write_atomic(self.path, _encode(manifest))
+        self._chunks = new
+        self._anchors = {key[0] for key in new}
+        removed = self.collect_garbage(manifest)
+        return {"chunks": len(hashes), "encoded": encoded, "written": written, "removed": removed}
+
+    def collect_garbage(self, manifest: Optional[dict] = None) -> int:
+        """Supprime les blocs (et temporaires) non référencés par le manifeste."""
+        if manifest is None:
+            manifest = self._read_manifest()
+        live = set(manifest["chunks"])
+        if manifest.get("symbols"):
+            live.add(manifest["symbols"])
+        removed = 0
+        for name in os.listdir(self.dir):
+            if name.endswith(".tmp") or name[:-len(".json")] not in live:
+                try:
+                    os.remove(os.path.join(self.dir, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"Erreur suppression bloc {name} : {e}")
+        return removed
+
+    # ------------------- CHARGEMENT -------------------
+    def _read_manifest(self) -> dict:
+        with open(self.path, "rb") as f:
+            manifest = json.loads(f.read())
+        if manifest.get("format") != FORMAT:
+            raise ValueError(f"{self.path} : manifeste inconnu")
+        return manifest
+
+    def _read_chunk(self, h: str):
+        with open(os.path.join(self.dir, h + ".json"), "rb") as f:
+            return json.loads(f.read())
+
+    def load(self, workers: Optional[int] = None) -> Document:
+        """Charge le document ; les blocs sont lus et décodés en parallèle."""
+        manifest = self._read_manifest()
+        doc = Document(
+            title=manifest.get("title", "Sans titre"),
+            width=manifest.get("width", 1200),
+            height=manifest.get("height", 800),
+        )
+        hashes = manifest["chunks"]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            sym_future = pool.submit(self._read_chunk, manifest["symbols"]) \
+                if manifest.get("symbols") else None
+            datas = list(pool.map(self._read_chunk, hashes))
+
+        if sym_future is not None:
+            for sid, sd in sym_future.result().items():
+                try:
+                    doc.symbols[sid] = SymbolDef.from_dict(sid, sd)
+                except Exception as e:
+                    print(f"Erreur chargement symbole : {e}")
+
+        self._chunks = {}
+        for h, data in zip(hashes, datas):
+            chunk = []
+            for sd in data:
+                try:
+                    chunk.append(shape_from_dict(sd))
+                except Exception as e:
+                    print(f"Erreur chargement forme : {e}")
+            doc.shapes.extend(chunk)
+            if chunk:
+                self._chunks[tuple(map(uid, chunk))] = (max(map(_rev, chunk)), h)
+        self._anchors = {key[0] for key in self._chunks}
+
+        for sym in doc.symbols.values():
+            doc._resolve_symbols(sym.shapes)
+        doc._resolve_symbols(doc.shapes)
+        if doc.symbols:
+            self._symbols = (tuple(map(uid, doc.symbols.values())),
+                             max(map(_rev, doc.symbols.values())), manifest["symbols"])
+        return doc
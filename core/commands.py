@@ -2,7 +2,15 @@
 Squelette du système de commandes (Undo/Redo).
 - À l'étape 0, on a juste une pile vide pour cable les menus.
 - À l'étape 3, on y ajoutera des vraies commandes (AddShape, MoveShape, etc.).
+- SetPropertyCommand : édition groupée d'un attribut (inspecteur).
+- trim() : limite l'historique (budgets mémoire, cf. core.diagnostics).
+- SetValuesCommand / AddShapesCommand / MacroCommand : opérations en masse
+  de l'API de script (Document.add_shapes, translate, restyle…).
+- GroupCommand / UngroupCommand / DefineSymbolCommand : changements de
+  structure (Document.group / ungroup / define_symbol, menus Édition).
 """
+from core.shapes import GroupShape, InstanceShape, SymbolDef, TransformShape, union_bounds
+
 
 class Command:
     """Interface minimale : chaque commande sait s'exécuter et s'annuler."""
@@ -45,3 +53,229 @@ class CommandStack:
         cmd = self.redo_stack.pop()
         cmd.do()
         self.undo_stack.append(cmd)
+
+    def clear(self):
+        """Vide les deux piles (document remplacé : ses commandes n'ont plus de sens)."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def trim(self, keep: int) -> int:
+        """Oublie les plus anciennes commandes au-delà de 'keep' ; renvoie le nombre retiré."""
+        extra = max(0, len(self.undo_stack) - keep)
+        del self.undo_stack[:extra]
+        return extra
+
+
+class SetPropertyCommand(Command):
+    """Affecte un attribut sur N formes en une seule passe (une seule entrée undo).
+    'old_values' permet de fournir l'état d'avant un aperçu déjà appliqué."""
+    def __init__(self, shapes, name: str, value, old_values=None):
+        self.shapes = list(shapes)
+        self.name = name
+        self.value = value
+        self.old_values = (list(old_values) if old_values is not None
+                           else [getattr(s, name) for s in self.shapes])
+
+    def do(self):
+        name, value = self.name, self.value
+        for s in self.shapes:
+            setattr(s, name, value)
+
+    def undo(self):
+        name = self.name
+        for s, v in zip(self.shapes, self.old_values):
+            setattr(s, name, v)
+
+
+class SetValuesCommand(Command):
+    """Affecte des valeurs PAR FORME : rows[i] = valeurs de names pour shapes[i].
+    Les anciennes valeurs sont relevées à la construction (une seule entrée undo)."""
+    def __init__(self, shapes, names, rows):
+        self.shapes = list(shapes)
+        self.names = tuple(names)
+        self.rows = rows
+        self.old_rows = [[getattr(s, n) for n in self.names] for s in self.shapes]
+
+    def _apply(self, rows):
+        names = self.names
+        for s, row in zip(self.shapes, rows):
+            for name, v in zip(names, row):
+                setattr(s, name, v)
+
+    def do(self):
+        self._apply(self.rows)
+
+    def undo(self):
+        self._apply(self.old_rows)
+
+
+class AddShapesCommand(Command):
+    """Ajoute un lot de formes en fin de document (au-dessus des autres)."""
+    def __init__(self, doc, shapes):
+        self.doc = doc
+        self.shapes = list(shapes)
+
+    def do(self):
+        self.doc.shapes.extend(self.shapes)
+        self.doc.shapes_changed()
+
+    def undo(self):
+        n = len(self.shapes)
+        tail = self.doc.shapes[-n:] if n else []
+        if len(tail) == n and all(a is b for a, b in zip(tail, self.shapes)):
+            del self.doc.shapes[-n:]
+            self.doc.shapes_changed()
+        else:
+            self.doc.remove_shapes(self.shapes)
+
+
+class MacroCommand(Command):
+    """Plusieurs commandes exécutées / annulées comme une seule."""
+    def __init__(self, commands):
+        self.commands = list(commands)
+
+    def do(self):
+        for c in self.commands:
+            c.do()
+
+    def undo(self):
+        for c in reversed(self.commands):
+            c.undo()
+
+
+class ReplaceShapesCommand(Command):
+    """Remplace des formes de premier niveau par une seule, à la place de la
+    plus haute (ordre Z conservé). Les sous-classes fixent self.shape et
+    rattachent / détachent les membres (attach / detach)."""
+    label = "remplacement"
+
+    def __init__(self, doc, shapes):
+        ids = {id(s) for s in shapes}
+        self.positions = [i for i, s in enumerate(doc.shapes) if id(s) in ids]
+        if not self.positions:
+            raise ValueError(f"{self.label} : aucune forme de premier niveau du document")
+        self.doc = doc
+        self.members = [doc.shapes[i] for i in self.positions]
+        self.shape = None
+
+    def attach(self):
+        raise NotImplementedError
+
+    def detach(self):
+        raise NotImplementedError
+
+    def do(self):
+        ids = {id(s) for s in self.members}
+        top = max(i for i, s in enumerate(self.doc.shapes) if id(s) in ids)
+        self.doc.shapes[:] = [self.shape if i == top else s for i, s in enumerate(self.doc.shapes)
+                              if id(s) not in ids or i == top]
+        self.attach()
+        self.doc.shapes_changed()
+
+    def undo(self):
+        self.detach()
+        shapes = self.doc.shapes
+        del shapes[shapes.index(self.shape)]
+        for i, s in zip(self.positions, self.members):  # positions croissantes
+            shapes.insert(i, s)
+        self.doc.shapes_changed()
+
+
+class GroupCommand(ReplaceShapesCommand):
+    """Regroupe des formes de premier niveau dans un nouveau GroupShape."""
+    label = "group"
+
+    def __init__(self, doc, shapes):
+        super().__init__(doc, shapes)
+        self.shape = GroupShape(0.0, 0.0, 0.0, 0.0)  # enfants rattachés par do()
+
+    def attach(self):
+        g = self.shape
+        g.children[:] = self.members
+        for c in self.members:
+            c.parent = g
+        g.invalidate_bounds()
+        g.touch()
+
+    def detach(self):
+        for c in self.members:
+            c.parent = None
+        self.shape.children.clear()
+        self.shape.invalidate_bounds()
+
+
+class UngroupCommand(Command):
+    """Dissout un groupe de premier niveau : sa transformation est appliquée
+    aux enfants, qui reprennent sa place dans l'ordre Z."""
+    def __init__(self, doc, group):
+        self.doc = doc
+        self.group = group
+        self.children = list(group.children)
+        self.names = [("x", "y", "sx", "sy") if isinstance(c, TransformShape) else ("x", "y", "w", "h")
+                      for c in self.children]
+        self.old_rows = [[getattr(c, n) for n in names] for c, names in zip(self.children, self.names)]
+        self.rows = [[*group.to_parent(x, y), a * group.sx, b * group.sy]
+                     for x, y, a, b in self.old_rows]
+
+    def _apply(self, rows):
+        for c, names, row in zip(self.children, self.names, rows):
+            for name, v in zip(names, row):
+                setattr(c, name, v)
+
+    def do(self):
+        g = self.group
+        i = self.doc.shapes.index(g)
+        for c in self.children:
+            c.parent = None
+        self._apply(self.rows)
+        g.children.clear()
+        g.invalidate_bounds()
+        self.doc.shapes[i:i + 1] = self.children
+        self.doc.shapes_changed()
+
+    def undo(self):
+        g = self.group
+        i = self.doc.shapes.index(self.children[0]) if self.children else len(self.doc.shapes)
+        self.doc.shapes[i:i + len(self.children)] = [g]
+        self._apply(self.old_rows)
+        g.children[:] = self.children
+        for c in self.children:
+            c.parent = g
+        g.invalidate_bounds()
+        g.touch()
+        self.doc.shapes_changed()
+
+
+class DefineSymbolCommand(ReplaceShapesCommand):
+    """Transforme des formes de premier niveau en symbole et les remplace par
+    une instance (origine du symbole = coin haut-gauche des formes)."""
+    label = "define_symbol"
+
+    def __init__(self, doc, shapes):
+        super().__init__(doc, shapes)
+        self.x0, self.y0, _, _ = union_bounds(self.members)
+        n = len(doc.symbols) + 1
+        while f"sym{n}" in doc.symbols:
+            n += 1
+        self.symbol = SymbolDef(f"sym{n}")  # formes rattachées par do()
+        self.shape = InstanceShape(self.x0, self.y0, 0.0, 0.0, ref=self.symbol.id, symbol=self.symbol)
+
+    def attach(self):
+        sym = self.symbol
+        for s in self.members:
+            s.x -= self.x0
+            s.y -= self.y0
+            s.parent = sym
+        sym.shapes[:] = self.members
+        sym.invalidate_bounds()
+        self.doc.symbols[sym.id] = sym
+
+    def detach(self):
+        sym = self.symbol
+        del self.doc.symbols[sym.id]
+        sym.shapes.clear()
+        sym.invalidate_bounds()
+        for s in self.members:
+            s.parent = None
+            s.x += self.x0
+            s.y += self.y0
@@ -0,0 +1,361 @@
+"""
+Diagnostic mémoire : où part la mémoire quand un gros document est ouvert.
+
+- memory_report() : nombre d'objets et octets ESTIMÉS par sous-système
+    * formes par type (arbre complet : groupes et contenu des symboles)
+    * historique undo/redo (CommandStack)
+    * caches : QPicture des symboles + caches enregistrés par les modules
+      (register_cache), p. ex. géométrie des formes, mise en page des
+      textes, couleurs de l'import SVG, maillage 3D.
+- MemoryTracer : instantanés tracemalloc (opt-in) comparés autour des
+  opérations lourdes (chargement, sauvegarde, grosses éditions).
+- Budgets / enforce_budgets() : au-delà des seuils, l'historique est
+  raccourci et les caches les plus gros sont vidés (ou réduits, pour ceux
+  qui évincent en LRU comme les mipmaps d'images).
+
+Les tailles sont des estimations (sys.getsizeof sur un échantillon de chaque
+type, tableaux NumPy / images Qt à leur taille réelle) : elles servent à
+comparer les sous-systèmes, pas à reproduire le RSS du processus.
+
+Rapport JSON sans interface :
+    python -m core.diagnostics dessin.json [-o rapport.json] [--trace]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+from core.shapes import GroupShape, cached_shapes, drop_caches
+
+SAMPLE = 64  # formes mesurées par type pour l'estimation
+
+
+# ------------------- CACHES ENREGISTRÉS -------------------
+@dataclass
+class CacheProbe:
+    size: Callable[[], tuple[int, int]]  # → (entrées, octets estimés)
+    clear: Callable[[], None]
+
+
+CACHES: dict[str, CacheProbe] = {}
+
+
+def register_cache(name: str, size: Callable[[], tuple[int, int]], clear: Callable[[], None]):
+    """Déclare un cache pour le rapport et l'éviction (remplace un nom existant)."""
+    CACHES[name] = CacheProbe(size, clear)
+
+
+def unregister_cache(name: str):
+    CACHES.pop(name, None)
+
+
+def dict_cache_size(cache: dict) -> tuple[int, int]:
+    """(entrées, octets) d'un dict de cache : table + clés + valeurs (un niveau)."""
+    total = sys.getsizeof(cache)
+    for k, v in cache.items():
+        total += sys.getsizeof(k) + sys.getsizeof(v)
+    return len(cache), total
+
+
+def _geometry_size() -> tuple[int, int]:
+    """Caches '_geo' de toutes les formes (estimé sur un échantillon)."""
+    caches = [g for g in (s.__dict__.get("_geo") for s in cached_shapes("_geo")) if g is not None]
+    if not caches:
+        return 0, 0
+    sample = caches[:SAMPLE]
+    per = sum(dict_cache_size(g)[1] for g in sample) / len(sample)
+    return len(caches), int(per * len(caches))
+
+
+register_cache("shapes.geometry", _geometry_size, lambda: drop_caches("_geo"))
+
+
+def _layout_bytes(cache) -> int:
+    """Mise en page d'un TextShape : clé + lignes + glyphes (index 4 o, position 16 o)."""
+    key, lines, _ = cache
+    total = sys.getsizeof(cache) + sys.getsizeof(key[0]) + sys.getsizeof(lines)
+    for line in lines:
+        total += sys.getsizeof(line)
+        for run in line[4]:
+            total += 64 + 20 * len(run.glyphIndexes())
+    return total
+
+
+def _text_layout_size() -> tuple[int, int]:
+    """Caches '_text' des TextShape (estimé sur un échantillon)."""
+    caches = [c for c in (s.__dict__.get("_text") for s in cached_shapes("_text")) if c is not None]
+    if not caches:
+        return 0, 0
+    sample = caches[:SAMPLE]
+    per = sum(_layout_bytes(c) for c in sample) / len(sample)
+    return len(caches), int(per * len(caches))
+
+
+register_cache("shapes.text_layout", _text_layout_size, lambda: drop_caches("_text"))
+
+
+# ------------------- ESTIMATIONS -------------------
+def _object_bytes(obj) -> int:
+    """Objet + son __dict__ + valeurs scalaires non partagées (float)."""
+    d = obj.__dict__
+    total = sys.getsizeof(obj) + sys.getsizeof(d)
+    for v in d.values():
+        if type(v) is float:
+            total += 24
+        elif type(v) in (list, tuple, dict):
+            total += sys.getsizeof(v)  # conteneur seul (les formes sont comptées à part)
+    return total
+
+
+def _iter_shapes(doc):
+    """Toutes les formes : arbre du document puis contenu des symboles."""
+    stack = list(doc.shapes)
+    for sym in doc.symbols.values():
+        stack.extend(sym.shapes)
+    while stack:
+        s = stack.pop()
+        yield s
+        if isinstance(s, GroupShape):
+            stack.extend(s.children)
+
+
+def shape_report(doc) -> dict:
+    counts: dict[str, int] = {}
+    samples: dict[str, list] = {}
+    for s in _iter_shapes(doc):
+        name = type(s).__name__
+        counts[name] = counts.get(name, 0) + 1
+        sample = samples.setdefault(name, [])
+        if len(sample) < SAMPLE:
+            sample.append(_object_bytes(s))
+    by_type = {name: {"count": n, "bytes": int(n * sum(samples[name]) / len(samples[name]))}
+               for name, n in sorted(counts.items())}
+    return {
+        "count": sum(counts.values()),
+        "bytes": sum(t["bytes"] for t in by_type.values()) + sys.getsizeof(doc.shapes),
+        "by_type": by_type,
+    }
+
+
+def _rows_bytes(rows: list) -> int:
+    """Lignes de valeurs (SetValuesCommand : rows / old_rows) : chaque ligne et
+    ses valeurs, estimées sur un échantillon (le conteneur est déjà compté)."""
+    sample = rows[:SAMPLE]
+    per = sum(sys.getsizeof(r) + sum(sys.getsizeof(x) for x in r) for r in sample) / len(sample)
+    return int(per * len(rows))
+
+
+def _command_bytes(cmd) -> int:
+    total = _object_bytes(cmd)
+    for v in cmd.__dict__.values():
+        if type(v) is list and v:
+            if hasattr(v[0], "do"):
+                total += sum(_command_bytes(c) for c in v)  # MacroCommand
+            elif type(v[0]) in (list, tuple):
+                total += _rows_bytes(v)
+            elif not hasattr(v[0], "__dict__"):
+                # entrées scalaires (anciennes valeurs) : comptées sur le premier élément
+                total += len(v) * sys.getsizeof(v[0])
+    return total
+
+
+def history_report(commands) -> dict:
+    return {
+        "undo": len(commands.undo_stack),
+        "redo": len(commands.redo_stack),
+        "bytes": sum(_command_bytes(c) for c in commands.undo_stack)
+                 + sum(_command_bytes(c) for c in commands.redo_stack),
+    }
+
+
+def _symbol_pictures(doc) -> tuple[int, int]:
+    pics = [sym._picture for sym in doc.symbols.values() if sym._picture is not None]
+    return len(pics), sum(p.size() for p in pics)
+
+
+def cache_report(doc) -> dict:
+    out = {}
+    n, b = _symbol_pictures(doc)
+    out["symbols.pictures"] = {"entries": n, "bytes": b}
+    for name, probe in CACHES.items():
+        n, b = probe.size()
+        out[name] = {"entries": n, "bytes": b}
+    return out
+
+
+def clear_cache(name: str, doc=None):
+    if name == "symbols.pictures":
+        for sym in doc.symbols.values():
+            sym._picture = None
+    else:
+        CACHES[name].clear()
+
+
+# ------------------- BUDGETS -------------------
+@dataclass
+class Budgets:
+    history_entries: int = 500          # commandes conservées dans l'undo
+    history_bytes: int = 64 << 20       # octets estimés de l'historique
+    cache_bytes: int = 256 << 20        # total des caches
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Budgets":
+        return cls(**{k: int(float(v)) for k, v in data.items() if k in cls.__dataclass_fields__})
+
+    @classmethod
+    def from_env(cls) -> "Budgets":
+        """Budgets surchargés par MINI_ILLUSTRATOR_BUDGETS='{"cache_bytes": 1e8, ...}'."""
+        raw = os.environ.get("MINI_ILLUSTRATOR_BUDGETS")
+        if not raw:
+            return cls()
+        try:
+            return cls.from_dict(json.loads(raw))
+        except (ValueError, TypeError) as e:
+            print(f"Erreur MINI_ILLUSTRATOR_BUDGETS : {e}")
+            return cls()
+
+
+def enforce_budgets(doc, commands, budgets: Budgets) -> list[str]:
+    """Raccourcit l'historique / vide les caches au-delà des budgets.
+    Renvoie la liste des actions effectuées (vide si tout est dans les clous)."""
+    actions = []
+    n = commands.trim(budgets.history_entries)
+    if n:
+        actions.append(f"historique : {n} commande(s) oubliée(s)")
+    if history_report(commands)["bytes"] > budgets.history_bytes:
+        # on retire les plus anciennes jusqu'à repasser sous le budget
+        sizes = [_command_bytes(c) for c in commands.undo_stack]
+        total = sum(sizes) + sum(_command_bytes(c) for c in commands.redo_stack)
+        drop = 0
+        while drop < len(sizes) and total > budgets.history_bytes:
+            total -= sizes[drop]
+            drop += 1
+        commands.trim(len(sizes) - drop)
+        if drop:
+            actions.append(f"historique : {drop} commande(s) oubliée(s) (octets)")
+    caches = cache_report(doc)
+    total = sum(c["bytes"] for c in caches.values())
+    for name, c in sorted(caches.items(), key=lambda kv: -kv[1]["bytes"]):
+        if total <= budgets.cache_bytes or not c["bytes"]:
+            break
+        clear_cache(name, doc)
+        # certains caches n'évincent qu'une partie (LRU) : on remesure
+        freed = c["bytes"] - cache_report(doc)[name]["bytes"]
+        total -= freed
+        actions.append(f"cache {name} réduit ({freed / 1e6:.1f} Mo libérés)")
+    return actions
+
+
+# ------------------- TRACEMALLOC -------------------
+class MemoryTracer:
+    """Instantanés tracemalloc autour d'opérations nommées (désactivé par défaut :
+    tracemalloc ralentit nettement les allocations)."""
+    TOP = 10
+
+    def __init__(self):
+        self.enabled = False
+        self.diffs: list[dict] = []
+
+    def set_enabled(self, on: bool):
+        self.enabled = on
+        if on and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not on and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, label: str):
+        if not self.enabled:
+            yield
+            return
+        before = tracemalloc.take_snapshot()
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t
+            after = tracemalloc.take_snapshot()
+            stats = after.compare_to(before, "lineno")
+            self.diffs.append({
+                "label": label,
+                "seconds": round(seconds, 4),
+                "delta_bytes": sum(st.size_diff for st in stats),
+                "peak_bytes": tracemalloc.get_traced_memory()[1],
+                "top": [{"where": str(st.traceback), "delta_bytes": st.size_diff,
+                         "delta_count": st.count_diff} for st in stats[:self.TOP]],
+            })
+            tracemalloc.reset_peak()
+
+
+TRACER = MemoryTracer()
+
+
+# ------------------- RAPPORT -------------------
+def memory_report(doc, commands=None, budgets: Optional[Budgets] = None,
+                  tracer: MemoryTracer = TRACER) -> dict:
+    report = {
+        "shapes": shape_report(doc),
+        "history": history_report(commands) if commands is not None else None,
+        "caches": cache_report(doc),
+    }
+    if budgets is not None:
+        report["budgets"] = asdict(budgets)
+    if tracer.diffs:
+        report["tracemalloc"] = tracer.diffs
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Version texte (boîte de dialogue de la MainWindow)."""
+    mo = lambda b: f"{b / 1e6:.2f} Mo"
+    sh = report["shapes"]
+    lines = [f"Formes : {sh['count']}  ≈ {mo(sh['bytes'])}"]
+    for name, t in sh["by_type"].items():
+        lines.append(f"    {name} : {t['count']}  ≈ {mo(t['bytes'])}")
+    h = report.get("history")
+    if h:
+        lines.append(f"Historique : {h['undo']} annulable(s), {h['redo']} rétablissable(s)"
+                     f"  ≈ {mo(h['bytes'])}")
+    lines.append("Caches :")
+    for name, c in report["caches"].items():
+        lines.append(f"    {name} : {c['entries']} entrée(s)  ≈ {mo(c['bytes'])}")
+    for d in report.get("tracemalloc", [])[-5:]:
+        lines.append(f"tracemalloc [{d['label']}] : {d['delta_bytes'] / 1e6:+.2f} Mo "
+                     f"(pic {mo(d['peak_bytes'])}, {d['seconds']:.2f} s)")
+    return "\n".join(lines)
+
+
+def dump_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    ap = argparse.ArgumentParser(description="Rapport mémoire Mini-Illustrator (sans interface)")
+    ap.add_argument("document", help="projet .json ou .illus")
+    ap.add_argument("-o", "--output", help="fichier JSON du rapport (défaut : sortie standard)")
+    ap.add_argument("--trace", action="store_true", help="instantanés tracemalloc (chargement/sauvegarde)")
+    a = ap.parse_args()
+
+    from core.chunk_store import ChunkStore, EXTENSION
+    from core.io_json import save_document, load_document
+
+    TRACER.set_enabled(a.trace)
+    with TRACER.measure("load"):
+        doc = ChunkStore(a.document).load() if a.document.endswith(EXTENSION) \
+            else load_document(a.document)
+    with tempfile.TemporaryDirectory() as tmp, TRACER.measure("save"):
+        save_document(doc, os.path.join(tmp, "doc.json"))
+    report = memory_report(doc)
+    if a.output:
+        dump_report(report, a.output)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
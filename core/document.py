@@ -2,11 +2,43 @@
 Document gère la liste de formes.
 On ajoute :
  - add_shape(), remove_shape()
+ - group() / ungroup() : arbre de GroupShape (les formes de premier niveau
+   restent dans 'shapes', les enfants vivent dans leur groupe)
+ - symbols : définitions partagées (SymbolDef) référencées par des
+   InstanceShape ; define_symbol() / add_instance()
  - to_dict() / from_dict() mis à jour pour stocker les formes
+ - API de script en masse (tableaux / séquences, une commande par appel) :
+   add_shapes(), query(), geometry(), translate(), scale(), align(),
+   distribute(), restyle()
 """
 
 from dataclasses import dataclass, field
-from core.shapes import Shape, shape_from_dict
+from itertools import repeat
+
+import numpy as np
+
+from core.commands import (
+    AddShapesCommand, DefineSymbolCommand, GroupCommand, MacroCommand, SetValuesCommand,
+    UngroupCommand,
+)
+from core.shapes import (
+    Shape, GroupShape, TransformShape, SymbolDef, InstanceShape, SHAPE_TYPES,
+    bounds_intersect, notify, shape_from_dict, union_bounds,
+)
+
+ALIGN_EDGES = ("left", "hcenter", "right", "top", "vcenter", "bottom")
+
+
+def _column(values, default, n: int):
+    """Valeur unique (ou None → défaut) répétée, ou séquence de n valeurs."""
+    if values is None:
+        values = default
+    if np.ndim(values) == 0:  # str, nombre, scalaire NumPy
+        return repeat(values.item() if isinstance(values, np.generic) else values, n)
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    if len(values) != n:
+        raise ValueError(f"{len(values)} valeurs pour {n} formes")
+    return values
 
 @dataclass
 class Document:
@@ -14,23 +46,201 @@ class Document:
     width: int = 1200
     height: int = 800
     shapes: list[Shape] = field(default_factory=list)
+    symbols: dict[str, SymbolDef] = field(default_factory=dict)
+
+    def shapes_changed(self):
+        """À appeler après toute modification directe de la liste 'shapes'
+        (prévient les caches abonnés : repaint, tuiles…)."""
+        notify(self, "shapes")
 
     def clear(self):
         self.shapes.clear()
+        self.symbols.clear()
+        self.shapes_changed()
 
     def add_shape(self, shape: Shape):
         self.shapes.append(shape)
+        self.shapes_changed()
 
     def remove_shape(self, shape: Shape):
         self.shapes.remove(shape)
+        self.shapes_changed()
+
+    def remove_shapes(self, shapes: list[Shape]):
+        """Suppression groupée en une passe (par identité)."""
+        ids = {id(s) for s in shapes}
+        self.shapes[:] = [s for s in self.shapes if id(s) not in ids]
+        self.shapes_changed()
+
+    def group(self, shapes: list[Shape], commands=None) -> GroupShape:
+        """Regroupe des formes de premier niveau (ordre Z conservé).
+        Le groupe prend la place de la forme la plus haute."""
+        return self._run(GroupCommand(self, shapes), commands).shape
+
+    def ungroup(self, g: GroupShape, commands=None) -> list[Shape]:
+        """Dissout un groupe de premier niveau : sa transformation est
+        appliquée aux enfants, qui reprennent sa place dans l'ordre Z."""
+        return self._run(UngroupCommand(self, g), commands).children
+
+    # --------- symboles ---------
+    def define_symbol(self, shapes: list[Shape], commands=None) -> InstanceShape:
+        """Transforme des formes de premier niveau en symbole et les remplace
+        par une instance (origine du symbole = coin haut-gauche des formes)."""
+        return self._run(DefineSymbolCommand(self, shapes), commands).shape
+
+    def add_instance(self, ref: str, x: float, y: float, sx: float = 1.0, sy: float = 1.0) -> InstanceShape:
+        inst = InstanceShape(x, y, 0.0, 0.0, sx=sx, sy=sy, ref=ref, symbol=self.symbols[ref])
+        self.shapes.append(inst)
+        self.shapes_changed()
+        return inst
+
+    # --------- opérations en masse (API de script) ---------
+    # Entrées : scalaires ou tableaux (listes, NumPy…) diffusés sur les formes.
+    # Chaque appel = UNE commande : poussée dans 'commands' (annulable) si fourni,
+    # sinon exécutée directement.
+    @staticmethod
+    def _run(cmd, commands):
+        if commands is None:
+            cmd.do()
+        else:
+            commands.push(cmd)
+        return cmd
+
+    def add_shapes(self, kind, x, y, w, h, stroke_color=None, fill_color=None,
+                   stroke_width=None, commands=None) -> list[Shape]:
+        """Crée n formes 'rect' / 'ellipse' / 'line' (ou classe) en fin de document."""
+        cls = SHAPE_TYPES[kind] if isinstance(kind, str) else kind
+        geo = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, y, w, h)))
+        n = geo[0].size
+        cols = [g.ravel().tolist() for g in geo]
+        cols += [_column(stroke_color, "#000000", n), _column(fill_color, "#FFFFFF", n),
+                 _column(stroke_width, 2, n)]
+        shapes = [cls(*args) for args in zip(*cols)]
+        self._run(AddShapesCommand(self, shapes), commands)
+        return shapes
+
+    def query(self, kind=None, bbox=None, where=None) -> list[Shape]:
+        """Formes de premier niveau filtrées par type ('rect' ou classe),
+        intersection avec bbox (x0, y0, x1, y1) et prédicat where(s)."""
+        out = self.shapes
+        if kind is not None:
+            cls = SHAPE_TYPES[kind] if isinstance(kind, str) else kind
+            out = [s for s in out if isinstance(s, cls)]
+        if bbox is not None:
+            out = [s for s in out if bounds_intersect(s.bounds(), bbox)]
+        if where is not None:
+            out = [s for s in out if where(s)]
+        return list(out)
+
+    @staticmethod
+    def geometry(shapes) -> np.ndarray:
+        """Tableau (n, 4) des (x, y, w, h)."""
+        return np.array([(s.x, s.y, s.w, s.h) for s in shapes], dtype=float).reshape(-1, 4)
+
+    @staticmethod
+    def bounds_array(shapes) -> np.ndarray:
+        """Tableau (n, 4) des bbox normalisées (x0, y0, x1, y1), trait inclus."""
+        return np.array([s.bounds() for s in shapes], dtype=float).reshape(-1, 4)
+
+    def translate(self, shapes, dx, dy, commands=None):
+        """Déplace chaque forme de (dx, dy) (scalaires ou un décalage par forme)."""
+        shapes = list(shapes)
+        g = self.geometry(shapes)
+        x = g[:, 0] + np.broadcast_to(np.asarray(dx, dtype=float), len(shapes))
+        y = g[:, 1] + np.broadcast_to(np.asarray(dy, dtype=float), len(shapes))
+        return self._run(SetValuesCommand(shapes, ("x", "y"), np.column_stack([x, y]).tolist()),
+                         commands)
+
+    def scale(self, shapes, sx, sy=None, origin=(0.0, 0.0), commands=None):
+        """Mise à l'échelle autour de 'origin' : position et taille des formes
+        simples, position et échelle (sx/sy) des groupes / instances."""
+        shapes = list(shapes)  # parcourue deux fois (générateur accepté)
+        sy = sx if sy is None else sy
+        ox, oy = origin
+        plain = [s for s in shapes if not isinstance(s, TransformShape)]
+        nested = [s for s in shapes if isinstance(s, TransformShape)]
+        cmds = []
+        if plain:
+            g = self.geometry(plain)
+            rows = np.column_stack([ox + (g[:, 0] - ox) * sx, oy + (g[:, 1] - oy) * sy,
+                                    g[:, 2] * sx, g[:, 3] * sy])
+            cmds.append(SetValuesCommand(plain, ("x", "y", "w", "h"), rows.tolist()))
+        if nested:
+            rows = [(ox + (s.x - ox) * sx, oy + (s.y - oy) * sy, s.sx * sx, s.sy * sy)
+                    for s in nested]
+            cmds.append(SetValuesCommand(nested, ("x", "y", "sx", "sy"), rows))
+        return self._run(MacroCommand(cmds), commands)
+
+    def align(self, shapes, edge: str, commands=None):
+        """Aligne les bbox sur le bord (ou le centre) de leur union.
+        Aucune forme : rien à faire, pas de commande (None)."""
+        if edge not in ALIGN_EDGES:
+            raise ValueError(f"Alignement inconnu : {edge} (attendu : {', '.join(ALIGN_EDGES)})")
+        shapes = list(shapes)
+        if not shapes:
+            return None
+        b = self.bounds_array(shapes)
+        lo, hi = (b[:, 0], b[:, 2]) if edge in ALIGN_EDGES[:3] else (b[:, 1], b[:, 3])
+        if edge in ("left", "top"):
+            d = lo.min() - lo
+        elif edge in ("right", "bottom"):
+            d = hi.max() - hi
+        else:
+            d = (lo.min() + hi.max()) / 2 - (lo + hi) / 2
+        zero = np.zeros(len(shapes))
+        return (self.translate(shapes, d, zero, commands) if edge in ALIGN_EDGES[:3]
+                else self.translate(shapes, zero, d, commands))
+
+    def distribute(self, shapes, axis: str = "x", commands=None):
+        """Répartit les centres à pas constant entre les deux formes extrêmes."""
+        if axis not in ("x", "y"):
+            raise ValueError(f"Axe inconnu : {axis}")
+        shapes = list(shapes)
+        b = self.bounds_array(shapes)
+        k = 0 if axis == "x" else 1
+        c = (b[:, k] + b[:, k + 2]) / 2
+        order = np.argsort(c, kind="stable")
+        d = np.zeros(len(shapes))
+        if len(shapes):
+            d[order] = np.linspace(c[order[0]], c[order[-1]], len(shapes)) - c[order]
+        zero = np.zeros(len(shapes))
+        return self.translate(shapes, d, zero, commands) if axis == "x" \
+            else self.translate(shapes, zero, d, commands)
+
+    def restyle(self, shapes, stroke_color=None, fill_color=None, stroke_width=None,
+                commands=None):
+        """Change le style (valeur unique ou une par forme) ; None = inchangé.
+        Rien à changer (aucune forme ou aucun style donné) : pas de commande (None)."""
+        shapes = list(shapes)
+        given = [(name, v) for name, v in (("stroke_color", stroke_color),
+                                             ("fill_color", fill_color),
+                                             ("stroke_width", stroke_width)) if v is not None]
+        if not given or not shapes:
+            return None
+        cols = [_column(v, None, len(shapes)) for _, v in given]
+        rows = [row for _, *row in zip(shapes, *cols)]  # borné par les formes (repeat infini)
+        return self._run(SetValuesCommand(shapes, [name for name, _ in given], rows), commands)
+
+    def _resolve_symbols(self, shapes):
+        """Relie chaque InstanceShape (même dans un groupe/symbole) à sa définition."""
+        for s in shapes:
+            if isinstance(s, InstanceShape):
+                s.symbol = self.symbols.get(s.ref)
+                if s.symbol is None:
+                    print(f"Symbole inconnu : {s.ref}")
+            elif isinstance(s, GroupShape):
+                self._resolve_symbols(s.children)
 
     def to_dict(self):
-        return {
+        data = {
             "title": self.title,
             "width": self.width,
             "height": self.height,
             "shapes": [s.to_dict() for s in self.shapes],
         }
+        if self.symbols:
+            data["symbols"] = {sid: sym.to_dict() for sid, sym in self.symbols.items()}
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> "Document":
@@ -39,9 +249,17 @@ class Document:
             width=data.get("width", 1200),
             height=data.get("height", 800),
         )
+        for sid, sd in data.get("symbols", {}).items():
+            try:
+                doc.symbols[sid] = SymbolDef.from_dict(sid, sd)
+            except Exception as e:
+                print(f"Erreur chargement symbole : {e}")
         for sd in data.get("shapes", []):
             try:
                 doc.shapes.append(shape_from_dict(sd))
             except Exception as e:
                 print(f"Erreur chargement forme : {e}")
+        for sym in doc.symbols.values():
+            doc._resolve_symbols(sym.shapes)
+        doc._resolve_symbols(doc.shapes)
         return doc
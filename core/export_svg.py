@@ -0,0 +1,90 @@
+"""
+Export du Document au format SVG.
+- Les groupes deviennent des <g transform="...">.
+- Les symboles sont écrits une fois dans <defs><symbol>, chaque instance
+  devient un <use> (taille du fichier ∝ nombre de symboles distincts).
+- Une image devient <image> (lien vers le fichier, pas de données inline).
+- Un texte devient <text>, une <tspan> par ligne explicite (le retour à la
+  ligne automatique à la largeur de la boîte n'existe pas en SVG 1.1).
+- Parcours de l'arbre avec culling : une forme (ou un sous-arbre entier)
+  dont la bbox ne touche pas la page n'est pas écrite.
+"""
+
+from xml.sax.saxutils import escape, quoteattr
+from core.document import Document
+from core.shapes import (
+    Shape, RectShape, EllipseShape, LineShape, TextShape, ImageShape, GroupShape, InstanceShape,
+    bounds_intersect,
+)
+
+_TEXT_ANCHOR = {"left": ("start", 0.0), "center": ("middle", 0.5), "right": ("end", 1.0)}
+
+
+def _style(s: Shape, fill: bool = True) -> str:
+    f = s.fill_color if fill and s.fill_color else "none"
+    return (f'stroke={quoteattr(s.stroke_color or "none")} fill={quoteattr(f)} '
+            f'stroke-width="{s.stroke_width}"')
+
+
+def _shape_to_svg(s: Shape, view, out: list[str], indent: str):
+    """Ajoute à 'out' les lignes SVG de la forme (et de ses enfants).
+    view=None → pas de culling (contenu des <symbol>)."""
+    if view is not None and not bounds_intersect(s.bounds(), view):
+        return
+    if isinstance(s, GroupShape):
+        if not s.visible:
+            return
+        out.append(f'{indent}<g transform="translate({s.x} {s.y}) scale({s.sx} {s.sy})">')
+        local = s.local_view(view) if view is not None else None
+        for c in s.children:
+            _shape_to_svg(c, local, out, indent + "  ")
+        out.append(f"{indent}</g>")
+    elif isinstance(s, InstanceShape):
+        out.append(f'{indent}<use xlink:href="#{s.ref}" '
+                   f'transform="translate({s.x} {s.y}) scale({s.sx} {s.sy})"/>')
+    elif isinstance(s, RectShape):
+        x0, y0, x1, y1 = s.norm_rect()
+        out.append(f'{indent}<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" {_style(s)}/>')
+    elif isinstance(s, EllipseShape):
+        out.append(f'{indent}<ellipse cx="{s.x + s.w / 2}" cy="{s.y + s.h / 2}" '
+                   f'rx="{abs(s.w) / 2}" ry="{abs(s.h) / 2}" {_style(s)}/>')
+    elif isinstance(s, TextShape):
+        x0, y0, x1, _ = s.norm_rect()
+        anchor, k = _TEXT_ANCHOR.get(s.align, _TEXT_ANCHOR["left"])
+        x = x0 + (x1 - x0) * k
+        out.append(f'{indent}<text x="{x}" y="{y0}" font-family={quoteattr(s.font_family)} '
+                   f'font-size="{s.font_size}" text-anchor="{anchor}" '
+                   f'fill={quoteattr(s.fill_color or "#000000")}>')
+        for line in s.text.split("\n"):
+            out.append(f'{indent}  <tspan x="{x}" dy="1.2em">{escape(line)}</tspan>')
+        out.append(f"{indent}</text>")
+    elif isinstance(s, ImageShape):
+        x0, y0, x1, y1 = s.norm_rect()
+        out.append(f'{indent}<image x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" '
+                   f'preserveAspectRatio="none" xlink:href={quoteattr(s.path)}/>')
+    elif isinstance(s, LineShape):
+        out.append(f'{indent}<line x1="{s.x}" y1="{s.y}" x2="{s.x + s.w}" y2="{s.y + s.h}" '
+                   f'{_style(s, fill=False)}/>')
+
+
+def export_svg(doc: Document, path: str) -> None:
+    """Écrit le document en SVG (zone exportée = page Document.width × height)."""
+    view = (0.0, 0.0, float(doc.width), float(doc.height))
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{doc.width}" height="{doc.height}" viewBox="0 0 {doc.width} {doc.height}">',
+    ]
+    if doc.symbols:
+        out.append("  <defs>")
+        for sid, sym in doc.symbols.items():
+            out.append(f'    <symbol id={quoteattr(sid)} overflow="visible">')
+            for c in sym.shapes:
+                _shape_to_svg(c, None, out, "      ")
+            out.append("    </symbol>")
+        out.append("  </defs>")
+    for s in doc.shapes:
+        _shape_to_svg(s, view, out, "  ")
+    out.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out) + "\n")
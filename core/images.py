@@ -0,0 +1,255 @@
+"""
+Images raster référencées (ImageShape) : décodage paresseux et mipmaps.
+
+- Une image n'est décodée que la première fois qu'elle est dessinée (donc
+  visible : draw_shapes() saute les formes hors vue), sur un thread du pool.
+- Le décodage construit une pyramide : niveau 0 = pleine résolution, niveau
+  k = dimensions / 2**k, jusqu'à MIN_SIDE pixels. Le dessin choisit le niveau
+  le plus proche de l'échelle écran (pas de réduction d'un bitmap de 50 Mpx
+  à chaque frame).
+- Les niveaux vivent dans un cache LRU partagé, borné en octets (budget,
+  inférieur au budget global des caches de core.diagnostics) ; un niveau
+  évincé est redécodé directement à sa taille (QImageReader setScaledSize)
+  quand on le redemande. En attendant, le dessin utilise le niveau
+  disponible le plus proche, sinon un motif d'attente. L'éviction demandée
+  par enforce_budgets() retire les niveaux les plus anciens (trim), elle ne
+  vide pas tout le cache.
+- add_ready_listener(fn) : fn(chemin) est appelé DEPUIS LE THREAD DU POOL
+  quand un niveau arrive ; l'interface doit repasser sur son thread (signal Qt).
+
+Les niveaux sont rangés sous l'empreinte SHA-256 du contenu (deux chemins
+vers le même fichier partagent leurs niveaux). L'empreinte est calculée une
+seule fois par chemin, sur le pool : dès le placement / l'ouverture
+(request_hash), sinon au premier décodage, et comparée à celle enregistrée
+dans le document si elle existe. adopt_hashes() la recopie ensuite, sur le
+thread GUI, dans les ImageShape qui n'en ont pas encore (la forme est
+estampillée : la sauvegarde incrémentale la réécrit).
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.diagnostics import register_cache
+
+BUDGET = 128 << 20   # octets de pixels gardés en cache (< Budgets.cache_bytes)
+MIN_SIDE = 64        # dernier niveau de la pyramide (plus grand côté)
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 du fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def image_size(path: str) -> tuple[int, int]:
+    """Dimensions lues dans l'en-tête (sans décoder les pixels)."""
+    from PyQt6.QtGui import QImageReader
+    size = QImageReader(path).size()
+    if not size.isValid():
+        raise ValueError(f"{path} : image illisible")
+    return size.width(), size.height()
+
+
+def level_count(width: int, height: int) -> int:
+    side = max(width, height, 1)
+    return max(1, math.ceil(math.log2(side / MIN_SIDE)) + 1) if side > MIN_SIDE else 1
+
+
+class ImageCache:
+    def __init__(self, budget: int = BUDGET, workers: Optional[int] = None):
+        self.budget = budget
+        self._levels: OrderedDict = OrderedDict()  # (clé, niveau) → QImage (ordre LRU)
+        self._sizes: dict[str, tuple[int, int]] = {}  # clé → dimensions pleine résolution
+        self._hashes: dict[str, str] = {}          # chemin → clé (empreinte du contenu)
+        self._bytes = 0
+        self._pending: set = set()                 # (chemin, niveau | None = pyramide | "hash") en cours
+        self._failed: set = set()                  # chemins illisibles (pas de nouvel essai)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers or 2, thread_name_prefix="image")
+        self._listeners: list = []
+
+    def add_ready_listener(self, fn):
+        self._listeners.append(fn)
+
+    def remove_ready_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    # --------- lecture (thread de dessin) ---------
+    def content_hash(self, path: str) -> str:
+        """Empreinte du fichier si le pool l'a déjà calculée, sinon ''."""
+        return self._hashes.get(path, "")
+
+    def request_hash(self, path: str):
+        """Lance le calcul de l'empreinte sur le pool (sans décoder les pixels) ;
+        les abonnés sont prévenus quand elle est connue."""
+        with self._lock:
+            job = (path, "hash")
+            if path in self._hashes or path in self._failed or job in self._pending:
+                return
+            self._pending.add(job)
+        self._pool.submit(self._hash, path)
+
+    def size(self, path: str) -> Optional[tuple[int, int]]:
+        return self._sizes.get(self._hashes.get(path))
+
+    def failed(self, path: str) -> bool:
+        return path in self._failed
+
+    def get(self, path: str, level: int, expected: str = ""):
+        """Niveau demandé s'il est en cache, sinon le plus proche disponible
+        (et décodage du niveau demandé lancé en arrière-plan). None si rien.
+        expected = empreinte enregistrée (vérifiée au premier décodage)."""
+        with self._lock:
+            key = self._hashes.get(path)
+            img = self._levels.get((key, level)) if key else None
+            if img is not None:
+                self._levels.move_to_end((key, level))
+                return img
+            # tant que l'empreinte et les dimensions sont inconnues, une seule tâche : toute la pyramide
+            job = (path, level if key in self._sizes else None)
+            if path not in self._failed and job not in self._pending:
+                self._pending.add(job)
+                self._pool.submit(self._decode, path, job[1], expected)
+            n = level_count(*self._sizes[key]) if key in self._sizes else 0
+            for k in sorted(range(n), key=lambda k: abs(k - level)):
+                img = self._levels.get((key, k))
+                if img is not None:
+                    return img
+        return None
+
+    # --------- décodage (thread du pool) ---------
+    def _hash(self, path: str):
+        try:
+            key = file_hash(path)
+            with self._lock:
+                self._hashes.setdefault(path, key)
+        except OSError as e:
+            print(f"Erreur lecture image {path} : {e}")
+            with self._lock:
+                self._failed.add(path)
+        finally:
+            with self._lock:
+                self._pending.discard((path, "hash"))
+        for fn in list(self._listeners):
+            fn(path)
+
+    def _decode(self, path: str, level: Optional[int], expected: str = ""):
+        from PyQt6.QtCore import QSize, Qt
+        from PyQt6.QtGui import QImage, QImageReader
+        try:
+            if level is None:
+                # premier décodage : empreinte calculée ici si request_hash ne l'a pas déjà fait
+                key = self._hashes.get(path) or file_hash(path)
+                if expected and expected != key:
+                    print(f"Attention : {path} a changé depuis son placement (empreinte différente)")
+            else:
+                key = self._hashes[path]
+            reader = QImageReader(path)
+            reader.setAutoTransform(True)
+            if level:
+                # niveau évincé : décodé directement à sa taille
+                w, h = self._sizes[key]
+                reader.setScaledSize(QSize(max(1, w >> level), max(1, h >> level)))
+            img = reader.read()
+            if img.isNull():
+                raise ValueError(reader.errorString())
+            img = img.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            if level is not None:
+                levels = {level: img}
+            else:
+                # premier décodage : toute la pyramide, par divisions successives
+                levels = {0: img}
+                for k in range(1, level_count(img.width(), img.height())):
+                    img = img.scaled(max(1, img.width() // 2), max(1, img.height() // 2),
+                                     Qt.AspectRatioMode.IgnoreAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+                    levels[k] = img
+            with self._lock:
+                if level is None:
+                    self._sizes[key] = (levels[0].width(), levels[0].height())
+                    self._hashes[path] = key
+                for k, im in levels.items():
+                    self._put((key, k), im)
+        except Exception as e:
+            print(f"Erreur décodage image {path} : {e}")
+            with self._lock:
+                self._failed.add(path)
+        finally:
+            with self._lock:
+                self._pending.discard((path, level))
+        for fn in list(self._listeners):
+            fn(path)
+
+    def _put(self, k, img):
+        """Insère un niveau puis évince les plus anciens au-delà du budget (sous verrou)."""
+        old = self._levels.pop(k, None)
+        if old is not None:
+            self._bytes -= old.sizeInBytes()
+        self._levels[k] = img
+        self._bytes += img.sizeInBytes()
+        self._evict(self.budget)
+
+    def _evict(self, target: int):
+        """Retire les niveaux les moins récemment utilisés jusqu'à target octets (sous verrou)."""
+        while self._bytes > target and len(self._levels) > 1:
+            _, evicted = self._levels.popitem(last=False)
+            self._bytes -= evicted.sizeInBytes()
+
+    # --------- diagnostic ---------
+    def cache_size(self) -> tuple[int, int]:
+        return len(self._levels), self._bytes
+
+    def trim(self):
+        """Éviction sous contrainte mémoire : garde la moitié du budget, les
+        niveaux les plus récemment dessinés (ceux à l'écran) restent en cache."""
+        with self._lock:
+            self._evict(self.budget // 2)
+
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+            self._bytes = 0
+            self._failed.clear()
+
+    def forget(self, path: str):
+        """Permet un nouvel essai (fichier réparé / remplacé) : empreinte recalculée."""
+        with self._lock:
+            self._failed.discard(path)
+            self._hashes.pop(path, None)
+
+
+IMAGES = ImageCache()
+register_cache("images.mipmaps", IMAGES.cache_size, IMAGES.trim)
+
+
+def adopt_hashes(doc, path: Optional[str] = None) -> int:
+    """Recopie les empreintes connues dans les ImageShape du document qui n'en
+    ont pas (toutes, ou celles de 'path') et demande les autres au pool.
+    Thread GUI uniquement : l'affectation estampille et notifie la forme.
+    Renvoie le nombre de formes mises à jour."""
+    from core.shapes import GroupShape, ImageShape
+    stack = list(doc.shapes)
+    for sym in doc.symbols.values():
+        stack.extend(sym.shapes)
+    n = 0
+    while stack:
+        s = stack.pop()
+        if isinstance(s, GroupShape):
+            stack.extend(s.children)
+        elif type(s) is ImageShape and s.path and not s.content_hash \
+                and (path is None or s.path == path):
+            h = IMAGES.content_hash(s.path)
+            if h:
+                s.content_hash = h
+                n += 1
+            else:
+                IMAGES.request_hash(s.path)
+    return n
@@ -0,0 +1,316 @@
+"""
+Import SVG en flux (iterparse) vers un Document.
+
+- Parcours incrémental : chaque élément est vidé puis détaché de son parent
+  dès sa balise fermante → mémoire constante quelle que soit la taille du
+  fichier (seules les formes produites restent).
+- rect / circle / ellipse / line → RectShape / EllipseShape / LineShape,
+  avec stroke, fill et stroke-width (attributs ou style="...", hérités des <g>).
+- Transformations simples aplaties : translate, scale, matrix. Une rotation
+  ou un cisaillement est approché par la bbox transformée (lignes exactes).
+- viewBox de la racine : ramené à width/height (preserveAspectRatio par
+  défaut : échelle uniforme, centrée).
+- Le contenu de <defs>, <symbol>, <clipPath>, <mask>, <pattern> est ignoré.
+
+Conversion par lot (pool de processus) :
+    python -m core.import_svg dossier_svg/ dossier_json/ [-j N]
+"""
+
+import math
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from typing import Iterator, Optional
+
+from PyQt6.QtGui import QColor
+
+from core.diagnostics import register_cache, dict_cache_size
+from core.document import Document
+from core.shapes import Shape, RectShape, EllipseShape, LineShape
+
+SKIP_TAGS = {"defs", "symbol", "clipPath", "mask", "pattern", "marker", "metadata"}
+STYLE_KEYS = ("stroke", "fill", "stroke-width")
+DEFAULT_STYLE = {"stroke": "none", "fill": "#000000", "stroke-width": "1"}  # défauts SVG
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)  # (a, b, c, d, e, f)
+CACHE_MAX = 4096  # entrées par cache de style (vidé au-delà : fichiers pathologiques)
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+_NUM_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+# ------------------- UTILITAIRES -------------------
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _num(value: Optional[str], default: float = 0.0) -> float:
+    """'12', '12.5px', '3e2' → float ; unités et pourcentages ignorés."""
+    if not value:
+        return default
+    try:
+        return float(value)  # cas courant : nombre nu
+    except ValueError:
+        m = _NUM_RE.match(value.strip())
+        return float(m.group()) if m else default
+
+
+def _length(value: Optional[str], default: float) -> float:
+    """Longueur de la racine <svg> : absente ou en % → défaut (taille du viewBox)."""
+    if not value or value.strip().endswith("%"):
+        return default
+    return _num(value, default)
+
+
+def _viewport(elem) -> tuple[float, float, tuple]:
+    """(largeur, hauteur, matrice viewBox → page) de la racine <svg>."""
+    vb = [float(v) for v in _NUM_RE.findall(elem.get("viewBox", ""))]
+    if len(vb) != 4 or vb[2] <= 0 or vb[3] <= 0:
+        return _length(elem.get("width"), 0.0), _length(elem.get("height"), 0.0), IDENTITY
+    vx, vy, vw, vh = vb
+    w, h = _length(elem.get("width"), vw), _length(elem.get("height"), vh)
+    k = min(w / vw, h / vh)  # xMidYMid meet
+    return w, h, (k, 0.0, 0.0, k, (w - vw * k) / 2 - vx * k, (h - vh * k) / 2 - vy * k)
+
+
+def _compose(m, n):
+    """m × n (matrices affines SVG)."""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + c * b2, b * a2 + d * b2,
+            a * c2 + c * d2, b * c2 + d * d2,
+            a * e2 + c * f2 + e, b * e2 + d * f2 + f)
+
+
+def parse_transform(value: Optional[str]):
+    """Attribut transform → matrice affine (rotate/skew compris, approchés ensuite)."""
+    m = IDENTITY
+    if not value:
+        return m
+    for name, args in _TRANSFORM_RE.findall(value):
+        v = [float(x) for x in _NUM_RE.findall(args)]
+        if name == "matrix" and len(v) == 6:
+            t = tuple(v)
+        elif name == "translate" and v:
+            t = (1.0, 0.0, 0.0, 1.0, v[0], v[1] if len(v) > 1 else 0.0)
+        elif name == "scale" and v:
+            t = (v[0], 0.0, 0.0, v[1] if len(v) > 1 else v[0], 0.0, 0.0)
+        elif name == "rotate" and v:
+            r = math.radians(v[0])
+            cx, cy = (v[1], v[2]) if len(v) == 3 else (0.0, 0.0)
+            t = _compose((1, 0, 0, 1, cx, cy),
+                         _compose((math.cos(r), math.sin(r), -math.sin(r), math.cos(r), 0, 0),
+                                  (1, 0, 0, 1, -cx, -cy)))
+        elif name == "skewX" and v:
+            t = (1.0, 0.0, math.tan(math.radians(v[0])), 1.0, 0.0, 0.0)
+        elif name == "skewY" and v:
+            t = (1.0, math.tan(math.radians(v[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            continue
+        m = _compose(m, t)
+    return m
+
+
+def _apply(m, x, y):
+    a, b, c, d, e, f = m
+    return a * x + c * y + e, b * x + d * y + f
+
+
+def _style_of(elem, inherited: dict) -> dict:
+    """Style effectif : hérité, puis attributs de présentation, puis style="..."."""
+    own = {k: elem.get(k) for k in STYLE_KEYS if elem.get(k) is not None}
+    style = elem.get("style")
+    if style:
+        for decl in style.split(";"):
+            k, _, v = decl.partition(":")
+            k = k.strip()
+            if k in STYLE_KEYS:
+                own[k] = v.strip()
+    if not own:
+        return inherited
+    return {**inherited, **own}
+
+
+_COLOR_CACHE: dict[str, str] = {}
+
+
+def _color(value: str) -> str:
+    """Couleur SVG → '#RRGGBB' ; 'none'/invalide → ''."""
+    c = _COLOR_CACHE.get(value)
+    if c is None:
+        if len(_COLOR_CACHE) >= CACHE_MAX:
+            _COLOR_CACHE.clear()
+        q = QColor(value) if value and value != "none" else QColor()
+        c = _COLOR_CACHE[value] = q.name().upper() if q.isValid() else ""
+    return c
+
+
+# ------------------- CONVERSION D'UN ÉLÉMENT -------------------
+def _bbox(m, x0, y0, x1, y1):
+    a, b, c, d, e, f = m
+    if b == 0.0 and c == 0.0:
+        # translate/scale : pas besoin de transformer les 4 coins
+        x0, x1 = sorted((a * x0 + e, a * x1 + e))
+        y0, y1 = sorted((d * y0 + f, d * y1 + f))
+        return x0, y0, x1, y1
+    pts = [_apply(m, x, y) for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))]
+    xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+_KW_CACHE: dict[tuple, dict] = {}
+
+
+def _style_kw(style: dict, m) -> dict:
+    """Arguments de style des formes, mis en cache (les styles se répètent).
+    La clé ne contient que le style et l'épaisseur finale (entière), pas la
+    matrice : une échelle différente par élément ne fait pas grossir le cache."""
+    a, b, c, d, _, _ = m
+    scale = ((abs(a * d - b * c)) ** 0.5) or 1.0  # facteur moyen pour l'épaisseur
+    width = _num(style["stroke-width"], 1.0)
+    width = max(1, round(width * scale)) if width > 0 else 0  # 0 explicite : pas de trait
+    key = (style["stroke"], style["fill"], width)
+    kw = _KW_CACHE.get(key)
+    if kw is None:
+        if len(_KW_CACHE) >= CACHE_MAX:
+            _KW_CACHE.clear()
+        kw = _KW_CACHE[key] = {
+            "stroke_color": _color(style["stroke"]),  # '' = pas de contour
+            "fill_color": _color(style["fill"]),      # '' = pas de remplissage
+            "stroke_width": width,
+        }
+    return kw
+
+
+def _svg_cache_size():
+    n1, b1 = dict_cache_size(_COLOR_CACHE)
+    n2, b2 = dict_cache_size(_KW_CACHE)
+    return n1 + n2, b1 + b2
+
+
+def _svg_cache_clear():
+    _COLOR_CACHE.clear()
+    _KW_CACHE.clear()
+
+
+register_cache("svg.styles", _svg_cache_size, _svg_cache_clear)
+
+
+def _to_shape(tag: str, elem, m, style: dict) -> Optional[Shape]:
+    kw = _style_kw(style, m)
+    if tag == "line":
+        x1, y1 = _apply(m, _num(elem.get("x1")), _num(elem.get("y1")))
+        x2, y2 = _apply(m, _num(elem.get("x2")), _num(elem.get("y2")))
+        return LineShape(x1, y1, x2 - x1, y2 - y1, **{**kw, "fill_color": ""})
+    if tag == "rect":
+        x, y = _num(elem.get("x")), _num(elem.get("y"))
+        box = (x, y, x + _num(elem.get("width")), y + _num(elem.get("height")))
+        cls = RectShape
+    elif tag == "circle":
+        cx, cy, r = _num(elem.get("cx")), _num(elem.get("cy")), _num(elem.get("r"))
+        box = (cx - r, cy - r, cx + r, cy + r)
+        cls = EllipseShape
+    elif tag == "ellipse":
+        cx, cy = _num(elem.get("cx")), _num(elem.get("cy"))
+        rx, ry = _num(elem.get("rx")), _num(elem.get("ry"))
+        box = (cx - rx, cy - ry, cx + rx, cy + ry)
+        cls = EllipseShape
+    else:
+        return None
+    x0, y0, x1, y1 = _bbox(m, *box)
+    return cls(x0, y0, x1 - x0, y1 - y0, **kw)
+
+
+# ------------------- PARCOURS EN FLUX -------------------
+def iter_svg_shapes(source, header: Optional[dict] = None) -> Iterator[Shape]:
+    """Produit les formes d'un fichier SVG au fil de la lecture.
+    'header' (optionnel) reçoit width/height de la racine <svg>."""
+    stack = []  # [(élément, matrice, style)] des ancêtres ouverts
+    skip = 0    # profondeur dans un contenu ignoré (<defs>…)
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if stack:
+                _, pm, ps = stack[-1]
+            else:
+                width, height, pm = _viewport(elem)
+                ps = DEFAULT_STYLE
+                if header is not None:
+                    header["width"], header["height"] = width, height
+            m = _compose(pm, parse_transform(elem.get("transform"))) if elem.get("transform") else pm
+            st = _style_of(elem, ps)
+            stack.append((elem, m, st))
+            if tag in SKIP_TAGS:
+                skip += 1
+            elif not skip:
+                shape = _to_shape(tag, elem, m, st)
+                if shape is not None:
+                    yield shape
+        else:
+            stack.pop()
+            if tag in SKIP_TAGS:
+                skip -= 1
+            # libère l'élément traité : vidé puis détaché de son parent
+            elem.clear()
+            if stack:
+                stack[-1][0].remove(elem)
+
+
+def import_svg(path: str) -> Document:
+    """Charge un SVG dans un nouveau Document."""
+    header = {}
+    doc = Document(title=os.path.splitext(os.path.basename(path))[0])
+    for s in iter_svg_shapes(path, header):
+        doc.add_shape(s)
+    if header.get("width") and header.get("height"):
+        doc.width, doc.height = int(header["width"]), int(header["height"])
+    return doc
+
+
+# ------------------- CONVERSION PAR LOT -------------------
+def _convert_one(args) -> tuple[str, int, float, str]:
+    """Tâche du pool : SVG → JSON ; renvoie (nom, nb formes, secondes, erreur)."""
+    from core.io_json import save_document
+    src, dst = args
+    t = time.perf_counter()
+    try:
+        doc = import_svg(src)
+        save_document(doc, dst)
+        return src, len(doc.shapes), time.perf_counter() - t, ""
+    except Exception as e:
+        return src, 0, time.perf_counter() - t, str(e)
+
+
+def convert_directory(src_dir: str, dst_dir: str, workers: Optional[int] = None) -> dict:
+    """Convertit tous les *.svg de src_dir en *.json dans dst_dir (pool de processus)."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    os.makedirs(dst_dir, exist_ok=True)
+    jobs = [(os.path.join(src_dir, n), os.path.join(dst_dir, os.path.splitext(n)[0] + ".json"))
+            for n in sorted(os.listdir(src_dir)) if n.lower().endswith(".svg")]
+    t = time.perf_counter()
+    shapes, errors = 0, []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for src, n, secs, err in pool.map(_convert_one, jobs):
+            if err:
+                errors.append((src, err))
+                print(f"ERREUR {src} : {err}")
+            else:
+                shapes += n
+                print(f"{src} : {n} formes en {secs:.2f} s")
+    elapsed = time.perf_counter() - t
+    report = {"files": len(jobs), "shapes": shapes, "seconds": elapsed,
+              "shapes_per_sec": shapes / elapsed if elapsed else 0.0, "errors": errors}
+    print(f"{len(jobs)} fichiers, {shapes} formes en {elapsed:.2f} s "
+          f"({report['shapes_per_sec']:.0f} formes/s)")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Conversion SVG → JSON Mini-Illustrator")
+    ap.add_argument("src", help="dossier contenant les .svg")
+    ap.add_argument("dst", help="dossier de sortie des .json")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus")
+    a = ap.parse_args()
+    convert_directory(a.src, a.dst, a.jobs)
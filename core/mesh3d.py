@@ -0,0 +1,403 @@
+"""
+Maillage 3D (extrusion) du Document, vectorisé avec NumPy.
+
+- Rect / Line → prismes à base quadrilatère (8 sommets, 12 triangles)
+- Ellipse     → cylindres elliptiques (2*seg + 2 sommets, 4*seg triangles)
+- Groupes et instances de symboles sont aplatis en coordonnées monde.
+
+MeshCache garde, par type de primitive, les paramètres et les sommets de
+chaque forme (tableaux (N, V, 3)). À chaque update(), les révisions '_rev'
+des formes de premier niveau (cf. core.shapes) désignent celles qui ont
+changé : seules celles-ci sont ré-aplaties et leurs lignes retessélées en
+place. Liste du document, symboles ou structure d'un groupe modifiés →
+reconstruction complète (qui ne retessèle que les paramètres changés).
+
+Pas de widget ni de rendu Qt ici (core.shapes n'importe que QColor) : le
+pipeline se teste sans affichage ni QApplication.
+Benchmark : python -m core.mesh3d [nb_formes]
+"""
+
+import numpy as np
+
+from core.diagnostics import register_cache, dict_cache_size
+from core.shapes import RectShape, EllipseShape, LineShape, GroupShape, InstanceShape, uid
+
+DEPTH = 20.0    # hauteur d'extrusion
+SEGMENTS = 24   # segments des cylindres
+
+
+# ------------------- TESSELLATION -------------------
+def _prism_template() -> np.ndarray:
+    """Triangles d'un prisme (base CCW 0..3 en bas, 4..7 en haut), normales sortantes."""
+    tris = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7)]
+    for i in range(4):
+        j = (i + 1) % 4
+        tris += [(i, j, 4 + j), (i, 4 + j, 4 + i)]
+    return np.array(tris, dtype=np.int32)
+
+
+def _cylinder_template(seg: int) -> np.ndarray:
+    """Triangles d'un cylindre : anneau bas 0..seg-1, haut seg..2seg-1, centres 2seg / 2seg+1."""
+    i = np.arange(seg, dtype=np.int32)
+    j = (i + 1) % seg
+    cb = np.full(seg, 2 * seg, dtype=np.int32)
+    ct = cb + 1
+    return np.concatenate([
+        np.stack([i, j, seg + j], axis=1),
+        np.stack([i, seg + j, seg + i], axis=1),
+        np.stack([cb, j, i], axis=1),
+        np.stack([ct, seg + i, seg + j], axis=1),
+    ])
+
+
+PRISM_TRIS = _prism_template()
+
+
+def prism_vertices(corners: np.ndarray, depth: float = DEPTH) -> np.ndarray:
+    """corners (n, 4, 2) → sommets (n, 8, 3). Les bases sont remises en CCW."""
+    corners = np.array(corners, dtype=np.float32, copy=True).reshape(-1, 4, 2)
+    x, y = corners[..., 0], corners[..., 1]
+    area = np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1)
+    flip = area < 0
+    corners[flip] = corners[flip][:, ::-1]
+    v = np.empty((len(corners), 8, 3), dtype=np.float32)
+    v[:, :4, :2] = corners
+    v[:, 4:, :2] = corners
+    v[:, :4, 2] = 0.0
+    v[:, 4:, 2] = depth
+    return v
+
+
+def cylinder_vertices(ellipses: np.ndarray, depth: float = DEPTH, seg: int = SEGMENTS) -> np.ndarray:
+    """ellipses (n, 4) = (cx, cy, rx, ry) → sommets (n, 2*seg + 2, 3)."""
+    e = np.asarray(ellipses, dtype=np.float32).reshape(-1, 4)
+    a = np.linspace(0.0, 2 * np.pi, seg, endpoint=False, dtype=np.float32)
+    rx, ry = np.abs(e[:, 2:3]), np.abs(e[:, 3:4])
+    ring_x = e[:, 0:1] + rx * np.cos(a)
+    ring_y = e[:, 1:2] + ry * np.sin(a)
+    v = np.empty((len(e), 2 * seg + 2, 3), dtype=np.float32)
+    for k, z in ((0, 0.0), (1, depth)):
+        v[:, k * seg:(k + 1) * seg, 0] = ring_x
+        v[:, k * seg:(k + 1) * seg, 1] = ring_y
+        v[:, k * seg:(k + 1) * seg, 2] = z
+    v[:, 2 * seg:, 0] = e[:, 0:1]
+    v[:, 2 * seg:, 1] = e[:, 1:2]
+    v[:, 2 * seg, 2] = 0.0
+    v[:, 2 * seg + 1, 2] = depth
+    return v
+
+
+# ------------------- APLATISSEMENT -------------------
+_RGB_CACHE: dict[str, tuple[float, float, float]] = {}
+
+
+def _rgb(color: str) -> tuple[float, float, float]:
+    """'#RRGGBB' → (r, g, b) dans [0, 1] (gris si invalide)."""
+    rgb = _RGB_CACHE.get(color)
+    if rgb is None:
+        try:
+            c = color.lstrip("#")
+            rgb = (int(c[0:2], 16) / 255, int(c[2:4], 16) / 255, int(c[4:6], 16) / 255)
+        except (ValueError, IndexError):
+            rgb = (0.6, 0.6, 0.6)
+        _RGB_CACHE[color] = rgb
+    return rgb
+
+
+register_cache("3d.colors", lambda: dict_cache_size(_RGB_CACHE), _RGB_CACHE.clear)
+
+
+def flatten(shapes, quads: dict, ellipses: dict, tx=0.0, ty=0.0, sx=1.0, sy=1.0, path=(),
+            order0: int = 0):
+    """Remplit quads[key] = (8 coins, rgb, ordre) et ellipses[key] = ((cx, cy, rx, ry), rgb, ordre)
+    en coordonnées monde. key = uid de la forme, ou chemin d'uid sous un
+    groupe / une instance (une même forme de symbole = plusieurs chemins).
+    ordre = order0 + rang dans l'ordre Z du document (aplati)."""
+    # boucle chaude : dispatch sur le type exact (isinstance sur ABC est lent)
+    for s in shapes:
+        t = type(s)
+        key = path + (uid(s),) if path else uid(s)
+        if t is RectShape:
+            x0, y0 = tx + s.x * sx, ty + s.y * sy
+            x1, y1 = tx + (s.x + s.w) * sx, ty + (s.y + s.h) * sy
+            quads[key] = ((x0, y0, x1, y0, x1, y1, x0, y1), _rgb(s.fill_color or s.stroke_color),
+                          order0 + len(quads) + len(ellipses))
+        elif t is EllipseShape:
+            ellipses[key] = ((tx + (s.x + s.w / 2) * sx, ty + (s.y + s.h / 2) * sy,
+                              s.w / 2 * sx, s.h / 2 * sy), _rgb(s.fill_color or s.stroke_color),
+                             order0 + len(quads) + len(ellipses))
+        elif t is LineShape:
+            x1, y1 = tx + s.x * sx, ty + s.y * sy
+            x2, y2 = tx + (s.x + s.w) * sx, ty + (s.y + s.h) * sy
+            dx, dy = x2 - x1, y2 - y1
+            n = (dx * dx + dy * dy) ** 0.5 or 1.0
+            half = max(s.stroke_width, 1) * (abs(sx) + abs(sy)) / 4
+            nx, ny = -dy / n * half, dx / n * half
+            quads[key] = ((x1 + nx, y1 + ny, x2 + nx, y2 + ny, x2 - nx, y2 - ny, x1 - nx, y1 - ny),
+                          _rgb(s.stroke_color), order0 + len(quads) + len(ellipses))
+        elif t is GroupShape:
+            if s.visible:
+                flatten(s.children, quads, ellipses, tx + s.x * sx, ty + s.y * sy,
+                        sx * s.sx, sy * s.sy, key if path else (key,), order0)
+        elif t is InstanceShape:
+            if s.symbol is not None:
+                flatten(s.symbol.shapes, quads, ellipses, tx + s.x * sx, ty + s.y * sy,
+                        sx * s.sx, sy * s.sy, key if path else (key,), order0)
+
+
+# ------------------- CACHE INCRÉMENTAL -------------------
+class _Batch:
+    """Maillages d'un type de primitive : une ligne par forme."""
+
+    def __init__(self, n_params: int, tessellate, tris: np.ndarray, n_verts: int):
+        self.tessellate = tessellate   # params (n, k) → sommets (n, V, 3)
+        self.tris = tris               # gabarit (F, 3)
+        self.n_verts = n_verts
+        self.keys: list = []
+        self.params = np.empty((0, n_params), dtype=np.float32)
+        self.colors = np.empty((0, 3), dtype=np.float32)
+        self.order = np.empty(0, dtype=np.int32)
+        self.verts = np.empty((0, n_verts, 3), dtype=np.float32)
+        self._tris = self._colors = self._order = None
+
+    def update(self, items: dict) -> tuple[int, bool]:
+        """Met à jour depuis {key: (params, rgb, ordre)}.
+        Renvoie (lignes retessélées, quelque chose a changé)."""
+        keys = list(items)
+        n = len(keys)
+        k = self.params.shape[1]
+        params = np.array([items[key][0] for key in keys], dtype=np.float32).reshape(n, k)
+        colors = np.array([items[key][1] for key in keys], dtype=np.float32).reshape(n, 3)
+        order = np.fromiter((items[key][2] for key in keys), dtype=np.int32, count=n)
+
+        same_keys = keys == self.keys
+        if same_keys:
+            rows = np.arange(n)
+        else:
+            old = {key: i for i, key in enumerate(self.keys)}
+            rows = np.fromiter((old.get(key, -1) for key in keys), dtype=np.int64, count=n)
+        have = rows >= 0
+        changed = ~have
+        changed[have] = np.any(params[have] != self.params[rows[have]], axis=1)
+
+        if same_keys:
+            verts = self.verts  # mise à jour en place des seules lignes modifiées
+        else:
+            verts = np.empty((n, self.n_verts, 3), dtype=np.float32)
+            keep = have & ~changed
+            verts[keep] = self.verts[rows[keep]]
+        if changed.any():
+            verts[changed] = self.tessellate(params[changed])
+
+        recolored = not np.array_equal(colors, self.colors)
+        reordered = not np.array_equal(order, self.order)
+        if not same_keys or recolored or reordered:
+            self._tris = self._colors = None  # topologie / couleurs / ordre à recalculer
+        dirty = not same_keys or recolored or reordered or bool(changed.any())
+        self.keys, self.params, self.colors, self.order, self.verts = keys, params, colors, order, verts
+        return int(changed.sum()), dirty
+
+    def patch(self, start: int, items: dict) -> tuple[int, bool]:
+        """Met à jour en place les lignes start.. (mêmes clés, même ordre) depuis
+        {key: (params, rgb, ordre)}. Renvoie (lignes retessélées, quelque chose a changé)."""
+        n = len(items)
+        if not n:
+            return 0, False
+        rows = slice(start, start + n)
+        values = list(items.values())
+        params = np.array([v[0] for v in values], dtype=np.float32).reshape(n, -1)
+        colors = np.array([v[1] for v in values], dtype=np.float32).reshape(n, 3)
+        changed = np.any(params != self.params[rows], axis=1)
+        if changed.any():
+            self.verts[np.nonzero(changed)[0] + start] = self.tessellate(params[changed])
+            self.params[rows] = params
+        recolored = not np.array_equal(colors, self.colors[rows])
+        if recolored:
+            self.colors[rows] = colors
+            self._colors = None
+        return int(changed.sum()), recolored or bool(changed.any())
+
+    def arrays(self, base: int):
+        """Sommets (M, 3), triangles (T, 3) décalés de 'base', couleurs (T, 3), ordre (T,).
+        Triangles, couleurs et ordre ne changent qu'avec la topologie / le style."""
+        if self._tris is None or self._base != base:
+            n = len(self.keys)
+            offsets = (np.arange(n, dtype=np.int32) * self.n_verts + base)[:, None, None]
+            self._tris = (self.tris[None, :, :] + offsets).reshape(-1, 3)
+            self._base = base
+        if self._colors is None:
+            self._colors = np.repeat(self.colors, len(self.tris), axis=0)
+            self._order = np.repeat(self.order, len(self.tris))
+        return self.verts.reshape(-1, 3), self._tris, self._colors, self._order
+
+
+class MeshCache:
+    """Maillage du document reconstruit incrémentalement."""
+
+    def __init__(self, depth: float = DEPTH, segments: int = SEGMENTS):
+        self.depth, self.segments = depth, segments
+        self.quads = _Batch(8, lambda p: prism_vertices(p.reshape(-1, 4, 2), depth),
+                            PRISM_TRIS, 8)
+        self.ellipses = _Batch(4, lambda p: cylinder_vertices(p, depth, segments),
+                               _cylinder_template(segments), 2 * segments + 2)
+        self._arrays = None
+        self._src = None  # tableaux sources de _tris/_colors (réutilisés si inchangés)
+        self._tris = self._colors = self._order = None
+        # état de la dernière synchronisation (formes de premier niveau) :
+        self._doc = None
+        self._tops = None    # uid de chaque forme, dans l'ordre Z
+        self._revs = None    # leur révision '_rev'
+        self._syms = None    # {id de symbole: révision}
+        self._qstart = self._estart = None  # 1re ligne de chaque forme dans les lots (+ total)
+
+    def __len__(self) -> int:
+        return len(self.quads.keys) + len(self.ellipses.keys)
+
+    def nbytes(self) -> int:
+        """Octets des tableaux NumPy retenus (lots + concaténations)."""
+        arrays = [self._tris, self._colors, self._order, *(self._arrays or ())]
+        for b in (self.quads, self.ellipses):
+            arrays += [b.params, b.colors, b.order, b.verts, b._tris, b._colors, b._order]
+        seen, total = set(), 0
+        for a in arrays:
+            if a is not None and id(a) not in seen:
+                seen.add(id(a))
+                total += a.nbytes
+        return total
+
+    def clear(self):
+        """Libère les maillages (le prochain update() retessèle tout)."""
+        self.__init__(self.depth, self.segments)
+
+    def update(self, doc) -> dict:
+        """Synchronise avec le document ; renvoie {'total', 'rebuilt'}.
+        Seules les formes de premier niveau dont la révision a changé sont ré-aplaties."""
+        shapes = doc.shapes
+        tops = [uid(s) for s in shapes]
+        syms = {sid: sym.__dict__.get("_rev", 0) for sid, sym in doc.symbols.items()}
+        if doc is not self._doc or tops != self._tops or syms != self._syms:
+            return self._rebuild(doc, tops, syms)
+        revs = np.fromiter((s.__dict__.get("_rev", 0) for s in shapes), dtype=np.int64,
+                           count=len(shapes))
+        dirty = np.nonzero(revs != self._revs)[0]
+        if len(dirty) > len(shapes) // 4 + 16:
+            return self._rebuild(doc, tops, syms)
+        qs, es = self._qstart, self._estart
+        rebuilt, changed = 0, False
+        for n in dirty.tolist():
+            quads, ellipses = {}, {}
+            flatten([shapes[n]], quads, ellipses, order0=qs[n] + es[n])
+            if (list(quads) != self.quads.keys[qs[n]:qs[n + 1]]
+                    or list(ellipses) != self.ellipses.keys[es[n]:es[n + 1]]):
+                return self._rebuild(doc, tops, syms)  # structure d'un groupe modifiée
+            rq, dq = self.quads.patch(qs[n], quads)
+            re, de = self.ellipses.patch(es[n], ellipses)
+            rebuilt += rq + re
+            changed = changed or dq or de
+        self._revs = revs
+        if changed:
+            self._arrays = None
+        return {"total": len(self.quads.keys) + len(self.ellipses.keys), "rebuilt": rebuilt}
+
+    def _rebuild(self, doc, tops, syms) -> dict:
+        """Aplatit tout le document (les lots ne retessèlent que les paramètres changés)."""
+        quads, ellipses = {}, {}
+        n = len(doc.shapes)
+        qs = np.empty(n + 1, dtype=np.int64)
+        es = np.empty(n + 1, dtype=np.int64)
+        for i, s in enumerate(doc.shapes):
+            qs[i], es[i] = len(quads), len(ellipses)
+            flatten((s,), quads, ellipses, order0=qs[i] + es[i])
+        qs[n], es[n] = len(quads), len(ellipses)
+        rq, dq = self.quads.update(quads)
+        re, de = self.ellipses.update(ellipses)
+        if dq or de:
+            self._arrays = None
+        self._doc, self._tops, self._syms = doc, tops, syms
+        self._revs = np.fromiter((s.__dict__.get("_rev", 0) for s in doc.shapes), dtype=np.int64,
+                                 count=n)
+        self._qstart, self._estart = qs.tolist(), es.tolist()
+        return {"total": len(quads) + len(ellipses), "rebuilt": rq + re}
+
+    def arrays(self):
+        """(sommets (M, 3), triangles (T, 3), couleurs (T, 3), ordre Z (T,)) concaténés, en cache."""
+        if self._arrays is None:
+            vq, tq, cq, oq = self.quads.arrays(0)
+            ve, te, ce, oe = self.ellipses.arrays(len(vq))
+            src = (tq, te, cq, ce)
+            if self._src is None or any(a is not b for a, b in zip(src, self._src)):
+                # topologie, couleurs ou ordre modifiés : on reconcatène
+                self._tris = np.concatenate([tq, te])
+                self._colors = np.concatenate([cq, ce])
+                self._order = np.concatenate([oq, oe])
+                self._src = src
+            self._arrays = (np.concatenate([vq, ve]), self._tris, self._colors, self._order)
+        return self._arrays
+
+
+# ------------------- PROJECTION -------------------
+def project(verts, tris, colors, order, yaw: float, pitch: float, zoom: float,
+            center, width: int, height: int, light=(0.3, -0.5, 0.8)):
+    """Projection orthographique + élimination des faces arrière + ombrage plat.
+    Tri du peintre : d'abord l'ordre Z du document (les dessus coplanaires se
+    recouvrent comme en 2D), puis la profondeur des faces dans chaque forme.
+    Renvoie (polygones écran (K, 3, 2), couleurs (K, 3) uint8)."""
+    if len(tris) == 0:
+        return np.empty((0, 3, 2), np.float32), np.empty((0, 3), np.uint8)
+    cy, sy_, cp, sp = np.cos(yaw), np.sin(yaw), np.cos(pitch), np.sin(pitch)
+    # rotation autour de Z (yaw) puis autour de X (pitch) ; l'observateur est en +Z
+    # (pitch = 0 → vue de dessus identique au canvas 2D, y vers le bas)
+    rz = np.array([[cy, -sy_, 0], [sy_, cy, 0], [0, 0, 1]], dtype=np.float32)
+    rx = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]], dtype=np.float32)
+    v = (np.asarray(verts, np.float32) - np.asarray(center, np.float32)) @ (rx @ rz).T
+
+    tri = v[tris]                                   # (T, 3, 3)
+    n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    front = n[:, 2] > 0                             # normale vers l'observateur
+    tri, n = tri[front], n[front]
+    col, layer = np.asarray(colors)[front], np.asarray(order)[front]
+
+    norm = np.linalg.norm(n, axis=1, keepdims=True)
+    norm[norm == 0] = 1.0
+    lum = np.clip((n / norm) @ np.asarray(light, np.float32), 0.0, 1.0)
+    shade = (col * (0.35 + 0.65 * lum[:, None]) * 255).astype(np.uint8)
+
+    idx = np.lexsort((tri[:, :, 2].mean(axis=1), layer))  # clé principale = layer
+    pts = tri[idx, :, :2] * zoom + np.array([width / 2, height / 2], np.float32)
+    return pts, shade[idx]
+
+
+# ------------------- BENCHMARK -------------------
+def _bench(n: int):
+    import random
+    import time
+    from core.document import Document
+
+    rnd = random.Random(0)
+    doc = Document()
+    kinds = (RectShape, EllipseShape, LineShape)
+    for _ in range(n):
+        k = rnd.choice(kinds)
+        doc.add_shape(k(rnd.uniform(0, 5000), rnd.uniform(0, 5000),
+                        rnd.uniform(-80, 80), rnd.uniform(-80, 80)))
+
+    cache = MeshCache()
+    t = time.perf_counter()
+    stats = cache.update(doc)
+    v, tr, _, _ = cache.arrays()
+    full = time.perf_counter() - t
+    print(f"complet     : {full * 1000:8.1f} ms  ({stats['rebuilt']} formes, "
+          f"{len(v)} sommets, {len(tr)} triangles)")
+
+    for s in rnd.sample(doc.shapes, max(1, n // 1000)):
+        s.x += 10
+    t = time.perf_counter()
+    stats = cache.update(doc)
+    cache.arrays()
+    inc = time.perf_counter() - t
+    print(f"incrémental : {inc * 1000:8.1f} ms  ({stats['rebuilt']} formes retessélées)")
+
+
+if __name__ == "__main__":
+    import sys
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,99 @@
+"""
+Exécution de scripts Python sur un Document (générateurs, traitements par lot).
+
+Le script voit dans son espace de noms :
+    doc       le Document (API en masse : add_shapes, query, translate, scale,
+              align, distribute, restyle…). Dans l'interface, chaque
+              opération en masse est poussée dans la CommandStack (une
+              entrée d'annulation par appel), même sans commands=...
+    commands  la CommandStack (None en mode sans interface)
+    np        NumPy
+    args      arguments supplémentaires de la ligne de commande
+
+Exemple de script :
+    xs = np.arange(1000) * 12.0
+    cells = doc.add_shapes("rect", xs, 0, 10, 10, fill_color="#C0D0FF")
+    doc.align(cells, "top")
+
+Sans interface (le document est créé s'il n'existe pas, puis sauvegardé) :
+    python -m core.scripting [-o sortie.json] plan.json generer.py [args…]
+"""
+
+import os
+import time
+from functools import partial
+
+import numpy as np
+
+from core.document import Document
+
+
+# Méthodes du Document qui acceptent commands=... (une commande par appel)
+BULK_OPS = frozenset({"add_shapes", "translate", "scale", "align", "distribute", "restyle"})
+
+
+class BoundDocument:
+    """Document vu par un script de l'interface : les opérations en masse
+    reçoivent la CommandStack par défaut ; le reste est délégué tel quel."""
+
+    def __init__(self, doc: Document, commands):
+        object.__setattr__(self, "_doc", doc)
+        object.__setattr__(self, "_commands", commands)
+
+    def __getattr__(self, name):
+        attr = getattr(self._doc, name)
+        if name in BULK_OPS:
+            return partial(attr, commands=self._commands)  # commands=... explicite prioritaire
+        return attr
+
+    def __setattr__(self, name, value):
+        setattr(self._doc, name, value)
+
+
+def run_script(path: str, doc: Document, commands=None, args=()) -> dict:
+    """Exécute le script 'path' sur doc ; renvoie son espace de noms final.
+    Avec une CommandStack, chaque opération en masse du script est annulable."""
+    with open(path, "r", encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    if commands is not None:
+        doc = BoundDocument(doc, commands)
+    ns = {"__name__": "__script__", "__file__": path,
+          "doc": doc, "commands": commands, "np": np, "args": list(args)}
+    exec(code, ns)
+    return ns
+
+
+def _load(path: str) -> Document:
+    from core.chunk_store import ChunkStore, EXTENSION
+    from core.io_json import load_document
+    if not os.path.exists(path):
+        return Document(title=os.path.splitext(os.path.basename(path))[0])
+    return ChunkStore(path).load() if path.endswith(EXTENSION) else load_document(path)
+
+
+def _save(doc: Document, path: str):
+    from core.chunk_store import ChunkStore, EXTENSION
+    from core.io_json import save_document
+    if path.endswith(EXTENSION):
+        ChunkStore(path).save(doc)
+    else:
+        save_document(doc, path)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Exécute un script sur un document Mini-Illustrator")
+    ap.add_argument("document", help="projet .json ou .illus (créé s'il n'existe pas)")
+    ap.add_argument("script", help="script Python")
+    ap.add_argument("-o", "--output", help="fichier de sortie (défaut : le document lui-même)")
+    ap.add_argument("args", nargs=argparse.REMAINDER, help="arguments passés au script")
+    a = ap.parse_args()
+
+    t = time.perf_counter()
+    doc = _load(a.document)
+    n0 = len(doc.shapes)
+    run_script(a.script, doc, args=a.args[1:] if a.args[:1] == ["--"] else a.args)
+    out = a.output or a.document
+    _save(doc, out)
+    print(f"{out} : {len(doc.shapes)} formes ({len(doc.shapes) - n0:+d}) "
+          f"en {time.perf_counter() - t:.2f} s")
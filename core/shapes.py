@@ -1,14 +1,113 @@
 """
-Définition des formes de base (Rect, Ellipse, Line).
+Définition des formes de base (Rect, Ellipse, Line, Text, Image), des groupes et des symboles.
 Chaque forme hérite de Shape et implémente :
   - draw(painter) : dessin sur le canvas
   - to_dict() / from_dict() : sérialisation JSON
+
+Hiérarchie :
+  - GroupShape contient des enfants exprimés dans son repère local
+    (translation x/y + échelle sx/sy).
+  - bounds() = bbox dans le repère du PARENT ; un groupe met en cache
+    l'union de ses enfants, invalidée en remontant quand un enfant bouge.
+  - draw_shapes() saute les sous-arbres hors de la zone visible.
+  - SymbolDef = contenu partagé ; InstanceShape = référence + transformation,
+    rejouée depuis le QPicture du symbole.
+
+Révisions : la création puis toute affectation d'un champ persistant
+estampille la forme (et ses ancêtres) d'un numéro croissant '_rev' ; les
+sauvegardes incrémentales (core.chunk_store) s'en servent pour repérer ce
+qui a changé. uid() donne un identifiant stable par forme ('_uid').
+
+Géométrie dérivée en cache (dict '_geo', calculé à la demande) : bbox
+normalisée, bbox avec trait, QRectF, poignées, QPainterPath. Elle est vidée
+dès qu'un champ de GEOMETRY_FIELDS est affecté, et add_listener() permet aux
+index / caches de rendu d'être prévenus de chaque modification. Les formes
+qui la portent sont suivies (cached_shapes / drop_caches) pour le diagnostic
+mémoire.
 """
 
+import itertools
+import threading
+import weakref
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from typing import Optional
 from PyQt6.QtGui import QColor
 
+# Champs dont la modification change la bbox (→ invalidation des groupes parents)
+GEOMETRY_FIELDS = frozenset({"x", "y", "w", "h", "stroke_width", "sx", "sy"})
+
+# Champs non sauvegardés : leur modification n'estampille pas la forme
+TRANSIENT_FIELDS = frozenset({"selected", "parent", "symbol"})
+
+_REVISION = itertools.count(1)
+_SERIAL = itertools.count(1)
+
+
+def uid(obj) -> int:
+    """Identifiant stable d'une forme / d'un symbole (id() est réutilisé
+    par CPython dès qu'un objet est libéré)."""
+    return obj.__dict__["_uid"]
+
+Bounds = tuple[float, float, float, float]  # (x0, y0, x1, y1) normalisé
+
+
+def bounds_intersect(a: Bounds, b: Bounds) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+# ------------------- NOTIFICATIONS -------------------
+_LISTENERS: list = []
+
+
+def add_listener(fn):
+    """fn(obj, name) est appelé après chaque modification d'un champ persistant
+    d'une forme (name = nom du champ, ou 'children' pour un groupe) et après
+    chaque modification de la liste d'un Document (obj = document, name =
+    'shapes'). Doit rester léger : noter un drapeau, et traiter plus tard."""
+    _LISTENERS.append(fn)
+
+
+def remove_listener(fn):
+    if fn in _LISTENERS:
+        _LISTENERS.remove(fn)
+
+
+def notify(obj, name: str):
+    """Prévient les abonnés (formes : via __setattr__ ; Document : liste modifiée)."""
+    for fn in _LISTENERS:
+        fn(obj, name)
+
+
+# ------------------- CACHES DÉRIVÉS -------------------
+# Formes qui portent un cache dérivé, par attribut ('_geo' …) et par uid : le
+# diagnostic mémoire les mesure et les vide (core.diagnostics, register_cache).
+_CACHED: dict[str, weakref.WeakValueDictionary] = {
+    "_geo": weakref.WeakValueDictionary(),
+    "_text": weakref.WeakValueDictionary(),  # mise en page des TextShape
+}
+_CACHED_LOCK = threading.Lock()  # les tuiles calculent la géométrie sur leur pool
+
+
+def _track(shape, attr: str):
+    with _CACHED_LOCK:
+        _CACHED[attr][shape.__dict__["_uid"]] = shape
+
+
+def cached_shapes(attr: str) -> list:
+    """Formes vivantes qui ont (ou ont eu) le cache 'attr'."""
+    with _CACHED_LOCK:
+        return list(_CACHED[attr].values())
+
+
+def drop_caches(attr: str):
+    """Vide le cache 'attr' de toutes les formes (recalculé à la demande)."""
+    with _CACHED_LOCK:
+        shapes = list(_CACHED[attr].values())
+        _CACHED[attr].clear()
+    for s in shapes:
+        s.__dict__.pop(attr, None)
+
 
 # ------------------- CLASSE DE BASE -------------------
 @dataclass
@@ -20,7 +119,152 @@ class Shape(ABC):
     stroke_color: str = "#000000"  # contour (hex)
     fill_color: str = "#FFFFFF"    # remplissage
     stroke_width: int = 2
-    selected: bool = False         # utile pour l'étape 2 (sélection)
+    selected: bool = False         # cadre dessiné par Canvas2D (overlay), pas par draw()
+    parent: Optional["GroupShape"] = field(default=None, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        d = self.__dict__
+        # champ non persistant, ou __init__ en cours ('_ready' posé par __post_init__) :
+        # rien à invalider ni à notifier, une forme neuve change de toute façon sa tranche
+        if name[0] == "_" or name in TRANSIENT_FIELDS or "_ready" not in d:
+            return
+        if name in GEOMETRY_FIELDS:
+            d.pop("_geo", None)
+            parent = d["parent"]
+            if parent is not None:
+                parent.invalidate_bounds()
+        self.touch()
+        if _LISTENERS:
+            notify(self, name)
+
+    def __post_init__(self):
+        d = self.__dict__
+        d["_uid"] = next(_SERIAL)
+        self.touch()  # une forme neuve est plus récente que toute sauvegarde
+        d["_ready"] = True
+
+    def touch(self):
+        """Estampille la forme et ses ancêtres (groupe / symbole) d'une nouvelle
+        révision. Si la racine est un symbole, son dessin enregistré (QPicture)
+        est périmé : tout champ persistant (style compris) peut le changer."""
+        rev = next(_REVISION)
+        node = root = self
+        while node is not None:
+            node.__dict__["_rev"] = rev
+            root, node = node, node.__dict__.get("parent")
+        if type(root) is SymbolDef:
+            root._picture = None
+
+    # --------- géométrie dérivée (cache '_geo') ---------
+    # Les objets renvoyés sont partagés : ne pas les modifier.
+    def _cache(self) -> dict:
+        g = self.__dict__.get("_geo")
+        if g is None:
+            g = self.__dict__["_geo"] = {}
+            _track(self, "_geo")
+        return g
+
+    def norm_rect(self) -> Bounds:
+        """Bbox géométrique normalisée (w/h négatifs après un resize), sans le trait."""
+        g = self._cache()
+        r = g.get("rect")
+        if r is None:
+            x, y, w, h = self.x, self.y, self.w, self.h
+            x0, x1 = (x, x + w) if w >= 0 else (x + w, x)
+            y0, y1 = (y, y + h) if h >= 0 else (y + h, y)
+            r = g["rect"] = (x0, y0, x1, y1)
+        return r
+
+    def bounds(self) -> Bounds:
+        """Bbox normalisée (épaisseur de trait incluse) dans le repère du parent."""
+        g = self._cache()
+        b = g.get("bounds")
+        if b is None:
+            m = self.stroke_width / 2
+            x0, y0, x1, y1 = self.norm_rect()
+            b = g["bounds"] = (x0 - m, y0 - m, x1 + m, y1 + m)
+        return b
+
+    def qrect(self):
+        """norm_rect() en QRectF (dessin, overlay)."""
+        g = self._cache()
+        r = g.get("qrect")
+        if r is None:
+            from PyQt6.QtCore import QRectF
+            x0, y0, x1, y1 = self.norm_rect()
+            r = g["qrect"] = QRectF(x0, y0, x1 - x0, y1 - y0)
+        return r
+
+    def handle_points(self) -> tuple:
+        """Centres des poignées de redimensionnement : coins NW, NE, SE, SW."""
+        g = self._cache()
+        pts = g.get("handles")
+        if pts is None:
+            x, y, w, h = self.x, self.y, self.w, self.h
+            pts = g["handles"] = ((x, y), (x + w, y), (x + w, y + h), (x, y + h))
+        return pts
+
+    def handle_rects(self, size: float) -> list:
+        """Carrés des poignées (QRectF de côté 'size'), en cache par taille."""
+        g = self._cache()
+        key = ("handle_rects", size)
+        rects = g.get(key)
+        if rects is None:
+            from PyQt6.QtCore import QRectF
+            rects = g[key] = [QRectF(x - size / 2, y - size / 2, size, size)
+                              for x, y in self.handle_points()]
+        return rects
+
+    def painter_path(self):
+        """Contour de la forme en QPainterPath (repère du parent)."""
+        g = self._cache()
+        path = g.get("path")
+        if path is None:
+            from PyQt6.QtGui import QPainterPath
+            path = g["path"] = QPainterPath()
+            self._build_path(path)
+        return path
+
+    def _build_path(self, path):
+        path.addRect(self.qrect())
+
+    def _pen(self):
+        """Stylo du contour ('' = pas de contour)."""
+        from PyQt6.QtCore import Qt
+        from PyQt6.QtGui import QPen
+        if not self.stroke_color:
+            return QPen(Qt.PenStyle.NoPen)
+        pen = QPen(QColor(self.stroke_color))
+        pen.setWidth(self.stroke_width)
+        return pen
+
+    def _brush(self):
+        """Brosse de remplissage ('' = pas de remplissage)."""
+        from PyQt6.QtGui import QBrush
+        return QBrush(QColor(self.fill_color)) if self.fill_color else QBrush()
+
+    def hit(self, px: float, py: float, tol: float) -> bool:
+        """Test de clic (coords du parent) : bbox géométrique."""
+        x0, y0, x1, y1 = self.norm_rect()
+        return x0 <= px <= x1 and y0 <= py <= y1
+
+    # --------- rendu hors du thread GUI (ui.tiles) ---------
+    def prepare(self):
+        """Calcule sur le thread GUI ce qui ne peut pas l'être ailleurs (Qt
+        hors QPainter, objets partagés) ; rien pour les formes simples."""
+
+    def snapshot(self) -> "Shape":
+        """Copie figée, dessinable depuis un autre thread : champs copiés et
+        cache '_geo' privé (le thread de rendu ne lit ni n'écrit la forme
+        vivante, que le thread GUI peut modifier pendant ce temps)."""
+        self.prepare()
+        d = self.__dict__.copy()
+        g = d.get("_geo")
+        d["_geo"] = g.copy() if g is not None else {}  # pas de _track : la copie n'est pas suivie
+        snap = object.__new__(type(self))  # sans __init__ ni __setattr__ (pas de notification)
+        object.__setattr__(snap, "__dict__", d)
+        return snap
 
     @abstractmethod
     def draw(self, painter):
@@ -43,20 +287,9 @@ class Shape(ABC):
 @dataclass
 class RectShape(Shape):
     def draw(self, painter):
-        from PyQt6.QtCore import QRectF
-        from PyQt6.QtGui import QPen, QBrush
-
-        pen = QPen(QColor(self.stroke_color))
-        pen.setWidth(self.stroke_width)
-        painter.setPen(pen)
-        painter.setBrush(QBrush(QColor(self.fill_color)))
-        painter.drawRect(QRectF(self.x, self.y, self.w, self.h))
-
-        # Si sélectionné → cadre bleu
-        if self.selected:
-            painter.setPen(QPen(QColor("#00A2FF"), 1, 1))
-            painter.setBrush(QBrush())
-            painter.drawRect(QRectF(self.x - 3, self.y - 3, self.w + 6, self.h + 6))
+        painter.setPen(self._pen())
+        painter.setBrush(self._brush())
+        painter.drawRect(self.qrect())
 
     def to_dict(self):
         return {
@@ -69,21 +302,19 @@ class RectShape(Shape):
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        return cls(**{k: v for k, v in data.items() if k != "type"})
 
 
 # ------------------- ELLIPSE -------------------
 @dataclass
 class EllipseShape(Shape):
     def draw(self, painter):
-        from PyQt6.QtCore import QRectF
-        from PyQt6.QtGui import QPen, QBrush
+        painter.setPen(self._pen())
+        painter.setBrush(self._brush())
+        painter.drawEllipse(self.qrect())
 
-        pen = QPen(QColor(self.stroke_color))
-        pen.setWidth(self.stroke_width)
-        painter.setPen(pen)
-        painter.setBrush(QBrush(QColor(self.fill_color)))
-        painter.drawEllipse(QRectF(self.x, self.y, self.w, self.h))
+    def _build_path(self, path):
+        path.addEllipse(self.qrect())
 
     def to_dict(self):
         return {
@@ -96,7 +327,7 @@ class EllipseShape(Shape):
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        return cls(**{k: v for k, v in data.items() if k != "type"})
 
 
 # ------------------- LIGNE -------------------
@@ -104,12 +335,31 @@ class EllipseShape(Shape):
 class LineShape(Shape):
     # pour une ligne, (x, y) est le point de départ, (x + w, y + h) le point de fin
     def draw(self, painter):
-        from PyQt6.QtGui import QPen, QColor
-        pen = QPen(QColor(self.stroke_color))
-        pen.setWidth(self.stroke_width)
-        painter.setPen(pen)
+        painter.setPen(self._pen())
         painter.drawLine(int(self.x), int(self.y), int(self.x + self.w), int(self.y + self.h))
 
+    def handle_points(self) -> tuple:
+        """Deux poignées : les extrémités."""
+        g = self._cache()
+        pts = g.get("handles")
+        if pts is None:
+            pts = g["handles"] = ((self.x, self.y), (self.x + self.w, self.y + self.h))
+        return pts
+
+    def _build_path(self, path):
+        path.moveTo(self.x, self.y)
+        path.lineTo(self.x + self.w, self.y + self.h)
+
+    def hit(self, px, py, tol):
+        """Distance point-segment ≤ tol."""
+        import math
+        ax, ay = self.x, self.y
+        abx, aby = self.w, self.h
+        ab2 = abx*abx + aby*aby or 1.0
+        t = max(0.0, min(1.0, ((px-ax)*abx + (py-ay)*aby) / ab2))
+        cx, cy = ax + t*abx, ay + t*aby
+        return math.hypot(px - cx, py - cy) <= tol
+
     def to_dict(self):
         return {
             "type": "line",
@@ -120,10 +370,449 @@ class LineShape(Shape):
 
     @classmethod
     def from_dict(cls, data):
+        return cls(**{k: v for k, v in data.items() if k != "type"})
+
+
+# ------------------- TEXTE -------------------
+TEXT_ALIGNS = ("left", "center", "right")
+
+
+@dataclass(eq=False)
+class TextShape(Shape):
+    """Texte dans une boîte (x, y, w, h) : retour à la ligne à la largeur w.
+    fill_color = couleur du texte ; stroke_color = cadre de la boîte ('' = aucun).
+
+    La mise en page (QTextLayout → glyph runs de chaque ligne) est mise en
+    cache, clé = (texte, police, taille, alignement, largeur) : déplacer la
+    boîte ou changer sa couleur ne relance pas la mise en page. Ce cache est
+    mesuré / vidé par le diagnostic mémoire (« shapes.text_layout »).
+    Les lignes qui dépassent le bas de la boîte ne sont pas dessinées
+    (fit_height() agrandit la boîte). Sous GREEK_PX pixels écran, le texte
+    est « grisé » : une barre par ligne, sans glyphes."""
+    stroke_color: str = ""
+    fill_color: str = "#000000"
+    stroke_width: int = 0
+    text: str = ""
+    font_family: str = "Inter"
+    font_size: float = 14.0     # en unités canvas
+    align: str = "left"         # TEXT_ALIGNS
+
+    GREEK_PX = 4.0
+
+    def _layout(self):
+        """(clé, lignes [(x, y, w, h, glyph runs)], hauteur), recalculé si la clé change."""
+        key = (self.text, self.font_family, self.font_size, self.align, abs(self.w))
+        cache = self.__dict__.get("_text")
+        if cache is not None and cache[0] == key:
+            return cache
+        from PyQt6.QtCore import Qt, QPointF
+        from PyQt6.QtGui import QFont, QTextLayout, QTextOption
+        font = QFont(self.font_family)
+        font.setPixelSize(max(1, round(self.font_size)))
+        option = QTextOption({"center": Qt.AlignmentFlag.AlignHCenter,
+                              "right": Qt.AlignmentFlag.AlignRight}.get(self.align, Qt.AlignmentFlag.AlignLeft))
+        option.setWrapMode(QTextOption.WrapMode.WrapAtWordBoundaryOrAnywhere)
+        layout = QTextLayout(self.text.replace("\n", "\u2028"), font)  # \u2028 = saut forcé
+        layout.setTextOption(option)
+        width = max(1.0, abs(self.w))
+        lines, y = [], 0.0
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0.0, y))
+            lines.append([line, y])
+            y += line.height()
+        layout.endLayout()
+        lines = [(ln.naturalTextRect().x(), ly, ln.naturalTextWidth(), ln.height(), ln.glyphRuns())
+                 for ln, ly in lines]
+        if "_text" not in self.__dict__:
+            _track(self, "_text")
+        cache = self.__dict__["_text"] = (key, lines, y)
+        return cache
+
+    def text_height(self) -> float:
+        return self._layout()[2]
+
+    def prepare(self):
+        self._layout()  # QTextLayout / QFont : thread GUI (le tuple est partagé, immuable)
+
+    def fit_height(self):
+        """Agrandit la boîte pour contenir tout le texte."""
+        hgt = self.text_height()
+        if abs(self.h) < hgt:
+            self.h = hgt
+
+    def draw(self, painter):
+        from PyQt6.QtCore import Qt, QPointF, QRectF
+        from PyQt6.QtGui import QPen, QBrush
+
+        _, lines, _ = self._layout()
+        x0, y0, _, y1 = self.norm_rect()
+        bottom = y1 - y0 + 0.5  # tolérance d'arrondi (hauteur ajustée par fit_height)
+        color = QColor(self.fill_color or "#000000")
+        t = painter.transform()
+        zoom = min(abs(t.m11()), abs(t.m22()))
+        if self.font_size * zoom < self.GREEK_PX:
+            # texte illisible à ce zoom : une barre par ligne, sans glyphes
+            color.setAlpha(110)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QBrush(color))
+            for lx, ly, lw, lh, _ in lines:
+                if ly + lh > bottom:
+                    break
+                painter.drawRect(QRectF(x0 + lx, y0 + ly + lh * 0.3, lw, lh * 0.4))
+        else:
+            painter.setPen(QPen(color))
+            origin = QPointF(x0, y0)
+            for _, ly, _, lh, runs in lines:
+                if ly + lh > bottom:
+                    break
+                for run in runs:
+                    painter.drawGlyphRun(origin, run)
+        if self.stroke_color and self.stroke_width:
+            painter.setPen(self._pen())
+            painter.setBrush(QBrush())
+            painter.drawRect(self.qrect())
+
+    def to_dict(self):
+        return {
+            "type": "text",
+            "x": self.x, "y": self.y, "w": self.w, "h": self.h,
+            "text": self.text,
+            "font_family": self.font_family,
+            "font_size": self.font_size,
+            "align": self.align,
+            "stroke_color": self.stroke_color,
+            "fill_color": self.fill_color,
+            "stroke_width": self.stroke_width
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: v for k, v in data.items() if k != "type"})
+
+
+# ------------------- IMAGE -------------------
+@dataclass(eq=False)
+class ImageShape(Shape):
+    """Image raster référencée par son chemin, étirée dans la boîte (x, y, w, h).
+    Seuls le chemin, l'empreinte du contenu et la géométrie sont sauvegardés ;
+    les pixels sont décodés à la demande (core.images : pyramide de mipmaps
+    dans un cache LRU partagé) ; l'empreinte est calculée sur le pool puis
+    recopiée par core.images.adopt_hashes() (thread GUI). Un motif d'attente est dessiné tant qu'aucun niveau
+    n'est disponible."""
+    stroke_color: str = ""
+    fill_color: str = ""
+    stroke_width: int = 0
+    path: str = ""
+    content_hash: str = ""   # SHA-256 du fichier ('' tant que le pool ne l'a pas calculé)
+
+    @classmethod
+    def from_file(cls, path: str, x: float = 0.0, y: float = 0.0, max_side: Optional[float] = None):
+        """Place l'image à sa taille naturelle (réduite à max_side si besoin).
+        Ne lit que l'en-tête : ni pixels ni empreinte sur le thread appelant."""
+        from core.images import image_size
+        w, h = image_size(path)
+        k = min(1.0, max_side / max(w, h)) if max_side else 1.0
+        return cls(x, y, w * k, h * k, path=path)
+
+    def draw(self, painter):
+        import math
+        from PyQt6.QtGui import QPainter, QPen, QBrush
+        from core.images import IMAGES, level_count
+
+        r = self.qrect()
+        img = None
+        if self.path:
+            # niveau k = 1/2**k de la pleine résolution : le plus proche de l'échelle écran
+            t = painter.transform()
+            screen = max(abs(t.m11()), abs(t.m22())) * max(r.width(), r.height())
+            size = IMAGES.size(self.path)
+            level = 0
+            if size is not None and screen > 0:
+                level = min(max(0, int(math.log2(max(size) / screen))), level_count(*size) - 1)
+            img = IMAGES.get(self.path, level, self.content_hash)
+        if img is not None:
+            smooth = painter.testRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+            painter.drawImage(r, img)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, smooth)
+        else:
+            # motif d'attente (rouge si le fichier est illisible)
+            failed = not self.path or IMAGES.failed(self.path)
+            painter.setPen(QPen(QColor("#D04040" if failed else "#A0A0A0"), 0))
+            painter.setBrush(QBrush(QColor(0, 0, 0, 20)))
+            painter.drawRect(r)
+            painter.drawLine(r.topLeft(), r.bottomRight())
+            painter.drawLine(r.topRight(), r.bottomLeft())
+        if self.stroke_color and self.stroke_width:
+            painter.setPen(self._pen())
+            painter.setBrush(QBrush())
+            painter.drawRect(r)
+
+    def to_dict(self):
+        return {
+            "type": "image",
+            "x": self.x, "y": self.y, "w": self.w, "h": self.h,
+            "path": self.path,
+            "content_hash": self.content_hash
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = {k: v for k, v in data.items() if k != "type"}
+        if "hash" in data:  # ancien nom du champ
+            data.setdefault("content_hash", data.pop("hash"))
         return cls(**data)
 
 
+# ------------------- REPÈRE LOCAL -------------------
+@dataclass(eq=False)  # pas de comparaison récursive : identité
+class TransformShape(Shape):
+    """Forme qui dessine du contenu dans un repère local
+    (translation x/y + échelle sx/sy) ; w/h inutilisés (bbox calculée)."""
+    sx: float = 1.0
+    sy: float = 1.0
+
+    def to_local(self, px: float, py: float) -> tuple[float, float]:
+        return (px - self.x) / (self.sx or 1.0), (py - self.y) / (self.sy or 1.0)
+
+    def to_parent(self, lx: float, ly: float) -> tuple[float, float]:
+        return self.x + lx * self.sx, self.y + ly * self.sy
+
+    def local_view(self, view: Bounds) -> Bounds:
+        """Zone visible exprimée dans le repère local."""
+        x0, y0 = self.to_local(view[0], view[1])
+        x1, y1 = self.to_local(view[2], view[3])
+        return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+    @abstractmethod
+    def local_bounds(self) -> Bounds:
+        """Bbox du contenu dans le repère local."""
+
+    @abstractmethod
+    def local_shapes(self) -> list[Shape]:
+        """Formes du contenu (repère local), pour le test de clic."""
+
+    def bounds(self) -> Bounds:
+        # transformation O(1) du cache local : déplacer ne touche pas au contenu
+        b = self.local_bounds()
+        x0, y0 = self.to_parent(b[0], b[1])
+        x1, y1 = self.to_parent(b[2], b[3])
+        return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+    def hit(self, px, py, tol):
+        """Descend dans le contenu seulement si le point est dans la bbox."""
+        b = self.bounds()
+        if not (b[0] - tol <= px <= b[2] + tol and b[1] - tol <= py <= b[3] + tol):
+            return False
+        lx, ly = self.to_local(px, py)
+        ltol = tol / (min(abs(self.sx), abs(self.sy)) or 1.0)
+        return any(c.hit(lx, ly, ltol) for c in reversed(self.local_shapes()))
+
+
+def union_bounds(shapes) -> Bounds:
+    bs = [c.bounds() for c in shapes]
+    if not bs:
+        return (0.0, 0.0, 0.0, 0.0)
+    return (min(b[0] for b in bs), min(b[1] for b in bs),
+            max(b[2] for b in bs), max(b[3] for b in bs))
+
+
+# ------------------- GROUPE -------------------
+@dataclass(eq=False)
+class GroupShape(TransformShape):
+    children: list[Shape] = field(default_factory=list)
+    visible: bool = True
+    _local: Optional[Bounds] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        for c in self.children:
+            c.parent = self
+        super().__post_init__()
+
+    # --------- enfants ---------
+    def add_child(self, shape: Shape):
+        shape.parent = self
+        self.children.append(shape)
+        self.invalidate_bounds()
+        self.touch()
+        if _LISTENERS:
+            notify(self, "children")
+
+    def remove_child(self, shape: Shape):
+        self.children.remove(shape)
+        shape.parent = None
+        self.invalidate_bounds()
+        self.touch()
+        if _LISTENERS:
+            notify(self, "children")
+
+    # --------- bbox en cache ---------
+    def invalidate_bounds(self):
+        """Invalide le cache de ce groupe et de ses ancêtres.
+        Un ancêtre valide implique des descendants valides : on s'arrête au
+        premier cache déjà invalide."""
+        if self._local is None:
+            return
+        self._local = None
+        if self.parent is not None:
+            self.parent.invalidate_bounds()
+
+    def local_bounds(self) -> Bounds:
+        if self._local is None:
+            self._local = union_bounds(self.children)
+        return self._local
+
+    def local_shapes(self):
+        return self.children
+
+    def hit(self, px, py, tol):
+        return self.visible and super().hit(px, py, tol)
+
+    def snapshot(self) -> "GroupShape":
+        snap = super().snapshot()
+        snap.__dict__["children"] = [c.snapshot() for c in self.children]
+        return snap
+
+    # --------- rendu ---------
+    def draw(self, painter, view: Optional[Bounds] = None):
+        if not self.visible:
+            return
+        painter.save()
+        painter.translate(self.x, self.y)
+        painter.scale(self.sx, self.sy)
+        draw_shapes(self.children, painter, self.local_view(view) if view else None)
+        painter.restore()
+
+    def to_dict(self):
+        return {
+            "type": "group",
+            "x": self.x, "y": self.y,
+            "sx": self.sx, "sy": self.sy,
+            "visible": self.visible,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("x", 0.0), data.get("y", 0.0), 0.0, 0.0,
+            children=[shape_from_dict(c) for c in data.get("children", [])],
+            sx=data.get("sx", 1.0), sy=data.get("sy", 1.0),
+            visible=data.get("visible", True),
+        )
+
+
+# ------------------- SYMBOLES -------------------
+@dataclass(eq=False)
+class SymbolDef:
+    """Définition partagée (stockée une fois dans Document.symbols).
+    Son dessin est enregistré une seule fois dans un QPicture (vectoriel,
+    donc net à tout zoom) puis rejoué par chaque instance."""
+    id: str
+    shapes: list[Shape] = field(default_factory=list)
+    parent: None = field(default=None, init=False, repr=False)
+    _local: Optional[Bounds] = field(default=None, init=False, repr=False)
+    _picture: object = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.__dict__["_uid"] = next(_SERIAL)
+        self.__dict__["_rev"] = next(_REVISION)
+        for c in self.shapes:
+            c.parent = self
+
+    def invalidate_bounds(self):
+        # appelé par les formes du symbole quand leur géométrie change
+        # (le QPicture est invalidé par Shape.touch, pour tout champ persistant)
+        self._local = None
+        self._picture = None
+
+    def local_bounds(self) -> Bounds:
+        if self._local is None:
+            self._local = union_bounds(self.shapes)
+        return self._local
+
+    def picture(self):
+        if self._picture is None:
+            from PyQt6.QtGui import QPicture, QPainter
+            self.local_bounds()  # revalide les caches des sous-groupes
+            pic = QPicture()
+            p = QPainter(pic)
+            p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+            draw_shapes(self.shapes, p)
+            p.end()
+            self._picture = pic
+        return self._picture
+
+    def to_dict(self):
+        return {"shapes": [c.to_dict() for c in self.shapes]}
+
+    @classmethod
+    def from_dict(cls, sid: str, data: dict):
+        return cls(sid, [shape_from_dict(c) for c in data.get("shapes", [])])
+
+
+@dataclass(eq=False)
+class InstanceShape(TransformShape):
+    """Instance légère : référence vers un symbole + transformation."""
+    ref: str = ""
+    symbol: Optional[SymbolDef] = field(default=None, repr=False, compare=False)
+
+    def local_bounds(self) -> Bounds:
+        return self.symbol.local_bounds() if self.symbol else (0.0, 0.0, 0.0, 0.0)
+
+    def local_shapes(self):
+        return self.symbol.shapes if self.symbol else []
+
+    def prepare(self):
+        if self.symbol is not None:
+            self.symbol.picture()  # QPicture et bbox du symbole partagé : thread GUI
+
+    def draw(self, painter):
+        if self.symbol is None:
+            return
+        painter.save()
+        painter.translate(self.x, self.y)
+        painter.scale(self.sx, self.sy)
+        painter.drawPicture(0, 0, self.symbol.picture())
+        painter.restore()
+
+    def to_dict(self):
+        # format compact : les valeurs par défaut ne sont pas écrites
+        d = {"type": "use", "ref": self.ref, "x": self.x, "y": self.y}
+        if self.sx != 1.0 or self.sy != 1.0:
+            d["sx"], d["sy"] = self.sx, self.sy
+        return d
+
+    @classmethod
+    def from_dict(cls, data):
+        # 'symbol' est résolu ensuite par Document.from_dict
+        return cls(data.get("x", 0.0), data.get("y", 0.0), 0.0, 0.0,
+                   sx=data.get("sx", 1.0), sy=data.get("sy", 1.0), ref=data["ref"])
+
+
+# ------------------- PARCOURS -------------------
+def draw_shapes(shapes, painter, view: Optional[Bounds] = None):
+    """Dessine une liste de formes ; si 'view' est donné, saute les formes
+    (et sous-arbres entiers) dont la bbox ne touche pas la zone visible."""
+    for s in shapes:
+        if view is not None and not bounds_intersect(s.bounds(), view):
+            continue
+        if isinstance(s, GroupShape):
+            s.draw(painter, view)
+        else:
+            s.draw(painter)
+
+
 # ------------------- FABRIQUE -------------------
+# Types simples créables en masse (Document.add_shapes)
+SHAPE_TYPES = {"rect": RectShape, "ellipse": EllipseShape, "line": LineShape}
+
+
 def shape_from_dict(data: dict) -> Shape:
     """Fabrique une instance selon le champ 'type'."""
     t = data.get("type")
@@ -133,5 +822,13 @@ def shape_from_dict(data: dict) -> Shape:
         return EllipseShape.from_dict(data)
     elif t == "line":
         return LineShape.from_dict(data)
+    elif t == "text":
+        return TextShape.from_dict(data)
+    elif t == "image":
+        return ImageShape.from_dict(data)
+    elif t == "group":
+        return GroupShape.from_dict(data)
+    elif t == "use":
+        return InstanceShape.from_dict(data)
     else:
         raise ValueError(f"Type de forme inconnu : {t}")
@@ -0,0 +1,96 @@
+"""
+Magnétisme (snapping) des outils.
+
+Principe :
+ - Au début d'un geste (press), on construit UNE fois un index trié des
+   coordonnées "accrochables" (bords, centres, extrémités de lignes, page).
+ - À chaque mouvement de souris, une requête = une recherche dichotomique
+   (bisect) par axe → O(log n), sans parcourir le document.
+ - La tolérance est donnée en coordonnées CANVAS (l'appelant divise la
+   tolérance écran par Canvas2D.scale).
+"""
+
+from bisect import bisect_left
+from typing import Iterable, Optional
+from core.shapes import LineShape, TransformShape
+
+
+def snap_coords(s) -> tuple[list[float], list[float]]:
+    """Coordonnées accrochables d'une forme : (xs, ys)."""
+    if isinstance(s, LineShape):
+        x1, y1 = s.x, s.y
+        x2, y2 = s.x + s.w, s.y + s.h
+        return [x1, (x1 + x2) / 2, x2], [y1, (y1 + y2) / 2, y2]
+    if isinstance(s, TransformShape):
+        # bbox en cache du contenu (pas de parcours des enfants)
+        left, top, right, bottom = s.bounds()
+    else:
+        # bbox normalisée en cache (w/h peuvent être négatifs après un resize)
+        left, top, right, bottom = s.norm_rect()
+    return [left, (left + right) / 2, right], [top, (top + bottom) / 2, bottom]
+
+
+class SnapIndex:
+    """Deux listes triées (xs, ys) interrogées par bisect."""
+
+    def __init__(self, xs: Iterable[float], ys: Iterable[float]):
+        self.xs = sorted(xs)
+        self.ys = sorted(ys)
+
+    @classmethod
+    def from_document(cls, doc, page_w: float, page_h: float, exclude=()) -> "SnapIndex":
+        """Index des formes du document (sauf 'exclude') + bords/centre de la page."""
+        xs = [0.0, page_w / 2, page_w]
+        ys = [0.0, page_h / 2, page_h]
+        skip = {id(s) for s in exclude}
+        for s in doc.shapes:
+            if id(s) in skip:
+                continue
+            sx, sy = snap_coords(s)
+            xs.extend(sx)
+            ys.extend(sy)
+        return cls(xs, ys)
+
+    # --------- requêtes ---------
+    @staticmethod
+    def _nearest(values: list[float], v: float, tol: float) -> Optional[float]:
+        """Valeur de 'values' la plus proche de v à moins de tol, sinon None."""
+        i = bisect_left(values, v)
+        best, best_d = None, tol
+        for j in (i - 1, i):
+            if 0 <= j < len(values):
+                d = abs(values[j] - v)
+                if d <= best_d:
+                    best, best_d = values[j], d
+        return best
+
+    def _snap_axis(self, values: list[float], candidates: Iterable[float], tol: float):
+        """Meilleur décalage pour aligner un des candidats → (delta, guide) ou (0, None)."""
+        delta, guide, best_d = 0.0, None, tol
+        for c in candidates:
+            hit = self._nearest(values, c, best_d)
+            if hit is not None and abs(hit - c) <= best_d:
+                delta, guide, best_d = hit - c, hit, abs(hit - c)
+        return delta, guide
+
+    def snap_point(self, x: float, y: float, tol: float):
+        """Accroche un point → (x, y, guides)."""
+        dx, gx = self._snap_axis(self.xs, (x,), tol)
+        dy, gy = self._snap_axis(self.ys, (y,), tol)
+        return x + dx, y + dy, self._guides(gx, gy)
+
+    def snap_offset(self, xs: Iterable[float], ys: Iterable[float], tol: float):
+        """Décalage (dx, dy, guides) qui aligne au mieux un ensemble de points (déplacement)."""
+        dx, gx = self._snap_axis(self.xs, xs, tol)
+        dy, gy = self._snap_axis(self.ys, ys, tol)
+        return dx, dy, self._guides(gx, gy)
+
+    @staticmethod
+    def _guides(gx, gy) -> list[tuple[str, float]]:
+        """Guides à dessiner : ('v', x) = verticale, ('h', y) = horizontale."""
+        guides = []
+        if gx is not None:
+            guides.append(("v", gx))
+        if gy is not None:
+            guides.append(("h", gy))
+        return guides
@@ -0,0 +1,19 @@
+"""
+Configuration pytest : Qt sans affichage (plateforme offscreen).
+Lancer depuis la racine du dépôt : python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """QApplication partagée (polices, QImageReader, widgets)."""
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from core.commands import CommandStack
+from core.document import Document
+from core.scripting import run_script
+
+
+def test_add_shapes_accepts_numpy_scalars():
+    doc = Document()
+    shapes = doc.add_shapes("rect", np.arange(3) * 10.0, np.int64(5), np.float32(1.0), 4,
+                            stroke_width=np.int64(2))
+    assert [s.x for s in shapes] == [0.0, 10.0, 20.0]
+    assert all(s.y == 5.0 and s.w == 1.0 for s in shapes)
+    assert all(type(s.stroke_width) is int for s in shapes)
+
+
+def test_add_shapes_length_mismatch():
+    with pytest.raises(ValueError):
+        Document().add_shapes("rect", [0, 1], [0, 1, 2], 1, 1)
+
+
+def test_translate_is_one_undo_step():
+    doc = Document()
+    stack = CommandStack()
+    shapes = doc.add_shapes("rect", [0, 10], 0, 5, 5, commands=stack)
+    doc.translate(shapes, 3, np.array([1.0, 2.0]), commands=stack)
+    assert [(s.x, s.y) for s in shapes] == [(3, 1.0), (13, 2.0)]
+    stack.undo()
+    assert [(s.x, s.y) for s in shapes] == [(0, 0), (10, 0)]
+    stack.undo()
+    assert doc.shapes == []
+
+
+def test_group_and_symbol_reject_foreign_shapes():
+    doc = Document()
+    other = Document().add_shapes("rect", [0], 0, 1, 1)
+    with pytest.raises(ValueError):
+        doc.group(other)
+    with pytest.raises(ValueError):
+        doc.define_symbol([])
+
+
+def test_script_operations_are_undoable_without_commands(tmp_path):
+    script = tmp_path / "gen.py"
+    script.write_text("cells = doc.add_shapes('rect', np.arange(4) * 12.0, 0, 10, 10)\n"
+                      "doc.translate(cells, 0, 5)\n", encoding="utf-8")
+    doc = Document()
+    stack = CommandStack()
+    run_script(str(script), doc, stack)
+    assert len(doc.shapes) == 4 and doc.shapes[0].y == 5
+    assert len(stack.undo_stack) == 2
+    stack.undo()
+    stack.undo()
+    assert doc.shapes == []
+
+
+def test_align_empty_is_noop():
+    stack = CommandStack()
+    assert Document().align([], "left", commands=stack) is None
+    assert not stack.can_undo()
+
+
+def test_restyle_without_style_pushes_nothing():
+    doc = Document()
+    stack = CommandStack()
+    shapes = doc.add_shapes("rect", [0, 10], 0, 5, 5)
+    assert doc.restyle(shapes, commands=stack) is None
+    assert not stack.can_undo()
+    doc.restyle(shapes, fill_color="#123456", commands=stack)
+    assert stack.can_undo() and all(s.fill_color == "#123456" for s in shapes)
+
+
+def test_scale_accepts_generator():
+    doc = Document()
+    shapes = doc.add_shapes("rect", [0, 10], 0, 5, 5)
+    g = doc.group([shapes[1]])
+    doc.scale((s for s in doc.shapes), 2.0)
+    assert (shapes[0].x, shapes[0].w) == (0.0, 10.0)
+    assert (g.x, g.sx) == (0.0, 2.0)
+    assert g.bounds()[0] == 18.0  # (10 - 1) × 2 : le groupe a bien été mis à l'échelle
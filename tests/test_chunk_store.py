@@ -0,0 +1,81 @@
+from core.chunk_store import ChunkStore
+from core.document import Document
+from core.shapes import RectShape
+
+
+def _doc(n):
+    doc = Document()
+    for i in range(n):
+        doc.add_shape(RectShape(i * 10.0, 0.0, 8.0, 8.0))
+    return doc
+
+
+def test_save_edit_save_load(tmp_path):
+    path = str(tmp_path / "d.illus")
+    doc = _doc(4)
+    store = ChunkStore(path, chunk_size=2)
+    store.save(doc)
+
+    doc.shapes[1].fill_color = "#00FF00"
+    stats = store.save(doc)
+    assert stats["encoded"] == 1  # seule la tranche modifiée est ré-encodée
+
+    loaded = ChunkStore(path).load()
+    assert [s.fill_color for s in loaded.shapes] == ["#FFFFFF", "#00FF00", "#FFFFFF", "#FFFFFF"]
+
+
+def test_replaced_shape_is_saved(tmp_path):
+    # une forme supprimée puis remplacée peut réutiliser l'id() de l'ancienne :
+    # la nouvelle doit malgré tout être écrite
+    path = str(tmp_path / "d.illus")
+    doc = _doc(4)
+    store = ChunkStore(path)
+    store.save(doc)
+
+    doc.shapes.pop()
+    doc.shapes.append(RectShape(30.0, 0.0, 8.0, 8.0, fill_color="#FF0000"))
+    stats = store.save(doc)
+    assert stats["encoded"] == 1
+
+    loaded = ChunkStore(path).load()
+    assert loaded.shapes[-1].fill_color == "#FF0000"
+
+
+def test_unchanged_save_encodes_nothing(tmp_path):
+    path = str(tmp_path / "d.illus")
+    store = ChunkStore(path, chunk_size=2)
+    doc = _doc(5)
+    store.save(doc)
+    assert store.save(doc)["encoded"] == 0
+    reloaded = ChunkStore(path, chunk_size=2)
+    doc2 = reloaded.load()
+    assert reloaded.save(doc2)["encoded"] == 0
+
+
+def test_image_hash_saved_after_background_hashing(tmp_path, qapp):
+    import time
+    from PyQt6.QtGui import QImage
+    from core.images import IMAGES, adopt_hashes, file_hash
+    from core.shapes import ImageShape
+
+    img_path = str(tmp_path / "a.png")
+    img = QImage(32, 16, QImage.Format.Format_RGB32)
+    img.fill(0x3070C0)
+    img.save(img_path)
+
+    path = str(tmp_path / "d.illus")
+    doc = _doc(2)
+    shape = ImageShape.from_file(img_path)
+    doc.shapes.insert(0, shape)
+    store = ChunkStore(path)
+    store.save(doc)  # avant le calcul de l'empreinte
+
+    adopt_hashes(doc)  # demande l'empreinte au pool
+    deadline = time.time() + 5
+    while not IMAGES.content_hash(img_path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert adopt_hashes(doc) == 1  # recopiée dans la forme (thread GUI)
+    assert store.save(doc)["encoded"] == 1
+
+    loaded = ChunkStore(path).load()
+    assert loaded.shapes[0].content_hash == file_hash(img_path)
@@ -0,0 +1,31 @@
+from core.commands import CommandStack, SetPropertyCommand
+from core.shapes import RectShape
+
+
+def test_undo_redo_and_clear():
+    s = RectShape(0, 0, 10, 10)
+    stack = CommandStack()
+    stack.push(SetPropertyCommand([s], "fill_color", "#FF0000"))
+    assert s.fill_color == "#FF0000"
+    stack.undo()
+    assert s.fill_color == "#FFFFFF"
+    stack.redo()
+    assert s.fill_color == "#FF0000"
+    stack.undo()
+    stack.clear()
+    assert not stack.can_undo() and not stack.can_redo()
+
+
+def test_new_document_clears_history(qapp):
+    from ui.main_window import MainWindow
+    w = MainWindow()
+    try:
+        s = RectShape(0, 0, 10, 10)
+        w.doc.add_shape(s)
+        w.commands.push(SetPropertyCommand([s], "fill_color", "#FF0000"))
+        w.on_new()
+        assert not w.commands.can_undo()
+        assert not w.a_undo.isEnabled()
+    finally:
+        w.canvas2d.shutdown()
+        w.deleteLater()
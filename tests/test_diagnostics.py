@@ -0,0 +1,63 @@
+import pytest
+
+from core.commands import CommandStack, SetValuesCommand
+from core.diagnostics import CACHES, cache_report, clear_cache, history_report
+from core.document import Document
+from core.shapes import RectShape, TextShape, TransformShape
+
+
+def test_geometry_cache_is_registered():
+    doc = Document()
+    shapes = [RectShape(i * 10.0, 0.0, 8.0, 8.0) for i in range(20)]
+    for s in shapes:
+        doc.add_shape(s)
+        s.bounds()
+    assert "shapes.geometry" in CACHES
+    report = cache_report(doc)["shapes.geometry"]
+    assert report["entries"] >= 20 and report["bytes"] > 0
+
+    clear_cache("shapes.geometry", doc)
+    assert all("_geo" not in s.__dict__ for s in shapes)
+    assert shapes[0].bounds() == (-1.0, -1.0, 9.0, 9.0)  # recalculée à la demande
+
+
+def test_transform_shape_is_abstract():
+    with pytest.raises(TypeError):
+        TransformShape(0.0, 0.0, 0.0, 0.0)
+
+
+def test_text_layout_cache_is_registered(qapp):
+    doc = Document()
+    text = TextShape(0.0, 0.0, 120.0, 40.0, text="Bonjour le monde, sur plusieurs lignes")
+    doc.add_shape(text)
+    height = text.text_height()
+    report = cache_report(doc)["shapes.text_layout"]
+    assert report["entries"] >= 1 and report["bytes"] > 0
+
+    clear_cache("shapes.text_layout", doc)
+    assert "_text" not in text.__dict__
+    assert text.text_height() == height
+
+
+def test_history_counts_value_rows():
+    shapes = [RectShape(float(i), 0.0, 8.0, 8.0) for i in range(2000)]
+    small, big = CommandStack(), CommandStack()
+    small.push(SetValuesCommand(shapes[:10], ("x", "y"), [[1.0, 2.0]] * 10))
+    big.push(SetValuesCommand(shapes, ("x", "y"), [[float(i), 2.0] for i in range(2000)]))
+    # deux listes de 2000 lignes (nouvelles et anciennes valeurs) : > 2000 × 2 × 100 octets
+    assert history_report(big)["bytes"] > 400_000
+    assert history_report(big)["bytes"] > 50 * history_report(small)["bytes"]
+
+
+def test_interactive_edits_defer_budget_check(qapp, monkeypatch):
+    import ui.main_window as mw
+    calls = []
+    monkeypatch.setattr(mw, "enforce_budgets", lambda *a: calls.append(a) or [])
+    win = mw.MainWindow()
+    calls.clear()
+    for _ in range(3):
+        win.on_canvas_edit(SetValuesCommand([RectShape(0.0, 0.0, 1.0, 1.0)], ("x",), [[5.0]]))
+    assert calls == [] and win._budget_timer.isActive()
+    win._budget_timer.timeout.emit()
+    assert len(calls) == 1 and not win._budget_timer.isActive()
+    win.close()
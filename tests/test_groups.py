@@ -0,0 +1,92 @@
+from core.commands import CommandStack
+from core.document import Document
+from core.shapes import GroupShape, RectShape
+
+
+def _rect(x, y, w=10.0, h=10.0):
+    return RectShape(x, y, w, h, stroke_width=0)
+
+
+def _doc():
+    doc = Document()
+    for s in (_rect(0, 0), _rect(30, 0), _rect(100, 100)):
+        doc.add_shape(s)
+    return doc
+
+
+def test_group_bounds_follow_children():
+    a, b = _rect(0, 0), _rect(30, 0)
+    inner = GroupShape(0.0, 0.0, 0.0, 0.0, children=[a, b])
+    outer = GroupShape(5.0, 5.0, 0.0, 0.0, children=[inner])
+    assert outer.bounds() == (5.0, 5.0, 45.0, 15.0)
+    b.x = 50.0  # invalide inner puis outer
+    assert inner.bounds() == (0.0, 0.0, 60.0, 10.0)
+    assert outer.bounds() == (5.0, 5.0, 65.0, 15.0)
+    inner.remove_child(b)
+    assert outer.bounds() == (5.0, 5.0, 15.0, 15.0)
+
+
+def test_group_move_and_scale():
+    g = GroupShape(0.0, 0.0, 0.0, 0.0, children=[_rect(0, 0), _rect(30, 0)])
+    g.x, g.y = 10.0, 20.0
+    assert g.bounds() == (10.0, 20.0, 50.0, 30.0)
+    g.sx = g.sy = 2.0
+    assert g.bounds() == (10.0, 20.0, 90.0, 40.0)
+
+
+def test_hit_inside_groups():
+    g = GroupShape(100.0, 0.0, 0.0, 0.0, sx=2.0, sy=2.0,
+                   children=[_rect(0, 0), GroupShape(30.0, 0.0, 0.0, 0.0, children=[_rect(0, 0)])])
+    assert g.hit(105.0, 5.0, 0.0)       # premier enfant
+    assert g.hit(175.0, 5.0, 0.0)       # sous-groupe, à l'échelle du parent
+    assert not g.hit(140.0, 5.0, 0.0)   # dans la bbox, entre les enfants
+    assert not g.hit(5.0, 5.0, 0.0)
+    g.visible = False
+    assert not g.hit(105.0, 5.0, 0.0)
+
+
+def test_group_ungroup_undo_redo():
+    doc = _doc()
+    a, b, c = doc.shapes
+    stack = CommandStack()
+    g = doc.group([c, a], commands=stack)
+    assert doc.shapes == [b, g] and g.children == [a, c] and a.parent is g
+    stack.undo()
+    assert doc.shapes == [a, b, c] and a.parent is None and not g.children
+    stack.redo()
+    assert doc.shapes == [b, g] and c.parent is g
+    g.x, g.sx = 10.0, 2.0
+    children = doc.ungroup(g, commands=stack)
+    assert doc.shapes == [b, a, c] and children == [a, c]
+    assert (a.x, a.w, c.x, c.w) == (10.0, 20.0, 210.0, 20.0) and a.parent is None
+    stack.undo()
+    assert doc.shapes == [b, g] and (a.x, a.w) == (0.0, 10.0) and a.parent is g
+    assert g.bounds() == (10.0, 0.0, 230.0, 110.0)
+
+
+def test_group_rejects_foreign_shapes():
+    import pytest
+    with pytest.raises(ValueError):
+        _doc().group([_rect(0, 0)])
+
+
+def test_canvas_group_is_undoable(qapp):
+    from ui.main_window import MainWindow
+    w = MainWindow()
+    try:
+        for s in (_rect(0, 0), _rect(30, 0)):
+            w.doc.add_shape(s)
+        before = list(w.doc.shapes)
+        w.canvas2d.set_selection(before)
+        w.canvas2d.group_selection()
+        (g,) = w.doc.shapes
+        assert w.canvas2d.selection == [g] and w.a_undo.isEnabled()
+        w.canvas2d.ungroup_selection()
+        assert w.doc.shapes == before
+        w.on_undo()
+        assert w.doc.shapes == [g]
+        w.on_undo()
+        assert w.doc.shapes == before and all(s.parent is None for s in before)
+    finally:
+        w.canvas2d.shutdown()
+        w.deleteLater()
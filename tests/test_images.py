@@ -0,0 +1,23 @@
+from PyQt6.QtGui import QImage
+
+from core.diagnostics import Budgets
+from core.images import BUDGET, ImageCache
+
+
+def _level(side):
+    return QImage(side, side, QImage.Format.Format_ARGB32)
+
+
+def test_budget_below_global_cache_budget():
+    assert BUDGET < Budgets().cache_bytes
+
+
+def test_trim_evicts_least_recently_used(qapp):
+    cache = ImageCache(budget=4 * _level(64).sizeInBytes())
+    for k in range(4):
+        cache._put(("h", k), _level(64))
+    cache._hashes["p"] = "h"
+    assert cache.get("p", 0) is not None  # niveau 0 redevient le plus récent
+    cache.trim()
+    assert cache.cache_size()[0] == 2
+    assert set(cache._levels) == {("h", 3), ("h", 0)}
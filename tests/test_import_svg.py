@@ -0,0 +1,104 @@
+from core import import_svg
+from core.import_svg import iter_svg_shapes
+
+
+def _svg(tmp_path, n):
+    body = "".join(f'<rect transform="scale({1 + i / 1000})" width="10" height="10" fill="#FF0000"/>'
+                   for i in range(n))
+    path = tmp_path / "a.svg"
+    path.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">{body}</svg>')
+    return str(path)
+
+
+def test_style_cache_ignores_transform(tmp_path, qapp):
+    import_svg._svg_cache_clear()
+    shapes = list(iter_svg_shapes(_svg(tmp_path, 500)))
+    assert len(shapes) == 500 and shapes[0].fill_color == "#FF0000"
+    assert len(import_svg._KW_CACHE) <= 2  # épaisseur arrondie : 1 ou 2
+
+
+def test_style_cache_is_capped(monkeypatch, qapp):
+    monkeypatch.setattr(import_svg, "CACHE_MAX", 8)
+    import_svg._svg_cache_clear()
+    for w in range(1, 50):
+        import_svg._style_kw({"stroke": "#000000", "fill": "none", "stroke-width": str(w)},
+                             import_svg.IDENTITY)
+    assert len(import_svg._KW_CACHE) <= 8
+
+
+def _shapes(tmp_path, body, root='width="100" height="100"'):
+    path = tmp_path / "b.svg"
+    path.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" {root}>{body}</svg>')
+    return list(iter_svg_shapes(str(path)))
+
+
+def test_element_mapping(tmp_path, qapp):
+    from core.shapes import EllipseShape, LineShape, RectShape
+    rect, circle, ellipse, line = _shapes(tmp_path, (
+        '<rect x="1" y="2" width="10" height="20" fill="red" stroke="blue" stroke-width="3"/>'
+        '<circle cx="50" cy="50" r="5"/>'
+        '<ellipse cx="10" cy="20" rx="4" ry="2" fill="none" stroke="#00FF00"/>'
+        '<line x1="0" y1="0" x2="30" y2="40" stroke="black"/>'))
+    assert type(rect) is RectShape and (rect.x, rect.y, rect.w, rect.h) == (1, 2, 10, 20)
+    assert (rect.fill_color, rect.stroke_color, rect.stroke_width) == ("#FF0000", "#0000FF", 3)
+    assert type(circle) is EllipseShape and (circle.x, circle.y, circle.w, circle.h) == (45, 45, 10, 10)
+    assert circle.fill_color == "#000000" and circle.stroke_color == ""  # défauts SVG
+    assert type(ellipse) is EllipseShape and (ellipse.x, ellipse.y, ellipse.w, ellipse.h) == (6, 18, 8, 4)
+    assert ellipse.fill_color == "" and ellipse.stroke_color == "#00FF00"
+    assert type(line) is LineShape and (line.x, line.y, line.w, line.h) == (0, 0, 30, 40)
+    assert line.fill_color == ""
+
+
+def test_transform_and_inherited_style(tmp_path, qapp):
+    (rect,) = _shapes(tmp_path, (
+        '<g transform="translate(10,20)" fill="#123456" stroke="black" stroke-width="2">'
+        '<g transform="scale(2)"><rect x="1" y="1" width="5" height="5"/></g></g>'))
+    assert (rect.x, rect.y, rect.w, rect.h) == (12, 22, 10, 10)
+    assert rect.fill_color == "#123456" and rect.stroke_width == 4  # épaisseur mise à l'échelle
+
+
+def test_viewbox_scales_to_page(tmp_path, qapp):
+    from core.import_svg import import_svg as load
+    path = tmp_path / "v.svg"
+    path.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="200" height="100" '
+                    'viewBox="10 0 100 50"><rect x="10" y="5" width="20" height="10"/></svg>')
+    doc = load(str(path))
+    assert (doc.width, doc.height) == (200, 100) and doc.title == "v"
+    (rect,) = doc.shapes
+    assert (rect.x, rect.y, rect.w, rect.h) == (0, 10, 40, 20)
+
+
+def test_viewbox_gives_size_when_width_missing(tmp_path, qapp):
+    from core.import_svg import import_svg as load
+    path = tmp_path / "s.svg"
+    path.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="100%" viewBox="0 0 300 150"/>')
+    doc = load(str(path))
+    assert (doc.width, doc.height) == (300, 150) and doc.shapes == []
+
+
+def test_defs_are_skipped(tmp_path, qapp):
+    shapes = _shapes(tmp_path, (
+        '<defs><rect width="1" height="1"/><g><circle r="3"/></g></defs>'
+        '<symbol><rect width="2" height="2"/></symbol>'
+        '<rect width="7" height="7"/>'))
+    assert [s.w for s in shapes] == [7]
+
+
+def test_zero_stroke_width_is_kept(tmp_path, qapp):
+    (rect,) = _shapes(tmp_path, '<rect width="5" height="5" stroke="black" stroke-width="0"/>')
+    assert rect.stroke_width == 0
+
+
+def test_convert_directory(tmp_path, qapp):
+    import json
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    (src / "a.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg" width="50" height="40">'
+                               '<rect width="5" height="5"/><circle r="2"/></svg>')
+    (src / "b.svg").write_text("<svg")
+    (src / "notes.txt").write_text("ignoré")
+    report = import_svg.convert_directory(str(src), str(dst), workers=1)
+    assert report["files"] == 2 and report["shapes"] == 2
+    assert [e[0] for e in report["errors"]] == [str(src / "b.svg")]
+    data = json.loads((dst / "a.json").read_text())
+    assert len(data["shapes"]) == 2 and not (dst / "b.json").exists()
@@ -0,0 +1,52 @@
+from core.document import Document
+from core.io_json import load_document, save_document
+from core.shapes import GroupShape, ImageShape, RectShape, TextShape, shape_from_dict
+
+
+def _roundtrip(tmp_path, doc):
+    path = tmp_path / "doc.json"
+    save_document(doc, str(path))
+    return load_document(str(path))
+
+
+def test_text_roundtrip(tmp_path):
+    doc = Document()
+    doc.add_shape(TextShape(1.0, 2.0, 100.0, 30.0, text="Ligne 1\nLigne « 2 »", font_family="Serif",
+                            font_size=18.0, align="right", stroke_color="#00FF00", fill_color="#112233",
+                            stroke_width=1))
+    (t,) = _roundtrip(tmp_path, doc).shapes
+    assert type(t) is TextShape
+    assert (t.x, t.y, t.w, t.h) == (1.0, 2.0, 100.0, 30.0)
+    assert (t.text, t.font_family, t.font_size, t.align) == ("Ligne 1\nLigne « 2 »", "Serif", 18.0, "right")
+    assert (t.stroke_color, t.fill_color, t.stroke_width) == ("#00FF00", "#112233", 1)
+
+
+def test_image_roundtrip(tmp_path):
+    doc = Document()
+    doc.add_shape(ImageShape(5.0, 6.0, 40.0, 30.0, path="/images/a.png", content_hash="abc123"))
+    (img,) = _roundtrip(tmp_path, doc).shapes
+    assert type(img) is ImageShape
+    assert (img.x, img.y, img.w, img.h) == (5.0, 6.0, 40.0, 30.0)
+    assert (img.path, img.content_hash) == ("/images/a.png", "abc123")
+
+
+def test_image_legacy_hash_key():
+    img = shape_from_dict({"type": "image", "x": 0, "y": 0, "w": 1, "h": 1, "path": "a.png", "hash": "old"})
+    assert img.content_hash == "old" and "hash" not in img.to_dict()
+
+
+def test_group_roundtrip(tmp_path):
+    inner = GroupShape(3.0, 4.0, 0.0, 0.0, children=[TextShape(0.0, 0.0, 50.0, 20.0, text="x")])
+    g = GroupShape(10.0, 20.0, 0.0, 0.0, sx=2.0, sy=0.5, visible=False,
+                   children=[RectShape(0.0, 0.0, 10.0, 10.0, fill_color="#FF0000"), inner])
+    doc = Document()
+    doc.add_shape(g)
+    (g2,) = _roundtrip(tmp_path, doc).shapes
+    assert type(g2) is GroupShape
+    assert (g2.x, g2.y, g2.sx, g2.sy, g2.visible) == (10.0, 20.0, 2.0, 0.5, False)
+    rect, inner2 = g2.children
+    assert type(rect) is RectShape and rect.fill_color == "#FF0000"
+    assert type(inner2) is GroupShape and (inner2.x, inner2.y) == (3.0, 4.0)
+    assert inner2.children[0].text == "x"
+    assert rect.parent is g2 and inner2.parent is g2 and inner2.children[0].parent is inner2
+    assert g2.bounds() == g.bounds()
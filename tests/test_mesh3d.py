@@ -0,0 +1,75 @@
+import numpy as np
+
+from core.document import Document
+from core.mesh3d import MeshCache, PRISM_TRIS, SEGMENTS, cylinder_vertices, prism_vertices
+from core.shapes import EllipseShape, LineShape, RectShape
+
+
+def _doc(n):
+    doc = Document()
+    for i in range(n):
+        kind = (RectShape, EllipseShape, LineShape)[i % 3]
+        doc.add_shape(kind(i * 20.0, 0.0, 10.0, 10.0))
+    return doc
+
+
+def _same(a, b):
+    return all(np.array_equal(x, y) for x, y in zip(a.arrays(), b.arrays()))
+
+
+def test_prism_tessellation():
+    cw = [[(0, 0), (0, 1), (1, 1), (1, 0)]]  # base horaire : remise en CCW
+    v = prism_vertices(cw, depth=2.0)
+    assert v.shape == (1, 8, 3) and PRISM_TRIS.shape == (12, 3)
+    assert np.allclose(v[0, :4, 2], 0.0) and np.allclose(v[0, 4:, 2], 2.0)
+    x, y = v[0, :4, 0], v[0, :4, 1]
+    assert np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) > 0
+
+
+def test_cylinder_tessellation():
+    v = cylinder_vertices([(5, 5, 2, 1)], depth=3.0, seg=12)
+    assert v.shape == (1, 2 * 12 + 2, 3)
+    assert np.allclose(v[0, 24, :], (5, 5, 0)) and np.allclose(v[0, 25, :], (5, 5, 3))
+    assert np.allclose((v[0, :12, 0] - 5) ** 2 / 4 + (v[0, :12, 1] - 5) ** 2, 1.0, atol=1e-5)
+    mesh = MeshCache()
+    mesh.update(_doc(2))  # un rectangle + une ellipse
+    _, tris, _, _ = mesh.arrays()
+    assert len(tris) == len(PRISM_TRIS) + 4 * SEGMENTS
+
+
+def test_incremental_rebuild_only_changed_shapes():
+    doc = _doc(30)
+    mesh = MeshCache()
+    assert mesh.update(doc)["rebuilt"] == 30
+    assert mesh.update(doc)["rebuilt"] == 0
+
+    doc.shapes[4].x += 5
+    doc.shapes[7].fill_color = "#FF0000"
+    assert mesh.update(doc)["rebuilt"] == 1  # la couleur seule ne retessèle pas
+
+    fresh = MeshCache()
+    fresh.update(doc)
+    assert _same(mesh, fresh)
+
+
+def test_structure_change_rebuilds():
+    doc = _doc(6)
+    mesh = MeshCache()
+    mesh.update(doc)
+    doc.add_shape(RectShape(500.0, 0.0, 10.0, 10.0))
+    doc.shapes[0].w = 30.0
+    stats = mesh.update(doc)
+    assert stats["total"] == 7 and stats["rebuilt"] == 2
+
+    doc.group(doc.shapes[1:3])
+    mesh.update(doc)
+    fresh = MeshCache()
+    fresh.update(doc)
+    assert _same(mesh, fresh)
+
+    g = doc.shapes[1]
+    g.children[0].x += 3  # modification d'un enfant : seul le groupe est ré-aplati
+    assert mesh.update(doc)["rebuilt"] == 1
+    fresh = MeshCache()
+    fresh.update(doc)
+    assert _same(mesh, fresh)
@@ -0,0 +1,29 @@
+from PyQt6.QtCore import QPoint, QPointF, Qt
+from PyQt6.QtGui import QWheelEvent
+
+from core import shapes
+from core.diagnostics import CACHES
+from core.document import Document
+from core.shapes import RectShape
+from ui.init_3d import Preview3D
+
+
+def test_shutdown_removes_listener_and_caches(qapp):
+    view = Preview3D(Document())
+    assert view._on_shape_changed in shapes._LISTENERS and "3d.mesh" in CACHES
+    view.shutdown()
+    assert view._on_shape_changed not in shapes._LISTENERS
+    assert "3d.mesh" not in CACHES and "3d.image" not in CACHES
+    RectShape(0.0, 0.0, 1.0, 1.0).x = 5.0  # plus aucun rappel vers le widget
+
+
+def test_wheel_before_first_render(qapp):
+    view = Preview3D(Document())
+    view.resize(400, 300)
+    assert view.zoom is None
+    ev = QWheelEvent(QPointF(10, 10), QPointF(10, 10), QPoint(0, 0), QPoint(0, 120),
+                     Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier,
+                     Qt.ScrollPhase.NoScrollPhase, False)
+    view.wheelEvent(ev)
+    assert view.zoom == view._fit_zoom(400, 300) * 1.1
+    view.shutdown()
@@ -0,0 +1,56 @@
+from PyQt6.QtCore import QPointF, Qt
+
+from core.document import Document
+from core.shapes import RectShape, LineShape
+from core.snap import SnapIndex, snap_coords
+
+
+class _Ev:
+    def modifiers(self):
+        return Qt.KeyboardModifier.NoModifier
+
+
+def _drag(qapp, doc, shape, start, end):
+    from ui.init_2d import Canvas2D
+    canvas = Canvas2D(doc)
+    tool = canvas.tools["select"]
+    tool.on_mouse_press(QPointF(*start), _Ev())
+    assert canvas.selection == [shape]
+    tool.on_mouse_move(QPointF(*end), _Ev())
+    tool.on_mouse_release(QPointF(*end), _Ev())
+    canvas.deleteLater()
+
+
+def test_horizontal_drag_keeps_y(qapp):
+    doc = Document(width=2000, height=2000)
+    b = RectShape(200, 0, 50, 50, stroke_width=2)
+    doc.add_shape(b)
+    _drag(qapp, doc, b, (225, 25), (265, 25))
+    assert b.y == 0
+
+
+def test_drag_snaps_flush_against_edge(qapp):
+    doc = Document(width=2000, height=2000)
+    a = RectShape(0, 300, 100, 100, stroke_width=2)
+    b = RectShape(200, 300, 50, 50, stroke_width=2)
+    doc.add_shape(a)
+    doc.add_shape(b)
+    _drag(qapp, doc, b, (225, 325), (127, 325))  # bord gauche de B à x=102
+    assert b.x == 100
+
+
+def test_line_drag_snaps_endpoint(qapp):
+    doc = Document(width=2000, height=2000)
+    a = RectShape(0, 300, 100, 100)
+    line = LineShape(200, 500, 40, 40)
+    doc.add_shape(a)
+    doc.add_shape(line)
+    _drag(qapp, doc, line, (220, 520), (122, 520))  # extrémité de départ à x=102
+    assert line.x == 100
+
+
+def test_snap_index_nearest():
+    idx = SnapIndex(*snap_coords(RectShape(0, 0, 100, 100)))
+    x, y, guides = idx.snap_point(98.0, 51.0, 3.0)
+    assert (x, y) == (100.0, 50.0)
+    assert guides
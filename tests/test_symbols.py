@@ -0,0 +1,88 @@
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from core.document import Document
+from core.io_json import load_document, save_document
+from core.shapes import InstanceShape, RectShape, draw_shapes
+
+
+def _doc():
+    doc = Document()
+    doc.add_shape(RectShape(10.0, 10.0, 20.0, 20.0, stroke_color="", fill_color="#FF0000",
+                             stroke_width=0))
+    doc.add_shape(RectShape(40.0, 10.0, 10.0, 10.0, stroke_color="", fill_color="#0000FF",
+                             stroke_width=0))
+    return doc
+
+
+def _pixel(doc, x, y) -> str:
+    img = QImage(200, 100, QImage.Format.Format_ARGB32)
+    img.fill(QColor("#FFFFFF"))
+    p = QPainter(img)
+    draw_shapes(doc.shapes, p)
+    p.end()
+    return img.pixelColor(x, y).name().upper()
+
+
+def test_define_symbol_replaces_members():
+    doc = _doc()
+    inst = doc.define_symbol(list(doc.shapes))
+    assert doc.shapes == [inst] and isinstance(inst, InstanceShape)
+    sym = doc.symbols[inst.ref]
+    assert (inst.x, inst.y) == (10.0, 10.0)
+    assert [(s.x, s.y) for s in sym.shapes] == [(0.0, 0.0), (30.0, 0.0)]
+    assert all(s.parent is sym for s in sym.shapes)
+    assert inst.bounds() == (10.0, 10.0, 50.0, 30.0)
+
+
+def test_instances_draw_the_symbol(qapp):
+    doc = _doc()
+    inst = doc.define_symbol(list(doc.shapes))
+    doc.add_instance(inst.ref, 100.0, 50.0)
+    assert _pixel(doc, 20, 20) == "#FF0000"
+    assert _pixel(doc, 110, 60) == "#FF0000"
+    assert _pixel(doc, 135, 55) == "#0000FF"
+
+
+def test_style_change_in_symbol_redraws_instances(qapp):
+    doc = _doc()
+    inst = doc.define_symbol(list(doc.shapes))
+    doc.add_instance(inst.ref, 100.0, 50.0)
+    assert _pixel(doc, 110, 60) == "#FF0000"  # QPicture du symbole enregistré
+
+    doc.symbols[inst.ref].shapes[0].fill_color = "#00FF00"
+    assert _pixel(doc, 20, 20) == "#00FF00"
+    assert _pixel(doc, 110, 60) == "#00FF00"
+
+    doc.restyle(doc.symbols[inst.ref].shapes, fill_color="#FFFF00")
+    assert _pixel(doc, 110, 60) == "#FFFF00"
+
+
+def test_symbols_json_round_trip(tmp_path, qapp):
+    doc = _doc()
+    inst = doc.define_symbol(list(doc.shapes))
+    doc.add_instance(inst.ref, 100.0, 50.0, sx=2.0, sy=0.5)
+    path = str(tmp_path / "d.json")
+    save_document(doc, path)
+
+    loaded = load_document(path)
+    assert list(loaded.symbols) == [inst.ref]
+    sym = loaded.symbols[inst.ref]
+    assert [s.fill_color for s in sym.shapes] == ["#FF0000", "#0000FF"]
+    a, b = loaded.shapes
+    assert a.symbol is sym and b.symbol is sym
+    assert (b.x, b.y, b.sx, b.sy) == (100.0, 50.0, 2.0, 0.5)
+    assert _pixel(loaded, 120, 55) == "#FF0000"
+
+
+def test_define_symbol_undo_redo():
+    from core.commands import CommandStack
+    doc = _doc()
+    a, b = doc.shapes
+    stack = CommandStack()
+    inst = doc.define_symbol([a, b], commands=stack)
+    stack.undo()
+    assert doc.shapes == [a, b] and not doc.symbols
+    assert (a.x, a.y, b.x) == (10.0, 10.0, 40.0) and a.parent is None
+    stack.redo()
+    assert doc.shapes == [inst] and doc.symbols[inst.ref].shapes == [a, b]
+    assert inst.bounds() == (10.0, 10.0, 50.0, 30.0)
@@ -0,0 +1,46 @@
+import pytest
+
+from core.shapes import TextShape
+
+
+def _text():
+    return TextShape(0.0, 0.0, 120.0, 40.0, text="Bonjour le monde, un texte qui passe à la ligne")
+
+
+def test_layout_reused_when_box_moves_or_recolours(qapp):
+    t = _text()
+    layout = t._layout()
+    t.x, t.y, t.h = 50.0, 60.0, 80.0
+    t.fill_color = "#FF0000"
+    t.stroke_color, t.stroke_width = "#00FF00", 2
+    assert t._layout() is layout
+    t.w = -120.0  # boîte retournée : même largeur
+    assert t._layout() is layout
+
+
+@pytest.mark.parametrize("name, value", [
+    ("text", "Autre texte"), ("font_family", "Serif"), ("font_size", 20.0),
+    ("align", "center"), ("w", 60.0),
+])
+def test_layout_rebuilt_when_key_changes(qapp, name, value):
+    t = _text()
+    layout = t._layout()
+    setattr(t, name, value)
+    assert t._layout() is not layout
+    assert t._layout()[0] != layout[0]
+
+
+def test_wrapping_follows_width(qapp):
+    t = _text()
+    narrow = len(t._layout()[1])
+    t.w = 2000.0
+    assert len(t._layout()[1]) == 1 < narrow
+    t.text = "a\nb\nc"
+    assert len(t._layout()[1]) == 3  # sauts de ligne forcés
+
+
+def test_fit_height(qapp):
+    t = _text()
+    t.h = 1.0
+    t.fit_height()
+    assert t.h == pytest.approx(t.text_height()) and t.h > 1.0
@@ -0,0 +1,134 @@
+import time
+
+from PyQt6.QtGui import QImage, QPainter
+
+from core.diagnostics import CACHES
+from core.document import Document
+from core.shapes import RectShape, _LISTENERS
+from ui.tiles import TileRenderer
+
+
+def _paint(qapp, tiles, doc, w=1024, h=512):
+    img = QImage(w, h, QImage.Format.Format_ARGB32_Premultiplied)
+    img.fill(0)
+    p = QPainter(img)
+    tiles.paint(p, doc, 1.0, 0.0, 0.0, w, h)
+    p.end()
+    return img
+
+
+def _settle(qapp, tiles, doc):
+    _paint(qapp, tiles, doc)
+    deadline = time.time() + 10
+    while tiles._pending and time.time() < deadline:
+        qapp.processEvents()
+        time.sleep(0.001)
+    qapp.processEvents()
+
+
+def _doc():
+    doc = Document()
+    for i in range(8):
+        doc.add_shape(RectShape(20.0 + i * 120, 20.0, 50.0, 50.0, fill_color="#FF0000"))
+    return doc
+
+
+def test_edit_invalidates_only_touched_tiles(qapp):
+    doc = _doc()
+    tiles = TileRenderer(workers=2)
+    try:
+        _settle(qapp, tiles, doc)
+        versions = {k: v for k, (v, _) in tiles._tiles.items()}
+        assert (1.0, 0, 0) in versions and (1.0, 3, 1) in versions
+
+        doc.shapes[0].x += 5  # tuile (0, 0) seulement
+        _settle(qapp, tiles, doc)
+        changed = {k for k, (v, _) in tiles._tiles.items() if v != versions[k]}
+        assert changed == {(1.0, 0, 0)}
+    finally:
+        tiles.shutdown()
+
+
+def test_moved_shape_is_redrawn_in_its_new_tile(qapp):
+    doc = _doc()
+    tiles = TileRenderer(workers=2)
+    try:
+        _settle(qapp, tiles, doc)
+        doc.shapes[0].x = 600.0  # de la tuile (0, 0) vers la tuile (2, 0)
+        doc.shapes[0].y = 300.0
+        _settle(qapp, tiles, doc)
+        img = _paint(qapp, tiles, doc)
+        assert img.pixelColor(40, 40).alpha() == 0
+        assert img.pixelColor(620, 320).red() == 255
+    finally:
+        tiles.shutdown()
+
+
+def test_selection_does_not_invalidate(qapp):
+    doc = _doc()
+    tiles = TileRenderer(workers=2)
+    try:
+        _settle(qapp, tiles, doc)
+        v = tiles.version
+        doc.shapes[0].selected = True
+        _settle(qapp, tiles, doc)
+        assert tiles.version == v
+    finally:
+        tiles.shutdown()
+
+
+def test_shutdown_unsubscribes(qapp):
+    tiles = TileRenderer(workers=1)
+    assert tiles._on_change in _LISTENERS and "2d.tiles" in CACHES
+    tiles.shutdown()
+    assert tiles._on_change not in _LISTENERS and "2d.tiles" not in CACHES
+
+
+def test_workers_draw_snapshots_only(qapp, monkeypatch):
+    import threading
+    from core.shapes import TextShape
+    doc = _doc()
+    doc.add_shape(TextShape(20.0, 100.0, 200.0, 40.0, text="Bonjour"))
+    from PyQt6 import QtGui
+    threads = set()
+    text_layout = QtGui.QTextLayout
+    monkeypatch.setattr(QtGui, "QTextLayout",
+                        lambda *a: threads.add(threading.get_ident()) or text_layout(*a))
+    live = {id(s) for s in doc.shapes}
+    caches = set()
+    cache = RectShape._cache
+    monkeypatch.setattr(RectShape, "_cache", lambda self: (
+        id(self) in live and caches.add(threading.get_ident())) or cache(self))
+    tiles = TileRenderer(workers=2)
+    try:
+        _settle(qapp, tiles, doc)
+        assert threads == {threading.get_ident()}  # mise en page : thread GUI seulement
+        assert caches == {threading.get_ident()}   # géométrie des formes vivantes : idem
+        assert len(tiles._tiles) > 0
+    finally:
+        tiles.shutdown()
+
+
+def test_snapshot_is_isolated_from_later_edits():
+    s = RectShape(0.0, 0.0, 10.0, 10.0, stroke_width=0)
+    s.bounds()
+    snap = s.snapshot()
+    s.x = 50.0
+    assert snap.bounds() == (0.0, 0.0, 10.0, 10.0)
+    assert s.bounds() == (50.0, 0.0, 60.0, 10.0)
+    assert snap.__dict__["_geo"] is not s.__dict__.get("_geo")
+
+
+def test_layer_buffers_reused_until_resize(qapp):
+    doc = _doc()
+    tiles = TileRenderer(workers=1)
+    try:
+        _paint(qapp, tiles, doc)
+        _paint(qapp, tiles, doc)
+        layers = list(tiles._layers)
+        _paint(qapp, tiles, doc)
+        assert {id(img) for img in tiles._layers} == {id(img) for img in layers}
+        _paint(qapp, tiles, doc, w=800)
+        assert all(img.width() == 800 for img in tiles._layers)
+    finally:
+        tiles.shutdown()
@@ -2,21 +2,39 @@
 Canvas 2D avec :
 - Rendu des formes du Document
 - Pan/Zoom (molette = zoom, clic droit drag = pan)
-- Dispatch des évènements vers l'outil actif (Select/Rect/Ellipse/Line)
+- Dispatch des évènements vers l'outil actif (Select/Rect/Ellipse/Line/Text)
 - Suppression de la sélection avec 'Suppr'
+- Culling hiérarchique : les sous-arbres (groupes) hors de la vue sont sautés
+- Repaint automatique quand une forme change (notifications de core.shapes)
+- Images (core.images) décodées en arrière-plan : repaint à leur arrivée
+- Mode optionnel « tuiles » : formes rastérisées par un pool de threads
+  (ui.tiles.TileRenderer) ; page, cadres de sélection et overlay restent
+  sur le thread GUI
 
 Coordonnées :
 - On maintient (self.scale, self.offset_x, self.offset_y).
 - Les événements souris (en pixels widget) sont convertis en coords CANVAS.
 """
 
-from PyQt6.QtCore import Qt, QRect, QPointF
+from typing import Optional
+
+from PyQt6.QtCore import Qt, QRect, QRectF, QPointF, QTimer, pyqtSignal
 from PyQt6.QtGui import QPainter, QFont, QWheelEvent, QTransform
 from PyQt6.QtWidgets import QWidget
 
-from ui.tools import SelectTool, RectTool, EllipseTool, LineTool
+from core.commands import DefineSymbolCommand, GroupCommand, MacroCommand, UngroupCommand
+from core.images import IMAGES, adopt_hashes
+from core.shapes import GroupShape, add_listener, remove_listener, draw_shapes
+from ui.tiles import TileRenderer
+from ui.tools import SelectTool, RectTool, EllipseTool, LineTool, TextTool, draw_selection
 
 class Canvas2D(QWidget):
+    SNAP_PX = 6  # tolérance du magnétisme en pixels écran
+
+    selection_changed = pyqtSignal()
+    edited = pyqtSignal(object)  # Command à exécuter et empiler (CommandStack de la MainWindow)
+    _image_ready = pyqtSignal(str)  # émis depuis le pool de décodage → file vers le thread GUI
+
     def __init__(self, document, parent=None):
         super().__init__(parent)
         self._document = document
@@ -36,11 +54,40 @@ class Canvas2D(QWidget):
             "rect": RectTool(self),
             "ellipse": EllipseTool(self),
             "line": LineTool(self),
+            "text": TextTool(self),
         }
         self.active_tool = self.tools["select"]
 
-        # Sélection courante (référence sur une Shape)
-        self.selected = None
+        # Sélection courante (formes de premier niveau ; la dernière = principale)
+        self.selection = []
+
+        # Magnétisme (bords/centres des formes + page)
+        self.snap_enabled = True
+
+        # Rendu par tuiles (créé à l'activation, arrêté à la désactivation)
+        self._tiles: Optional[TileRenderer] = None
+
+        # Modifications de formes (scripts, undo…) → un seul update() par tour de boucle
+        self._changes_pending = False
+        add_listener(self._on_shape_changed)
+        self._image_ready.connect(self._on_image_ready)
+        self._image_listener = lambda path: self._image_ready.emit(path)
+        IMAGES.add_ready_listener(self._image_listener)
+
+    def _on_image_ready(self, path):
+        adopt_hashes(self._document, path)  # empreinte calculée par le pool → formes
+        if self._tiles is not None:
+            self._tiles.invalidate()  # les tuiles contiennent peut-être le motif d'attente
+        self.update()
+
+    def _on_shape_changed(self, shape, name):
+        if not self._changes_pending:
+            self._changes_pending = True
+            QTimer.singleShot(0, self._flush_changes)
+
+    def _flush_changes(self):
+        self._changes_pending = False
+        self.update()
 
     @property
     def doc(self):
@@ -48,12 +95,55 @@ class Canvas2D(QWidget):
         return self._document
 
 
+    @property
+    def selected(self):
+        """Forme principale de la sélection (ou None)."""
+        return self.selection[-1] if self.selection else None
+
+    @selected.setter
+    def selected(self, shape):
+        self.set_selection([shape] if shape is not None else [])
+
+    def set_selection(self, shapes):
+        for s in self.selection:
+            s.selected = False
+        self.selection = list(shapes)
+        for s in self.selection:
+            s.selected = True
+        self.update()  # cadres dessinés dans l'overlay : les tuiles restent valides
+        self.selection_changed.emit()
+
     # --------- API utilisée par MainWindow ---------
     def set_document(self, document):
         self._document = document
-        self.selected = None
+        adopt_hashes(document)  # images sans empreinte (anciens documents) : calcul en arrière-plan
+        self.selection = []
+        if self._tiles is not None:
+            self._tiles.invalidate()
+        self.update()
+        self.selection_changed.emit()
+
+    @property
+    def tiled(self) -> bool:
+        return self._tiles is not None
+
+    def set_tiled(self, on: bool):
+        """Active / désactive le rendu par tuiles multi-thread."""
+        if on and self._tiles is None:
+            self._tiles = TileRenderer(parent=self)
+            self._tiles.updated.connect(self.update)
+        elif not on and self._tiles is not None:
+            self._tiles.shutdown()  # pool, abonnement et cache libérés
+            self._tiles.deleteLater()
+            self._tiles = None
         self.update()
 
+    def shutdown(self):
+        """À appeler à la fermeture : arrête les tuiles et se désabonne."""
+        self.set_tiled(False)
+        remove_listener(self._on_shape_changed)
+        IMAGES.remove_ready_listener(self._image_listener)
+
     def set_tool(self, name: str):
         self.active_tool = self.tools[name]
         self.setCursor(Qt.CursorShape.ArrowCursor if name == "select" else Qt.CursorShape.CrossCursor)
@@ -80,6 +170,20 @@ class Canvas2D(QWidget):
         y = (pt.y() - self.offset_y) / self.scale
         return QPointF(x, y)
 
+    def page_rect(self) -> QRectF:
+        """Rectangle de la page en coords canvas (dérivé de Document.width/height)."""
+        return QRectF(0, 0, max(100, self._document.width // 2), max(80, self._document.height // 2))
+
+    def visible_canvas_rect(self) -> QRectF:
+        """Zone du canvas actuellement visible dans le widget."""
+        tl = self.widget_to_canvas(QPointF(0, 0))
+        br = self.widget_to_canvas(QPointF(self.width(), self.height()))
+        return QRectF(tl, br)
+
+    def snap_tolerance(self) -> float:
+        """Tolérance de magnétisme en coords canvas (SNAP_PX pixels écran quel que soit le zoom)."""
+        return self.SNAP_PX / self.scale
+
     # --------- rendu ---------
     def paintEvent(self, event):
         p = QPainter(self)
@@ -94,15 +198,21 @@ class Canvas2D(QWidget):
         p.setTransform(t)
 
         # page
-        from PyQt6.QtCore import QRectF
-        page_rect = QRectF(0, 0, max(100, self._document.width // 2), max(80, self._document.height // 2))
-        p.fillRect(page_rect, Qt.GlobalColor.white)
-
-        # dessiner toutes les formes
-        for s in self._document.shapes:
-            s.draw(p)
+        p.fillRect(self.page_rect(), Qt.GlobalColor.white)
+
+        if self.tiled:
+            # tuiles rendues par le pool, composées en coords widget
+            p.resetTransform()
+            self._tiles.paint(p, self._document, self.scale, self.offset_x, self.offset_y,
+                              max(1, self.width()), max(1, self.height()))
+            p.setTransform(t)
+        else:
+            # dessiner les formes visibles (sous-arbres hors vue sautés)
+            v = self.visible_canvas_rect()
+            draw_shapes(self._document.shapes, p, (v.left(), v.top(), v.right(), v.bottom()))
 
-        # overlay de l'outil (poignées, previews…)
+        # overlay : cadres de sélection puis outil (poignées, previews…)
+        draw_selection(p, self.selection)
         self.active_tool.draw_overlay(p)
 
         p.restore()
@@ -110,7 +220,41 @@ class Canvas2D(QWidget):
         # titre en haut à gauche (non zoomé)
         p.setPen(Qt.GlobalColor.white)
         p.setFont(QFont("Inter", 11))
-        p.drawText(10, 18, f"Outil: {self._tool_name()} | Zoom: {int(self.scale*100)}%")
+        p.drawText(10, 18, f"Outil: {self._tool_name()} | Zoom: {int(self.scale*100)}%"
+                           + (" | Tuiles" if self.tiled else ""))
+
+    # --------- groupes ---------
+    def group_selection(self):
+        """Regroupe la sélection (≥ 2 formes) et sélectionne le groupe."""
+        if len(self.selection) < 2:
+            return
+        cmd = GroupCommand(self._document, self.selection)
+        self.edited.emit(cmd)
+        self.set_selection([cmd.shape])
+
+    def ungroup_selection(self):
+        """Dissout les groupes sélectionnés (une seule entrée d'undo) et
+        sélectionne leurs enfants."""
+        cmds, out = [], []
+        for s in self.selection:
+            if isinstance(s, GroupShape):
+                s.selected = False
+                cmds.append(UngroupCommand(self._document, s))
+                out.extend(cmds[-1].children)
+            else:
+                out.append(s)
+        if cmds:
+            self.edited.emit(cmds[0] if len(cmds) == 1 else MacroCommand(cmds))
+        self.set_selection(out)
+
+    # --------- symboles ---------
+    def symbol_from_selection(self):
+        """Convertit la sélection en symbole et sélectionne l'instance créée."""
+        if not self.selection:
+            return
+        cmd = DefineSymbolCommand(self._document, self.selection)
+        self.edited.emit(cmd)
+        self.set_selection([cmd.shape])
 
     def _tool_name(self):
         for k, v in self.tools.items():
@@ -167,12 +311,16 @@ class Canvas2D(QWidget):
         pos = self.widget_to_canvas(ev.position())
         self.active_tool.on_mouse_release(pos, ev)
 
+    def mouseDoubleClickEvent(self, ev):
+        if ev.button() != Qt.MouseButton.LeftButton:
+            return
+        pos = self.widget_to_canvas(ev.position())
+        self.active_tool.on_double_click(pos, ev)
+
     def keyPressEvent(self, ev):
         # Delete -> supprime la sélection
         if ev.key() in (Qt.Key.Key_Delete, Qt.Key.Key_Backspace):
-            if self.selected and self.selected in self._document.shapes:
-                self._document.remove_shape(self.selected)
-                self.selected = None
-                self.update()
+            self._document.remove_shapes(self.selection)
+            self.set_selection([])
         else:
             super().keyPressEvent(ev)
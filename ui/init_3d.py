@@ -0,0 +1,183 @@
+"""
+Aperçu 3D (extrusion des formes du Document).
+
+- Le maillage vient de core.mesh3d.MeshCache : seules les formes modifiées
+  sont retessélées quand on revient sur l'onglet.
+- Une forme modifiée (notification de core.shapes) marque l'aperçu périmé ;
+  s'il est affiché, il se resynchronise au prochain tour de boucle.
+- Rendu logiciel hors écran : projection/ombrage/tri du peintre en NumPy, puis
+  remplissage des triangles avec QPainter dans une QImage (aucun GPU requis).
+- Clic gauche drag = orbite, molette = zoom.
+"""
+
+import math
+
+import numpy as np
+from PyQt6.QtCore import Qt, QPointF, QTimer
+from PyQt6.QtGui import QPainter, QImage, QColor, QBrush, QFont
+from PyQt6.QtWidgets import QWidget
+
+from core.diagnostics import register_cache, unregister_cache
+from core.mesh3d import MeshCache, project, DEPTH
+from core.shapes import add_listener, remove_listener
+
+
+class Preview3D(QWidget):
+    SPLAT_AREA = 2.0  # triangles plus petits (px²) rendus comme un simple pixel
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self.mesh = MeshCache()
+        self._image = None   # dernière image rendue (réaffichée tant que rien ne change)
+        self._stats = {"total": 0, "rebuilt": 0}
+
+        # caméra orbitale
+        self.yaw = math.radians(-30)
+        self.pitch = math.radians(55)
+        self.zoom = None     # calculé pour cadrer la page au premier rendu
+        self._drag = None
+
+        register_cache("3d.mesh", lambda: (len(self.mesh), self.mesh.nbytes()),
+                       self._evict_mesh)
+        register_cache("3d.image", self._image_size, self._evict_image)
+
+        self._stale = False
+        add_listener(self._on_shape_changed)
+
+    # --------- API utilisée par MainWindow ---------
+    def set_document(self, document):
+        self._document = document
+        self.mesh = MeshCache()
+        self.refresh()
+
+    def shutdown(self):
+        """À appeler à la fermeture : se désabonne et retire ses caches du diagnostic."""
+        remove_listener(self._on_shape_changed)
+        unregister_cache("3d.mesh")
+        unregister_cache("3d.image")
+        self.mesh.clear()
+        self._image = None
+
+    def _on_shape_changed(self, shape, name):
+        if not self._stale:
+            self._stale = True
+            if self.isVisible():
+                QTimer.singleShot(0, self.refresh)
+
+    def refresh(self):
+        """Resynchronise le maillage (incrémental) puis redessine."""
+        self._stale = False
+        self._stats = self.mesh.update(self._document)
+        self._image = None
+        self.update()
+
+    # --------- budgets mémoire (core.diagnostics) ---------
+    def _image_size(self):
+        return (0, 0) if self._image is None else (1, self._image.sizeInBytes())
+
+    def _evict_image(self):
+        self._image = None
+
+    def _evict_mesh(self):
+        self.mesh.clear()
+        self._image = None
+        if self.isVisible():
+            self.refresh()  # affiché : on retessèle tout de suite
+
+    def showEvent(self, ev):
+        self.refresh()
+        super().showEvent(ev)
+
+    # --------- rendu ---------
+    def _fit_zoom(self, width: int, height: int) -> float:
+        """Zoom qui cadre la page (même page que Canvas2D.page_rect() : width/2 × height/2)."""
+        doc = self._document
+        return 0.8 * min(width / max(doc.width / 2, 1), height / max(doc.height / 2, 1))
+
+    def render_image(self, width: int, height: int) -> QImage:
+        """Rendu logiciel du maillage courant dans une QImage."""
+        doc = self._document
+        if self.zoom is None:
+            self.zoom = self._fit_zoom(width, height)
+        verts, tris, colors, order = self.mesh.arrays()
+        pts, shade = project(verts, tris, colors, order, self.yaw, self.pitch, self.zoom,
+                             (doc.width / 4, doc.height / 4, DEPTH / 2), width, height)
+
+        # élimination vectorisée des triangles hors champ
+        if len(pts):
+            lo, hi = pts.min(axis=1), pts.max(axis=1)
+            inside = (hi[:, 0] >= 0) & (lo[:, 0] < width) & (hi[:, 1] >= 0) & (lo[:, 1] < height)
+            pts, shade = pts[inside], shade[inside]
+        e1, e2 = pts[:, 1] - pts[:, 0], pts[:, 2] - pts[:, 0]
+        small = np.abs(e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]) / 2 < self.SPLAT_AREA
+
+        img = QImage(width, height, QImage.Format.Format_RGB32)
+        img.fill(QColor("#2b2b2b"))
+
+        # triangles sous le pixel : un point au barycentre, écrit en bloc dans
+        # le tampon de l'image (ordre du peintre conservé, dernier écrit = devant)
+        if small.any():
+            c = pts[small].mean(axis=1).astype(np.int32)
+            ok = (c[:, 0] >= 0) & (c[:, 0] < width) & (c[:, 1] >= 0) & (c[:, 1] < height)
+            rgb = shade[small][ok].astype(np.uint32)
+            ptr = img.bits()
+            ptr.setsize(img.sizeInBytes())
+            buf = np.frombuffer(ptr, dtype=np.uint32).reshape(height, img.bytesPerLine() // 4)
+            buf[c[ok, 1], c[ok, 0]] = 0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+        # triangles visibles : remplissage QPainter (moteur raster, logiciel)
+        big = ~small
+        rgb = shade[big].astype(np.uint32)
+        packed = ((rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]).tolist()
+        brushes = {}
+        p = QPainter(img)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        p.setPen(Qt.PenStyle.NoPen)
+        last = None
+        for (ax, ay, bx, by, cx, cy), col in zip(pts[big].reshape(-1, 6).tolist(), packed):
+            if col != last:
+                brush = brushes.get(col)
+                if brush is None:
+                    brush = brushes[col] = QBrush(QColor(col | 0xFF000000))
+                p.setBrush(brush)
+                last = col
+            p.drawConvexPolygon(QPointF(ax, ay), QPointF(bx, by), QPointF(cx, cy))
+        p.end()
+        return img
+
+    def paintEvent(self, event):
+        if self._image is None or self._image.size() != self.size():
+            self._image = self.render_image(max(1, self.width()), max(1, self.height()))
+        p = QPainter(self)
+        p.drawImage(0, 0, self._image)
+        p.setPen(Qt.GlobalColor.white)
+        p.setFont(QFont("Inter", 11))
+        p.drawText(10, 18, f"3D : {self._stats['total']} formes | "
+                           f"{self._stats['rebuilt']} retessélées")
+        p.end()
+
+    # --------- souris ---------
+    def mousePressEvent(self, ev):
+        if ev.button() == Qt.MouseButton.LeftButton:
+            self._drag = ev.position()
+
+    def mouseMoveEvent(self, ev):
+        if self._drag is None:
+            return
+        d = ev.position() - self._drag
+        self._drag = ev.position()
+        self.yaw += d.x() * 0.01
+        self.pitch = min(math.pi / 2, max(0.0, self.pitch - d.y() * 0.01))
+        self._image = None
+        self.update()
+
+    def mouseReleaseEvent(self, ev):
+        self._drag = None
+
+    def wheelEvent(self, ev):
+        if self.zoom is None:  # molette avant le premier rendu
+            self.zoom = self._fit_zoom(max(1, self.width()), max(1, self.height()))
+        self.zoom *= 1.1 if ev.angleDelta().y() > 0 else 1 / 1.1
+        self._image = None
+        self.update()
@@ -0,0 +1,199 @@
+"""
+Inspecteur de propriétés (dock à droite de la MainWindow).
+
+Édite stroke_color / fill_color / stroke_width de la sélection courante :
+- Chaque édition = UNE SetPropertyCommand pour toute la sélection
+  (une entrée d'undo, une passe sur les formes, un repaint).
+- Pendant un "scrub" (slider, flèches du spinbox, dialogue couleur), les
+  valeurs sont appliquées en aperçu via un QTimer (debounce), puis validées
+  en une commande au relâchement / à la fin de l'édition.
+- Les groupes sont éditables (on descend jusqu'aux feuilles) ; les instances
+  de symboles sont ignorées (leur style appartient au symbole).
+"""
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (
+    QDockWidget, QWidget, QFormLayout, QHBoxLayout, QPushButton, QSpinBox,
+    QSlider, QColorDialog, QLabel,
+)
+
+from core.commands import SetPropertyCommand
+from core.shapes import GroupShape, InstanceShape
+
+
+def style_targets(shapes) -> list:
+    """Formes feuilles à modifier (groupes aplatis, instances ignorées)."""
+    out = []
+    stack = list(reversed(shapes))
+    while stack:
+        s = stack.pop()
+        if isinstance(s, GroupShape):
+            stack.extend(reversed(s.children))
+        elif not isinstance(s, InstanceShape):
+            out.append(s)
+    return out
+
+
+class StyleInspector(QDockWidget):
+    PREVIEW_MS = 30   # debounce de l'aperçu
+    COMMIT_MS = 600   # validation automatique après inactivité (flèches, molette)
+
+    def __init__(self, canvas, commands, on_committed=None, parent=None):
+        super().__init__("Propriétés", parent)
+        self.canvas = canvas
+        self.commands = commands
+        self.on_committed = on_committed  # ex : rafraîchir les actions Annuler/Rétablir
+
+        # état du scrub en cours : (nom, cibles, anciennes valeurs)
+        self._scrub = None
+        self._pending = None
+        self._hold = False  # dialogue couleur ouvert : pas de validation auto
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(self.PREVIEW_MS)
+        self._preview_timer.timeout.connect(self._apply_preview)
+        self._commit_timer = QTimer(self)
+        self._commit_timer.setSingleShot(True)
+        self._commit_timer.setInterval(self.COMMIT_MS)
+        self._commit_timer.timeout.connect(self.commit)
+
+        self._build_ui()
+        canvas.selection_changed.connect(self.refresh)
+        self.refresh()
+
+    # ------------------------------------------------------------------
+    # UI
+    # ------------------------------------------------------------------
+    def _build_ui(self):
+        w = QWidget(self)
+        form = QFormLayout(w)
+
+        self._count = QLabel()
+        form.addRow("Sélection", self._count)
+
+        self._stroke_btn = QPushButton()
+        self._stroke_btn.clicked.connect(lambda: self._pick_color("stroke_color"))
+        form.addRow("Contour", self._stroke_btn)
+
+        self._fill_btn = QPushButton()
+        self._fill_btn.clicked.connect(lambda: self._pick_color("fill_color"))
+        form.addRow("Remplissage", self._fill_btn)
+
+        row = QHBoxLayout()
+        self._width_slider = QSlider(Qt.Orientation.Horizontal)
+        self._width_slider.setRange(0, 50)
+        self._width_spin = QSpinBox()
+        self._width_spin.setRange(0, 50)
+        row.addWidget(self._width_slider, 1)
+        row.addWidget(self._width_spin)
+        form.addRow("Épaisseur", row)
+
+        self._width_slider.valueChanged.connect(self._on_width_slider)
+        self._width_slider.sliderReleased.connect(self.commit)
+        self._width_spin.valueChanged.connect(self._on_width_spin)
+        self._width_spin.editingFinished.connect(self.commit)
+
+        self.setWidget(w)
+
+    @staticmethod
+    def _swatch(btn: QPushButton, color: str):
+        btn.setText(color or "Aucun")
+        btn.setStyleSheet(f"background: {color};" if color else "")
+
+    def refresh(self):
+        """Valide un éventuel scrub puis affiche les valeurs de la forme principale."""
+        self.commit()
+        targets = style_targets(self.canvas.selection)
+        self._count.setText(f"{len(targets)} forme(s)")
+        self.widget().setEnabled(bool(targets))
+        if not targets:
+            return
+        s = targets[-1]
+        self._swatch(self._stroke_btn, s.stroke_color)
+        self._swatch(self._fill_btn, s.fill_color)
+        for wdg in (self._width_slider, self._width_spin):
+            wdg.blockSignals(True)
+            wdg.setValue(int(s.stroke_width))
+            wdg.blockSignals(False)
+
+    # ------------------------------------------------------------------
+    # Aperçu (debounce) puis validation en une commande
+    # ------------------------------------------------------------------
+    def preview(self, name: str, value):
+        """Programme l'aperçu de 'name' = value sur toute la sélection."""
+        if self._scrub is not None and self._scrub[0] != name:
+            self.commit()
+        if self._scrub is None:
+            targets = style_targets(self.canvas.selection)
+            if not targets:
+                return
+            self._scrub = (name, targets, [getattr(s, name) for s in targets])
+        self._pending = value
+        self._preview_timer.start()
+        if not (self._hold or self._width_slider.isSliderDown()):
+            self._commit_timer.start()
+
+    def _apply_preview(self):
+        if self._scrub is None:
+            return
+        name, targets, _ = self._scrub
+        value = self._pending
+        for s in targets:
+            setattr(s, name, value)
+        self.canvas.update()  # un seul repaint par aperçu
+
+    def commit(self):
+        """Transforme le scrub en cours en une SetPropertyCommand."""
+        self._preview_timer.stop()
+        self._commit_timer.stop()
+        if self._scrub is None:
+            return
+        name, targets, old = self._scrub
+        self._scrub = None
+        if all(v == self._pending for v in old):
+            return
+        self.commands.push(SetPropertyCommand(targets, name, self._pending, old))
+        self.canvas.update()
+        if self.on_committed:
+            self.on_committed()
+
+    # ------------------------------------------------------------------
+    # Slots des widgets
+    # ------------------------------------------------------------------
+    def _on_width_slider(self, v: int):
+        self._width_spin.blockSignals(True)
+        self._width_spin.setValue(v)
+        self._width_spin.blockSignals(False)
+        self.preview("stroke_width", v)
+
+    def _on_width_spin(self, v: int):
+        self._width_slider.blockSignals(True)
+        self._width_slider.setValue(v)
+        self._width_slider.blockSignals(False)
+        self.preview("stroke_width", v)
+
+    def _pick_color(self, name: str):
+        """Dialogue couleur avec aperçu en direct ; Annuler restaure l'état initial."""
+        self.commit()
+        targets = style_targets(self.canvas.selection)
+        if not targets:
+            return
+        current = getattr(targets[-1], name) or "#FFFFFF"
+        dlg = QColorDialog(QColor(current), self)
+        dlg.currentColorChanged.connect(lambda c: self.preview(name, c.name().upper()))
+        self._hold = True
+        accepted = dlg.exec() == QColorDialog.DialogCode.Accepted
+        self._hold = False
+        if accepted:
+            self.preview(name, dlg.selectedColor().name().upper())
+            self.commit()
+        elif self._scrub is not None:
+            # restaure les anciennes valeurs sans rien empiler
+            self._preview_timer.stop()
+            _, targets, old = self._scrub
+            self._scrub = None
+            for s, v in zip(targets, old):
+                setattr(s, name, v)
+            self.canvas.update()
+        self.refresh()
@@ -7,15 +7,28 @@ from PyQt6.QtWidgets import (
     QMainWindow, QFileDialog, QTabWidget, QMessageBox, QToolBar
 )
 from PyQt6.QtGui import QKeySequence, QAction
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 from core.document import Document
 from core.io_json import save_document, load_document
+from core.chunk_store import ChunkStore, EXTENSION
+from core.export_svg import export_svg
+from core.images import adopt_hashes
+from core.import_svg import iter_svg_shapes
+from core.scripting import run_script
 from core.commands import CommandStack
+from core.shapes import ImageShape
+from core.diagnostics import (
+    TRACER, Budgets, enforce_budgets, memory_report, format_report, dump_report,
+)
 from ui.init_2d import Canvas2D
+from ui.init_3d import Preview3D
+from ui.inspectors import StyleInspector
 
 
 class MainWindow(QMainWindow):
+    BUDGET_DELAY_MS = 2000  # délai de vérification des budgets après une édition
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Mini-Illustrator")
@@ -24,13 +37,30 @@ class MainWindow(QMainWindow):
         # Modèle
         self.doc = Document()
         self.commands = CommandStack()
+        self._path = None   # fichier courant (Enregistrer)
+        self._store = None  # ChunkStore du projet .illus courant (sauvegardes incrémentales)
+        self.budgets = Budgets.from_env()
+        # éditions interactives : budgets vérifiés une fois au repos (parcours O(n))
+        self._budget_timer = QTimer(self)
+        self._budget_timer.setSingleShot(True)
+        self._budget_timer.setInterval(self.BUDGET_DELAY_MS)
+        self._budget_timer.timeout.connect(self._check_budgets)
 
         # Canvas 2D
         self.tabs = QTabWidget()
         self.canvas2d = Canvas2D(self.doc, self)
         self.tabs.addTab(self.canvas2d, "2D")
+
+        # Aperçu 3D (maillage recalculé à l'affichage de l'onglet)
+        self.preview3d = Preview3D(self.doc, self)
+        self.tabs.addTab(self.preview3d, "3D")
         self.setCentralWidget(self.tabs)
 
+        # Inspecteur de propriétés (édition groupée de la sélection)
+        self.inspector = StyleInspector(self.canvas2d, self.commands, self._refresh_edit_actions, self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.inspector)
+        self.canvas2d.edited.connect(self.on_canvas_edit)
+
         # Barre de statut
         self.statusBar().showMessage("Prêt")
 
@@ -40,6 +70,12 @@ class MainWindow(QMainWindow):
 
         self._refresh_edit_actions()
 
+    def closeEvent(self, ev):
+        self._budget_timer.stop()
+        self.canvas2d.shutdown()  # pool des tuiles, abonnements
+        self.preview3d.shutdown()
+        super().closeEvent(ev)
+
     # ------------------------------------------------------------------
     # MENU FICHIER / ÉDITION / VUE
     # ------------------------------------------------------------------
@@ -63,6 +99,20 @@ class MainWindow(QMainWindow):
         a_save_as.setShortcut(QKeySequence.StandardKey.SaveAs)
         a_save_as.triggered.connect(self.on_save_as)
 
+        m_file.addSeparator()
+        a_import_svg = m_file.addAction("Importer un SVG…")
+        a_import_svg.triggered.connect(self.on_import_svg)
+
+        a_import_image = m_file.addAction("Placer une image…")
+        a_import_image.triggered.connect(self.on_place_image)
+
+        a_export_svg = m_file.addAction("Exporter en SVG…")
+        a_export_svg.triggered.connect(self.on_export_svg)
+
+        m_file.addSeparator()
+        a_script = m_file.addAction("Exécuter un script…")
+        a_script.triggered.connect(self.on_run_script)
+
         # --- MENU ÉDITION ---
         m_edit = self.menuBar().addMenu("&Édition")
 
@@ -74,12 +124,48 @@ class MainWindow(QMainWindow):
         self.a_redo.setShortcut(QKeySequence.StandardKey.Redo)
         self.a_redo.triggered.connect(self.on_redo)
 
+        m_edit.addSeparator()
+        a_group = m_edit.addAction("Grouper")
+        a_group.setShortcut(QKeySequence("Ctrl+G"))
+        a_group.triggered.connect(lambda: self._traced("grouper", self.canvas2d.group_selection))
+
+        a_ungroup = m_edit.addAction("Dissocier")
+        a_ungroup.setShortcut(QKeySequence("Ctrl+Shift+G"))
+        a_ungroup.triggered.connect(lambda: self._traced("dissocier", self.canvas2d.ungroup_selection))
+
+        a_symbol = m_edit.addAction("Créer un symbole")
+        a_symbol.triggered.connect(lambda: self._traced("symbole", self.canvas2d.symbol_from_selection))
+
         # --- MENU VUE ---
         m_view = self.menuBar().addMenu("&Vue")
 
         a_go_2d = m_view.addAction("Basculer vers 2D")
         a_go_2d.triggered.connect(lambda: self.tabs.setCurrentIndex(0))
 
+        a_go_3d = m_view.addAction("Basculer vers 3D")
+        a_go_3d.triggered.connect(lambda: self.tabs.setCurrentIndex(1))
+        m_view.addAction(self.inspector.toggleViewAction())
+
+        m_view.addSeparator()
+        a_snap = m_view.addAction("Magnétisme")
+        a_snap.setCheckable(True)
+        a_snap.setChecked(self.canvas2d.snap_enabled)
+        a_snap.toggled.connect(lambda on: setattr(self.canvas2d, "snap_enabled", on))
+
+        a_tiles = m_view.addAction("Rendu par tuiles (multi-thread)")
+        a_tiles.setCheckable(True)
+        a_tiles.toggled.connect(self.canvas2d.set_tiled)
+
+        # --- MENU DIAGNOSTIC ---
+        m_diag = self.menuBar().addMenu("&Diagnostic")
+
+        a_memory = m_diag.addAction("Mémoire…")
+        a_memory.triggered.connect(self.on_memory_report)
+
+        a_trace = m_diag.addAction("Tracer les allocations (tracemalloc)")
+        a_trace.setCheckable(True)
+        a_trace.toggled.connect(TRACER.set_enabled)
+
     # ------------------------------------------------------------------
     # TOOLBAR (Étape 2)
     # ------------------------------------------------------------------
@@ -100,10 +186,14 @@ class MainWindow(QMainWindow):
         act_line = QAction("Ligne", self)
         act_line.triggered.connect(lambda: self.canvas2d.set_tool("line"))
 
+        act_text = QAction("Texte", self)
+        act_text.triggered.connect(lambda: self.canvas2d.set_tool("text"))
+
         tb.addAction(act_select)
         tb.addAction(act_rect)
         tb.addAction(act_ellipse)
         tb.addAction(act_line)
+        tb.addAction(act_text)
         tb.addSeparator()
 
         act_zoom_in = QAction("Zoom +", self)
@@ -123,54 +213,214 @@ class MainWindow(QMainWindow):
     # ------------------------------------------------------------------
     # LOGIQUE FICHIER
     # ------------------------------------------------------------------
+    FILE_FILTER = f"Projet Mini-Illustrator (*.json);;Projet découpé (*{EXTENSION})"
+
     def on_new(self):
         self.doc.clear()
+        self._path = self._store = None
         self.canvas2d.set_document(self.doc)
+        self.preview3d.set_document(self.doc)
+        self._reset_history()
         self.statusBar().showMessage("Nouveau document")
 
     def on_open(self):
         path, _ = QFileDialog.getOpenFileName(
-            self, "Ouvrir", filter="Projet Mini-Illustrator (*.json)"
+            self, "Ouvrir", filter="Projets Mini-Illustrator (*.json *" + EXTENSION + ")"
         )
         if not path:
             return
         try:
-            self.doc = load_document(path)
+            with TRACER.measure("chargement"):
+                if path.endswith(EXTENSION):
+                    store = ChunkStore(path)
+                    self.doc = store.load()
+                else:
+                    store = None
+                    self.doc = load_document(path)
+            self._path, self._store = path, store
             self.canvas2d.set_document(self.doc)
+            self.preview3d.set_document(self.doc)
+            self._reset_history()
             self.statusBar().showMessage(f"Ouvert : {path}")
+            self._check_budgets()
         except Exception as e:
             QMessageBox.critical(self, "Erreur d'ouverture", str(e))
 
     def on_save(self):
-        self.on_save_as()  # version simplifiée
+        if self._path is None:
+            self.on_save_as()
+        else:
+            self._save_to(self._path)
 
     def on_save_as(self):
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Enregistrer sous", filter="Projet Mini-Illustrator (*.json)"
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Enregistrer sous", filter=self.FILE_FILTER
         )
         if not path:
             return
+        if EXTENSION in selected and not path.endswith(EXTENSION):
+            path += EXTENSION
+        self._save_to(path)
+
+    def _save_to(self, path: str):
+        self.inspector.commit()
         try:
-            save_document(self.doc, path)
-            self.statusBar().showMessage(f"Enregistré : {path}")
+            with TRACER.measure("sauvegarde"):
+                if path.endswith(EXTENSION):
+                    # même store d'une sauvegarde à l'autre → seuls les blocs modifiés sont réécrits
+                    if self._store is None or self._store.path != path:
+                        self._store = ChunkStore(path)
+                    stats = self._store.save(self.doc)
+                    msg = f"Enregistré : {path} ({stats['encoded']}/{stats['chunks']} blocs réécrits)"
+                else:
+                    save_document(self.doc, path)
+                    msg = f"Enregistré : {path}"
+            self._path = path
+            self.statusBar().showMessage(msg)
+            self._check_budgets()
         except Exception as e:
             QMessageBox.critical(self, "Erreur d'enregistrement", str(e))
 
+    def on_import_svg(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Importer un SVG", filter="Image SVG (*.svg)"
+        )
+        if not path:
+            return
+        try:
+            n = 0
+            with TRACER.measure("import SVG"):
+                for shape in iter_svg_shapes(path):
+                    self.doc.add_shape(shape)
+                    n += 1
+            self.canvas2d.update()
+            self.statusBar().showMessage(f"Importé : {path} ({n} formes)")
+            self._check_budgets()
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'import", str(e))
+
+    IMAGE_FILTER = "Images (*.png *.jpg *.jpeg *.tif *.tiff *.bmp *.webp)"
+
+    def on_place_image(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Placer une image", filter=self.IMAGE_FILTER)
+        if not path:
+            return
+        try:
+            page = self.canvas2d.page_rect()
+            shape = ImageShape.from_file(path, max_side=max(page.width(), page.height()))
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'image", str(e))
+            return
+        # image de référence : placée sous le dessin
+        self.doc.shapes.insert(0, shape)
+        self.doc.shapes_changed()
+        adopt_hashes(self.doc, path)  # empreinte calculée sur le pool, recopiée à son arrivée
+        self.canvas2d.set_selection([shape])
+        self.statusBar().showMessage(f"Image placée : {path} (décodage en arrière-plan)")
+
+    def on_export_svg(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exporter en SVG", filter="Image SVG (*.svg)"
+        )
+        if not path:
+            return
+        try:
+            export_svg(self.doc, path)
+            self.statusBar().showMessage(f"Exporté : {path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'export", str(e))
+
+    def on_run_script(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Exécuter un script", filter="Script Python (*.py)"
+        )
+        if not path:
+            return
+        n0 = len(self.doc.shapes)
+        try:
+            with TRACER.measure("script"):
+                run_script(path, self.doc, self.commands)
+            self.statusBar().showMessage(
+                f"Script exécuté : {path} ({len(self.doc.shapes) - n0:+d} formes)")
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur de script", str(e))
+        # même en cas d'erreur : les opérations déjà faites sont affichées (et annulables)
+        self.canvas2d.set_selection([])
+        self._refresh_edit_actions()
+        self._check_budgets()  # opérations en masse : vérification immédiate
+
+    # ------------------------------------------------------------------
+    # DIAGNOSTIC MÉMOIRE
+    # ------------------------------------------------------------------
+    def _traced(self, label: str, action):
+        """Exécute une grosse édition (instantanés tracemalloc si activés)."""
+        with TRACER.measure(label):
+            action()
+        self._check_budgets()
+
+    def _check_budgets(self):
+        """Raccourcit l'historique / vide les caches si un budget est dépassé.
+        Appelé directement après chargement, import, sauvegarde et grosses
+        éditions ; les éditions interactives passent par _budget_timer."""
+        self._budget_timer.stop()
+        actions = enforce_budgets(self.doc, self.commands, self.budgets)
+        if actions:
+            self.statusBar().showMessage("Budget mémoire : " + " ; ".join(actions))
+            self.a_undo.setEnabled(self.commands.can_undo())
+
+    def on_memory_report(self):
+        report = memory_report(self.doc, self.commands, self.budgets)
+        box = QMessageBox(self)
+        box.setWindowTitle("Mémoire")
+        box.setText(format_report(report))
+        box.setStandardButtons(QMessageBox.StandardButton.Close | QMessageBox.StandardButton.Save)
+        box.button(QMessageBox.StandardButton.Save).setText("Exporter en JSON…")
+        if box.exec() != QMessageBox.StandardButton.Save:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exporter le rapport mémoire", filter="Rapport JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            dump_report(report, path)
+            self.statusBar().showMessage(f"Rapport exporté : {path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'export", str(e))
+
     # ------------------------------------------------------------------
     # ANNULER / RÉTABLIR
     # ------------------------------------------------------------------
+    def _reset_history(self):
+        """Après New / Open : l'historique visait l'ancien document.
+        Appelé après set_document (l'inspecteur y valide un éventuel aperçu)."""
+        self.commands.clear()
+        self._refresh_edit_actions()
+
     def _refresh_edit_actions(self):
+        self._budget_timer.start()  # relancé à chaque édition : une vérification au repos
         self.a_undo.setEnabled(self.commands.can_undo())
         self.a_redo.setEnabled(self.commands.can_redo())
 
+    def on_canvas_edit(self, cmd):
+        """Édition faite depuis le canvas (p. ex. texte) : une entrée d'undo."""
+        self.inspector.commit()
+        self.commands.push(cmd)
+        self._refresh_edit_actions()
+        self.canvas2d.update()
+
     def on_undo(self):
+        self.inspector.commit()  # un aperçu en cours devient d'abord une commande
         self.commands.undo()
         self._refresh_edit_actions()
+        self.inspector.refresh()
         self.canvas2d.update()
         self.statusBar().showMessage("Annuler")
 
     def on_redo(self):
+        self.inspector.commit()
         self.commands.redo()
         self._refresh_edit_actions()
+        self.inspector.refresh()
         self.canvas2d.update()
         self.statusBar().showMessage("Rétablir")
@@ -0,0 +1,60 @@
+"""
+Boîte de dialogue de saisie d'un texte (outil Texte, double-clic sur un texte).
+
+Renvoie les champs de core.shapes.TextShape : text, font_family, font_size, align.
+"""
+
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QDialog, QDialogButtonBox, QFormLayout, QPlainTextEdit, QFontComboBox,
+    QDoubleSpinBox, QComboBox,
+)
+
+from core.shapes import TEXT_ALIGNS
+
+ALIGN_LABELS = {"left": "Gauche", "center": "Centré", "right": "Droite"}
+
+
+class TextDialog(QDialog):
+    def __init__(self, text="", font_family="Inter", font_size=14.0, align="left", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Texte")
+        form = QFormLayout(self)
+
+        self._text = QPlainTextEdit(text)
+        form.addRow(self._text)
+
+        self._font = QFontComboBox()
+        self._font.setCurrentFont(QFont(font_family))
+        form.addRow("Police", self._font)
+
+        self._size = QDoubleSpinBox()
+        self._size.setRange(1, 999)
+        self._size.setValue(font_size)
+        form.addRow("Taille", self._size)
+
+        self._align = QComboBox()
+        for a in TEXT_ALIGNS:
+            self._align.addItem(ALIGN_LABELS[a], a)
+        self._align.setCurrentIndex(max(0, self._align.findData(align)))
+        form.addRow("Alignement", self._align)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok
+                                   | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    def values(self) -> dict:
+        return {
+            "text": self._text.toPlainText(),
+            "font_family": self._font.currentFont().family(),
+            "font_size": self._size.value(),
+            "align": self._align.currentData(),
+        }
+
+    @classmethod
+    def ask(cls, parent, **initial):
+        """Ouvre la boîte (modale) ; renvoie values() ou None si annulée."""
+        dlg = cls(parent=parent, **initial)
+        return dlg.values() if dlg.exec() == QDialog.DialogCode.Accepted else None
@@ -0,0 +1,330 @@
+"""
+Rendu 2D par tuiles sur un pool de threads (mode optionnel de Canvas2D).
+
+- L'espace « canvas zoomé » (coords canvas × zoom) est découpé en tuiles de
+  TILE px ; chaque tuile est rastérisée dans une QImage par un thread du pool
+  (QPainter sur QImage = moteur raster, utilisable hors du thread GUI).
+- Cache LRU : (zoom, tuile i, tuile j) → (version, image), pour le zoom
+  courant seulement. Le pan ne change que l'offset : les tuiles déjà rendues
+  sont réutilisées telles quelles.
+- Invalidation par région : une forme modifiée (notification de
+  core.shapes.add_listener) ne périme que les tuiles touchées par son
+  ancienne et sa nouvelle bbox. Une tuile est fraîche si sa version est
+  postérieure à sa dernière invalidation (et à la dernière invalidation
+  totale : liste du document changée, symbole modifié, invalidate()).
+- Tant qu'une tuile fraîche n'est pas arrivée, on affiche l'ancienne version
+  de la tuile, sinon l'image composée précédente recalée sur la vue courante
+  (après un zoom, par exemple).
+- Les formes de premier niveau sont réparties une fois par zoom dans les
+  cases des tuiles qu'elles touchent, puis déplacées de case en case quand
+  elles bougent : une tuile ne parcourt que ses formes, pas tout le document.
+- Le fond, la page, les cadres de sélection et l'overlay des outils restent
+  dessinés par Canvas2D sur le thread GUI.
+
+Threads : les workers ne voient jamais les formes vivantes. Le classement
+et les instantanés (Shape.snapshot : copie figée dont la géométrie, la mise
+en page des textes et le QPicture des symboles sont calculés sur le thread
+GUI) sont faits dans paint() ; un worker ne fait que dessiner des
+instantanés. Un instantané est gardé par forme de premier niveau jusqu'à sa
+prochaine modification.
+"""
+
+import math
+import os
+from bisect import insort
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QObject, QPointF, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QTransform
+
+from core.diagnostics import register_cache, unregister_cache
+from core.shapes import Shape, SymbolDef, add_listener, remove_listener, draw_shapes, uid
+
+
+@dataclass
+class _Bins:
+    """Répartition des formes de premier niveau par tuile (un zoom donné)."""
+    zoom: float
+    full_at: int                 # invalidation totale à laquelle elle correspond
+    shapes: list                 # instantané de l'ordre Z
+    index: dict                  # uid → rang dans shapes
+    bounds: list                 # bbox de chaque forme lors de son classement
+    cells: dict                  # (i, j) → rangs triés (ordre Z)
+    wide: list                   # rangs des formes dessinées dans toutes les tuiles
+
+
+class TileRenderer(QObject):
+    TILE = 256        # côté d'une tuile (pixels écran)
+    MAX_TILES = 512   # tuiles gardées en cache (≈ 128 Mo en ARGB32)
+    WIDE = 64         # forme couvrant plus de WIDE tuiles (en largeur ou hauteur) : dessinée partout
+    MAX_CHANGED = 2000  # au-delà (script, undo massif) : invalidation totale
+
+    updated = pyqtSignal()                      # une tuile est arrivée → repaint
+    _rendered = pyqtSignal(object, int, object)  # (clé, version, image|None), worker → GUI
+
+    def __init__(self, workers=None, parent=None):
+        super().__init__(parent)
+        self.version = 0
+        self._full_at = 0         # version de la dernière invalidation totale
+        self._dirty_at: dict = {}  # (zoom, i, j) → version de la dernière invalidation
+        self._full = True         # invalidation totale à appliquer au prochain paint
+        self._changed: dict = {}  # uid → forme de premier niveau modifiée
+        self._zoom = None
+        self._pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4,
+                                        thread_name_prefix="tile")
+        self._tiles: OrderedDict = OrderedDict()  # (zoom, i, j) → (version, QImage)
+        self._pending: dict = {}                  # (zoom, i, j) → version demandée
+        self._snaps: dict = {}                    # uid → instantané de la forme de premier niveau
+        self._layers = None  # deux images composées (courante / précédente), réallouées au resize
+        self._frame = None   # (image composée, zoom, offset_x, offset_y) précédente
+        self._bins = None
+        self._rendered.connect(self._on_rendered)  # connexion en file (threads différents)
+        add_listener(self._on_change)
+        register_cache("2d.tiles", self._cache_size, self.clear)
+
+    # --------- invalidation ---------
+    def _on_change(self, obj, name):
+        if not isinstance(obj, Shape):
+            self._full = True  # liste d'un document modifiée
+            return
+        node = obj
+        while node.parent is not None:
+            node = node.parent
+        if isinstance(node, SymbolDef):
+            self._full = True  # contenu d'un symbole : toutes ses instances
+            return
+        self._changed[uid(node)] = node
+        self._snaps.pop(uid(node), None)
+
+    def invalidate(self):
+        """Toutes les tuiles deviennent périmées (restent affichées en attendant)."""
+        self._full = True
+
+    def _fresh_from(self, key) -> int:
+        """Version minimale d'une tuile fraîche."""
+        return max(self._full_at, self._dirty_at.get(key, 0))
+
+    def clear(self):
+        self._tiles.clear()
+        self._dirty_at.clear()
+        self._snaps.clear()
+        self._layers = self._frame = None
+        self._bins = None
+
+    def _cache_size(self):
+        layers = sum(img.sizeInBytes() for img in self._layers) if self._layers else 0
+        return len(self._tiles), layers + sum(img.sizeInBytes() for _, img in self._tiles.values())
+
+    def shutdown(self):
+        """Arrête le pool et se désabonne (notifications, diagnostic)."""
+        remove_listener(self._on_change)
+        unregister_cache("2d.tiles")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.clear()
+
+    # --------- application des modifications (thread GUI, début de paint) ---------
+    def _flush(self):
+        if not self._full and not self._changed:
+            return
+        self.version += 1
+        if self._full or len(self._changed) > self.MAX_CHANGED:
+            self._full = False
+            self._changed.clear()
+            self._full_at = self.version
+            self._dirty_at.clear()
+            self._snaps.clear()
+            self._bins = None
+            return
+        changed = list(self._changed.values())
+        self._changed.clear()
+        regions = []
+        b = self._bins
+        if b is None:
+            return  # pas encore classées : les tuiles à venir verront l'état courant
+        for s in changed:
+            n = b.index.get(uid(s))
+            if n is None:
+                continue  # forme d'un autre document
+            old, new = b.bounds[n], s.bounds()
+            regions.append(old)
+            if new != old:
+                regions.append(new)
+                self._unbin(b, n, old)
+                self._bin(b, n, new)
+                b.bounds[n] = new
+        live = set(self._tiles) | set(self._pending)
+        for r in regions:
+            for key in self._keys_in(r, live):
+                self._dirty_at[key] = self.version
+
+    def _keys_in(self, r, live):
+        """Clés vivantes (en cache ou en cours) des tuiles touchées par la bbox r."""
+        z, t = self._zoom, self.TILE
+        m = 1 / z  # marge d'un pixel (anticrénelage)
+        i0, i1 = math.floor((r[0] - m) * z / t), math.floor((r[2] + m) * z / t)
+        j0, j1 = math.floor((r[1] - m) * z / t), math.floor((r[3] + m) * z / t)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(live):
+            return [k for k in live if i0 <= k[1] <= i1 and j0 <= k[2] <= j1]
+        return [k for k in ((z, i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+                if k in live]
+
+    # --------- répartition des formes par tuile ---------
+    def _cells(self, zoom, bounds):
+        k = zoom / self.TILE
+        x0, y0, x1, y1 = bounds
+        return math.floor(x0 * k), math.floor(x1 * k), math.floor(y0 * k), math.floor(y1 * k)
+
+    def _bin(self, b: _Bins, n: int, bounds):
+        i0, i1, j0, j1 = self._cells(b.zoom, bounds)
+        if i1 - i0 > self.WIDE or j1 - j0 > self.WIDE:
+            insort(b.wide, n)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = b.cells.get((i, j))
+                if cell is None:
+                    b.cells[(i, j)] = [n]
+                else:
+                    insort(cell, n)
+
+    def _unbin(self, b: _Bins, n: int, bounds):
+        i0, i1, j0, j1 = self._cells(b.zoom, bounds)
+        if i1 - i0 > self.WIDE or j1 - j0 > self.WIDE:
+            b.wide.remove(n)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = b.cells[(i, j)]
+                cell.remove(n)
+                if not cell:
+                    del b.cells[(i, j)]
+
+    def _bins_for(self, doc, zoom: float) -> _Bins:
+        """Classement des formes pour ce zoom (thread GUI), refait après une invalidation totale."""
+        b = self._bins
+        if b is None or b.zoom != zoom or b.full_at != self._full_at:
+            shapes = list(doc.shapes)
+            b = self._bins = _Bins(zoom, self._full_at, shapes,
+                                   {uid(s): n for n, s in enumerate(shapes)},
+                                   [s.bounds() for s in shapes], {}, [])
+            for n, bounds in enumerate(b.bounds):
+                self._bin(b, n, bounds)
+        return b
+
+    def _cell_for(self, b: _Bins, i: int, j: int) -> list:
+        """Instantanés des formes de la tuile (i, j), dans l'ordre Z (thread GUI)."""
+        cell = b.cells.get((i, j), [])
+        cell = sorted(cell + b.wide) if b.wide else cell  # ordre Z du document
+        snaps = self._snaps
+        out = []
+        for n in cell:
+            s = b.shapes[n]
+            snap = snaps.get(uid(s))
+            if snap is None:
+                snap = snaps[uid(s)] = s.snapshot()
+            out.append(snap)
+        return out
+
+    # --------- rendu d'une tuile (thread du pool) ---------
+    def _render(self, shapes: list, zoom: float, i: int, j: int, version: int):
+        """Dessine des instantanés (Shape.snapshot) : aucune forme vivante lue ici."""
+        key = (zoom, i, j)
+        img = None
+        try:
+            if version < self._fresh_from(key):
+                return  # déjà périmée avant d'avoir commencé
+            t = self.TILE
+            img = QImage(t, t, QImage.Format.Format_ARGB32_Premultiplied)
+            img.fill(0)
+            p = QPainter(img)
+            p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+            p.translate(-i * t, -j * t)
+            p.scale(zoom, zoom)
+            m = 1 / zoom  # marge d'un pixel (anticrénelage)
+            view = (i * t / zoom - m, j * t / zoom - m, (i + 1) * t / zoom + m, (j + 1) * t / zoom + m)
+            draw_shapes(shapes, p, view)
+            p.end()
+        except Exception as e:
+            print(f"Erreur rendu tuile {key} : {e}")
+            img = None
+        finally:
+            self._rendered.emit(key, version, img)
+
+    # --------- réception (thread GUI) ---------
+    def _on_rendered(self, key, version, img):
+        if self._pending.get(key) == version:
+            del self._pending[key]
+        if img is None or key[0] != self._zoom:
+            return
+        old = self._tiles.get(key)
+        if old is not None and old[0] > version:
+            return  # une version plus récente est déjà arrivée
+        self._tiles[key] = (version, img)
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.MAX_TILES:
+            k, _ = self._tiles.popitem(last=False)
+            if k not in self._pending:
+                self._dirty_at.pop(k, None)
+        self.updated.emit()
+
+    # --------- composition (thread GUI) ---------
+    def paint(self, p: QPainter, doc, zoom: float, ox: float, oy: float, width: int, height: int):
+        """Compose les tuiles visibles dans p (coords widget) et demande les manquantes."""
+        t = self.TILE
+        zoom_key = round(zoom, 9)
+        if zoom_key != self._zoom:
+            # le cache ne garde que le zoom courant (l'image précédente sert de fond)
+            self._zoom = zoom_key
+            self._tiles.clear()
+            self._dirty_at.clear()
+            self._full = True
+        self._flush()
+        bins = self._bins_for(doc, zoom_key)
+        i0, i1 = math.floor(-ox / t), math.floor((width - ox) / t)
+        j0, j1 = math.floor(-oy / t), math.floor((height - oy) / t)
+
+        # deux tampons alternés : le précédent sert de fond recalé (self._frame)
+        if self._layers is None or self._layers[0].size() != QSize(width, height):
+            self._layers = [QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+                            for _ in range(2)]
+        self._layers.reverse()
+        layer = self._layers[0]
+        layer.fill(0)
+        lp = QPainter(layer)
+        missing = False
+        tiles = []
+        # du centre vers les bords : les tuiles centrales sont rendues d'abord
+        ci, cj = (i0 + i1) / 2, (j0 + j1) / 2
+        order = sorted(((i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)),
+                       key=lambda ij: (ij[0] - ci) ** 2 + (ij[1] - cj) ** 2)
+        for i, j in order:
+            key = (zoom_key, i, j)
+            entry = self._tiles.get(key)
+            fresh_from = self._fresh_from(key)
+            if (entry is None or entry[0] < fresh_from) and self._pending.get(key, -1) < fresh_from:
+                self._pending[key] = self.version
+                self._pool.submit(self._render, self._cell_for(bins, i, j), zoom_key, i, j,
+                                  self.version)
+            if entry is None:
+                missing = True
+            else:
+                self._tiles.move_to_end(key)
+                tiles.append((i, j, entry[1]))
+
+        if missing and self._frame is not None:
+            # image précédente recalée (zoom/pan) en attendant les tuiles
+            img, z0, ox0, oy0 = self._frame
+            k = zoom / z0
+            lp.save()
+            lp.setTransform(QTransform(k, 0, 0, k, ox - ox0 * k, oy - oy0 * k))
+            lp.drawImage(0, 0, img)
+            lp.restore()
+        # une tuile remplace entièrement ce qu'il y a dessous (transparence comprise)
+        lp.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        for i, j, img in tiles:
+            lp.drawImage(QPointF(round(ox + i * t), round(oy + j * t)), img)
+        lp.end()
+        self._frame = (layer, zoom, ox, oy)
+        p.drawImage(0, 0, layer)
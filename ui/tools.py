@@ -1,76 +1,141 @@
 """
 Outils de dessin/édition pour le Canvas2D.
 
-Chaque outil expose 4 méthodes utilisées par Canvas2D :
+Chaque outil expose 5 méthodes utilisées par Canvas2D :
 - on_mouse_press(pos, event)
 - on_mouse_move(pos, event)
 - on_mouse_release(pos, event)
+- on_double_click(pos, event)
 - draw_overlay(painter) : dessine les aides visuelles (poignées, rect de création…)
 
 Notes :
 - 'pos' est toujours en coordonnées CANVAS (après transformation pan/zoom).
 - L'outil a accès à 'canvas.doc' (Document) et 'canvas' pour demander un rafraîchissement.
+- Magnétisme : l'index (core.snap.SnapIndex) est construit au press, puis
+  interrogé en O(log n) à chaque move ; les guides sont dessinés dans l'overlay.
 """
 
 from dataclasses import dataclass
 from typing import Optional, Tuple
 from PyQt6.QtCore import QRectF, QPointF, Qt
 from PyQt6.QtGui import QPen, QBrush, QColor
-from core.shapes import RectShape, EllipseShape, LineShape, Shape
+from core.commands import SetValuesCommand
+from core.shapes import (
+    RectShape, EllipseShape, LineShape, TextShape, TransformShape, Shape, bounds_intersect,
+)
+from core.snap import SnapIndex, snap_coords
+from ui.text_dialog import TextDialog
+
+TEXT_FIELDS = ("text", "font_family", "font_size", "align")
 
 
 # ------------------ OUTIL DE BASE ------------------
 class Tool:
     def __init__(self, canvas):
         self.canvas = canvas
+        self._snap: Optional[SnapIndex] = None
+        self._guides: list[tuple[str, float]] = []
 
     # APIs appelées par Canvas2D
     def on_mouse_press(self, pos, ev): ...
     def on_mouse_move(self, pos, ev): ...
     def on_mouse_release(self, pos, ev): ...
+    def on_double_click(self, pos, ev): ...
     def draw_overlay(self, p): ...
 
+    # --------- magnétisme ---------
+    def _begin_snap(self, exclude=()):
+        """Construit l'index de magnétisme pour la durée du geste."""
+        self._guides = []
+        if not self.canvas.snap_enabled:
+            self._snap = None
+            return
+        page = self.canvas.page_rect()
+        self._snap = SnapIndex.from_document(self.canvas.doc, page.width(), page.height(), exclude)
+
+    def _end_snap(self):
+        self._snap = None
+        self._guides = []
+
+    def _snap_point(self, pos: QPointF) -> QPointF:
+        """Accroche un point (création / poignée) et mémorise les guides."""
+        if self._snap is None:
+            return QPointF(pos)
+        x, y, self._guides = self._snap.snap_point(pos.x(), pos.y(), self.canvas.snap_tolerance())
+        return QPointF(x, y)
+
+    def _snap_offset(self, xs, ys) -> Tuple[float, float]:
+        """Décalage qui aligne un des points candidats (déplacement)."""
+        if self._snap is None:
+            return 0.0, 0.0
+        dx, dy, self._guides = self._snap.snap_offset(xs, ys, self.canvas.snap_tolerance())
+        return dx, dy
+
+    def _draw_guides(self, p):
+        """Guides de magnétisme sur toute la zone visible."""
+        if not self._guides:
+            return
+        view = self.canvas.visible_canvas_rect()
+        p.save()
+        p.setPen(QPen(QColor("#FF2D95"), 0))  # largeur 0 = trait cosmétique (1 px écran)
+        for kind, v in self._guides:
+            if kind == "v":
+                p.drawLine(QPointF(v, view.top()), QPointF(v, view.bottom()))
+            else:
+                p.drawLine(QPointF(view.left(), v), QPointF(view.right(), v))
+        p.restore()
+
+
+# ------------------ CADRES DE SÉLECTION ------------------
+def draw_selection(p, shapes):
+    """Cadres pointillés de la sélection (overlay du Canvas2D, thread GUI :
+    jamais dans les formes ni dans les tuiles)."""
+    if not shapes:
+        return
+    p.save()
+    p.setPen(QPen(QColor("#00A2FF"), 1, Qt.PenStyle.DashLine))
+    p.setBrush(QBrush())
+    for s in shapes:
+        if isinstance(s, LineShape):
+            p.drawLine(QPointF(s.x, s.y), QPointF(s.x + s.w, s.y + s.h))
+        elif isinstance(s, TransformShape):
+            x0, y0, x1, y1 = s.bounds()
+            p.drawRect(QRectF(x0, y0, x1 - x0, y1 - y0))
+        else:
+            p.drawRect(s.qrect())
+    p.restore()
+
 
 # ------------------ OUTIL SELECTION ------------------
 class SelectTool(Tool):
     """
-    - Clic sur une forme → sélection.
-    - Drag sur la forme → déplacement.
-    - Drag sur une poignée → redimension.
-    - Clic vide → désélection.
-    - Suppr (géré dans Canvas2D.keyPressEvent) → supprime la forme sélectionnée.
+    - Clic sur une forme → sélection (Shift+clic → ajoute/retire).
+    - Drag sur la forme → déplacement de toute la sélection.
+    - Drag sur une poignée → redimension (sélection unique, hors groupe/instance).
+    - Clic vide → désélection ; drag vide → rectangle de sélection.
+    - Double-clic sur un texte → édition (une commande, via Canvas2D.edited).
+    - Suppr (géré dans Canvas2D.keyPressEvent) → supprime la sélection.
     """
 
     HANDLE_SIZE = 8  # taille carrés bleus
+    HIT_TOL = 6.0    # tolérance de clic (lignes)
 
     def __init__(self, canvas):
         super().__init__(canvas)
         self._dragging = False
         self._resizing = False
         self._drag_start = QPointF()
-        self._orig = QPointF()     # position d'origine pour déplacement
+        self._orig = []            # [(forme, x, y)] d'origine pour déplacement
+        self._orig_coords = None   # coords accrochables d'origine de la sélection (xs, ys)
         self._resize_handle = -1   # index de poignée
+        self._band_start = QPointF()
+        self._band: Optional[QRectF] = None  # rectangle de sélection
+        self._grab_offset = QPointF()  # poignée - curseur (pour accrocher la poignée elle-même)
 
     # --------- utilitaires poignée ---------
     def _handles_for(self, s: Shape) -> list[QRectF]:
-        """Retourne les 4 poignées (coins) pour Rect/Ellipse, 2 pour Line."""
-        hs = self.HANDLE_SIZE
-        if isinstance(s, LineShape):
-            p1 = QPointF(s.x, s.y)
-            p2 = QPointF(s.x + s.w, s.y + s.h)
-            return [
-                QRectF(p1.x() - hs/2, p1.y() - hs/2, hs, hs),
-                QRectF(p2.x() - hs/2, p2.y() - hs/2, hs, hs),
-            ]
-        else:
-            # coins du bounding box
-            x, y, w, h = s.x, s.y, s.w, s.h
-            return [
-                QRectF(x - hs/2,       y - hs/2,       hs, hs),           # NW
-                QRectF(x + w - hs/2,   y - hs/2,       hs, hs),           # NE
-                QRectF(x + w - hs/2,   y + h - hs/2,   hs, hs),           # SE
-                QRectF(x - hs/2,       y + h - hs/2,   hs, hs),           # SW
-            ]
+        """Poignées (en cache sur la forme) : 4 coins pour Rect/Ellipse, 2 pour Line."""
+        return s.handle_rects(self.HANDLE_SIZE)
 
     def _hit_handle(self, s: Shape, pos: QPointF) -> int:
         """Retourne l'index de la poignée sous la souris, sinon -1."""
@@ -80,56 +145,73 @@ class SelectTool(Tool):
         return -1
 
     def _hit_shape(self, pos: QPointF) -> Optional[Shape]:
-        """Test très simple : bbox des Rect/Ellipse et distance pour les lignes."""
+        """Forme de premier niveau sous le curseur (un groupe est renvoyé entier).
+        La bbox en cache de chaque nœud permet de sauter les sous-arbres."""
+        px, py, tol = pos.x(), pos.y(), self.HIT_TOL
         for s in reversed(self.canvas.doc.shapes):  # du haut vers le bas
-            if isinstance(s, LineShape):
-                # distance point-segment (tolérance 6 px)
-                import math
-                ax, ay = s.x, s.y
-                bx, by = s.x + s.w, s.y + s.h
-                px, py = pos.x(), pos.y()
-                # projection
-                abx, aby = bx - ax, by - ay
-                ab2 = abx*abx + aby*aby or 1.0
-                t = max(0.0, min(1.0, ((px-ax)*abx + (py-ay)*aby) / ab2))
-                cx, cy = ax + t*abx, ay + t*aby
-                d = math.hypot(px - cx, py - cy)
-                if d <= 6.0:
-                    return s
-            else:
-                r = QRectF(s.x, s.y, s.w, s.h).normalized()
-                if r.contains(pos):
-                    return s
+            b = s.bounds()
+            if not (b[0] - tol <= px <= b[2] + tol and b[1] - tol <= py <= b[3] + tol):
+                continue
+            if s.hit(px, py, tol):
+                return s
         return None
 
+    def _selection_coords(self):
+        """Coordonnées accrochables de la sélection, même géométrie que
+        SnapIndex (snap_coords) : extrémités d'une ligne seule, sinon bords et
+        centre de l'union des formes."""
+        sel = self.canvas.selection
+        if len(sel) == 1:
+            return snap_coords(sel[0])
+        cs = [snap_coords(sh) for sh in sel]
+        x0, x1 = min(min(xs) for xs, _ in cs), max(max(xs) for xs, _ in cs)
+        y0, y1 = min(min(ys) for _, ys in cs), max(max(ys) for _, ys in cs)
+        return [x0, (x0 + x1) / 2, x1], [y0, (y0 + y1) / 2, y1]
+
     # --------- évènements souris ---------
     def on_mouse_press(self, pos, ev):
         s = self.canvas.selected
-        if s:
+        if s and len(self.canvas.selection) == 1 and not isinstance(s, TransformShape):
             idx = self._hit_handle(s, pos)
             if idx >= 0:
                 # démarrage redimension
                 self._resizing = True
                 self._resize_handle = idx
                 self._drag_start = QPointF(pos)
+                self._grab_offset = QPointF(*s.handle_points()[idx]) - pos
+                self._begin_snap(exclude=(s,))
                 return
 
         # sinon, test hit shape pour sélection/déplacement
         target = self._hit_shape(pos)
-        # mettre à jour l’état sélection
-        for sh in self.canvas.doc.shapes:
-            sh.selected = (sh is target)
-        self.canvas.selected = target
-        self.canvas.update()
+        shift = bool(ev.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+        sel = self.canvas.selection
+        if shift:
+            # Shift → ajoute/retire de la sélection, sans déplacement
+            if target:
+                self.canvas.set_selection([sh for sh in sel if sh is not target]
+                                          if target.selected else sel + [target])
+            return
+        if target is None:
+            # clic vide → désélection + rectangle de sélection
+            self.canvas.set_selection([])
+            self._band_start = QPointF(pos)
+            self._band = QRectF(pos, pos)
+            return
+        if not target.selected:
+            self.canvas.set_selection([target])
 
-        if target:
-            self._dragging = True
-            self._drag_start = QPointF(pos)
-            self._orig = QPointF(target.x, target.y)
+        self._dragging = True
+        self._drag_start = QPointF(pos)
+        self._orig = [(sh, sh.x, sh.y) for sh in self.canvas.selection]
+        self._orig_coords = self._selection_coords()
+        self._begin_snap(exclude=self.canvas.selection)
 
     def on_mouse_move(self, pos, ev):
         s = self.canvas.selected
         if self._resizing and s:
+            # on accroche la poignée (et non le curseur), puis on revient au curseur
+            pos = self._snap_point(pos + self._grab_offset) - self._grab_offset
             dx = pos.x() - self._drag_start.x()
             dy = pos.y() - self._drag_start.y()
             self._apply_resize(s, dx, dy, ev)
@@ -137,18 +219,48 @@ class SelectTool(Tool):
             self.canvas.update()
             return
 
+        if self._band is not None:
+            self._band = QRectF(self._band_start, pos)
+            self.canvas.update()
+            return
+
         if self._dragging and s:
-            # déplacement
+            # déplacement (un groupe = une seule translation, enfants intacts)
             dx = pos.x() - self._drag_start.x()
             dy = pos.y() - self._drag_start.y()
-            s.x = self._orig.x() + dx
-            s.y = self._orig.y() + dy
+            xs, ys = self._orig_coords
+            sx, sy = self._snap_offset([x + dx for x in xs], [y + dy for y in ys])
+            for sh, ox, oy in self._orig:
+                sh.x = ox + dx + sx
+                sh.y = oy + dy + sy
             self.canvas.update()
 
     def on_mouse_release(self, pos, ev):
+        if self._band is not None:
+            r = self._band.normalized()
+            band = (r.left(), r.top(), r.right(), r.bottom())
+            self.canvas.set_selection([sh for sh in self.canvas.doc.shapes
+                                       if bounds_intersect(sh.bounds(), band)])
+            self._band = None
         self._dragging = False
         self._resizing = False
         self._resize_handle = -1
+        self._orig = []
+        self._end_snap()
+        self.canvas.update()
+
+    def on_double_click(self, pos, ev):
+        s = self._hit_shape(pos)
+        if not isinstance(s, TextShape):
+            return
+        values = TextDialog.ask(self.canvas, **{n: getattr(s, n) for n in TEXT_FIELDS})
+        if values is None:
+            return
+        row = [values[n] for n in TEXT_FIELDS]
+        # la boîte grandit si le nouveau texte déborde (même commande → un seul undo)
+        probe = TextShape(s.x, s.y, s.w, s.h, **values)
+        probe.fit_height()
+        self.canvas.edited.emit(SetValuesCommand([s], TEXT_FIELDS + ("h",), [row + [probe.h]]))
 
     # --------- resize selon poignée ---------
     def _apply_resize(self, s: Shape, dx: float, dy: float, ev):
@@ -194,23 +306,23 @@ class SelectTool(Tool):
 
     # --------- overlay (poignées) ---------
     def draw_overlay(self, p):
+        self._draw_guides(p)
+        if self._band is not None:
+            p.save()
+            p.setPen(QPen(QColor("#00A2FF"), 0, Qt.PenStyle.DashLine))
+            p.setBrush(QBrush(QColor(0, 162, 255, 30)))
+            p.drawRect(self._band)
+            p.restore()
+        # carrés bleus (sélection unique seulement ; cadres : draw_selection)
+        sel = self.canvas.selection
         s = self.canvas.selected
-        if not s:
-            return
-        p.save()
-        p.setPen(QPen(QColor("#00A2FF"), 1, Qt.PenStyle.DashLine))
-        p.setBrush(QBrush())
-        if isinstance(s, LineShape):
-            p.drawLine(s.x, s.y, s.x + s.w, s.y + s.h)
-        else:
-            r = QRectF(s.x, s.y, s.w, s.h).normalized()
-            p.drawRect(r)
-        # carrés bleus
-        p.setBrush(QBrush(QColor("#00A2FF")))
-        p.setPen(Qt.PenStyle.NoPen)
-        for r in self._handles_for(s):
-            p.drawRect(r)
-        p.restore()
+        if len(sel) == 1 and not isinstance(s, TransformShape):
+            p.save()
+            p.setBrush(QBrush(QColor("#00A2FF")))
+            p.setPen(Qt.PenStyle.NoPen)
+            for r in self._handles_for(s):
+                p.drawRect(r)
+            p.restore()
 
 
 # ------------------ OUTIL RECT ------------------
@@ -221,14 +333,15 @@ class RectTool(Tool):
         self._preview_rect: Optional[QRectF] = None
 
     def on_mouse_press(self, pos, ev):
-        self._start = QPointF(pos)
+        self._begin_snap()
+        self._start = self._snap_point(pos)
         self._preview_rect = QRectF(self._start, self._start)
         self.canvas.update()
 
     def on_mouse_move(self, pos, ev):
         if not self._start:
             return
-        r = QRectF(self._start, pos)
+        r = QRectF(self._start, self._snap_point(pos))
         # Shift → carré
         if ev.modifiers() & Qt.KeyboardModifier.ShiftModifier:
             side = min(abs(r.width()), abs(r.height()))
@@ -246,9 +359,11 @@ class RectTool(Tool):
         self.canvas.doc.add_shape(shape)
         self._start = None
         self._preview_rect = None
+        self._end_snap()
         self.canvas.update()
 
     def draw_overlay(self, p):
+        self._draw_guides(p)
         if not self._preview_rect:
             return
         p.save()
@@ -270,9 +385,11 @@ class EllipseTool(RectTool):
         self.canvas.doc.add_shape(shape)
         self._start = None
         self._preview_rect = None
+        self._end_snap()
         self.canvas.update()
 
     def draw_overlay(self, p):
+        self._draw_guides(p)
         if not self._preview_rect:
             return
         p.save()
@@ -290,13 +407,15 @@ class LineTool(Tool):
         self._current: Optional[QPointF] = None
 
     def on_mouse_press(self, pos, ev):
-        self._start = QPointF(pos)
-        self._current = QPointF(pos)
+        self._begin_snap()
+        self._start = self._snap_point(pos)
+        self._current = QPointF(self._start)
         self.canvas.update()
 
     def on_mouse_move(self, pos, ev):
         if not self._start:
             return
+        pos = self._snap_point(pos)
         x, y = pos.x(), pos.y()
         # Option : contraindre avec Shift à horizontale/verticale
         if ev.modifiers() & Qt.KeyboardModifier.ShiftModifier:
@@ -319,11 +438,48 @@ class LineTool(Tool):
         self.canvas.doc.add_shape(shape)
         self._start = None
         self._current = None
+        self._end_snap()
         self.canvas.update()
 
     def draw_overlay(self, p):
+        self._draw_guides(p)
         if self._start and self._current:
             p.save()
             p.setPen(QPen(QColor("#AA00FF"), 1, Qt.PenStyle.DashLine))
             p.drawLine(self._start, self._current)
             p.restore()
+
+
+# ------------------ OUTIL TEXTE ------------------
+class TextTool(RectTool):
+    """Drag → boîte du texte (clic simple → boîte de DEFAULT_W), puis saisie ;
+    la hauteur s'ajuste au texte."""
+    DEFAULT_W = 200.0
+    MIN_W = 8.0
+
+    def on_mouse_release(self, pos, ev):
+        if not self._start:
+            return
+        r = self._preview_rect.normalized()
+        self._start = None
+        self._preview_rect = None
+        self._end_snap()
+        self.canvas.update()
+        w = r.width() if r.width() >= self.MIN_W else self.DEFAULT_W
+        values = TextDialog.ask(self.canvas)
+        if not values or not values["text"]:
+            return
+        shape = TextShape(r.x(), r.y(), w, r.height(), **values)
+        shape.fit_height()
+        self.canvas.doc.add_shape(shape)
+        self.canvas.set_selection([shape])
+
+    def draw_overlay(self, p):
+        self._draw_guides(p)
+        if not self._preview_rect:
+            return
+        p.save()
+        p.setPen(QPen(QColor("#0077FF"), 1, Qt.PenStyle.DashLine))
+        p.setBrush(QBrush())
+        p.drawRect(self._preview_rect)
+        p.restore()